@@ -0,0 +1,39 @@
+"""add address validation cache table
+
+Revision ID: add_address_validation_cache
+Revises: add_query_indexes
+Create Date: 2026-10-17 16:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'add_address_validation_cache'
+down_revision: Union[str, None] = 'add_query_indexes'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, None] = None
+
+
+def upgrade() -> None:
+    # Provider results keyed by a hash of the normalized address (shared by all workers)
+    op.create_table(
+        'address_validations',
+        sa.Column('address_key', sa.String(64), nullable=False),
+        sa.Column('validated', sa.Boolean(), nullable=False, server_default=sa.false()),
+        sa.Column('status', sa.String(20), nullable=False),
+        sa.Column('normalized_address', sa.Text(), nullable=True),
+        sa.Column('error', sa.Text(), nullable=True),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now()),
+        sa.Column('expires_at', sa.DateTime(timezone=True), nullable=False),
+        sa.PrimaryKeyConstraint('address_key'),
+    )
+    op.create_index('ix_address_validations_expires_at', 'address_validations', ['expires_at'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_address_validations_expires_at', table_name='address_validations')
+    op.drop_table('address_validations')
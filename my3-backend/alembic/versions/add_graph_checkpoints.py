@@ -0,0 +1,55 @@
+"""add graph checkpoint tables
+
+Revision ID: add_graph_checkpoints
+Revises: add_gift_idea_image_fields
+Create Date: 2026-10-17 12:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'add_graph_checkpoints'
+down_revision: Union[str, None] = 'add_gift_idea_image_fields'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, None] = None
+
+
+def upgrade() -> None:
+    # Durable LangGraph checkpoints (replaces in-process MemorySaver)
+    op.create_table(
+        'graph_checkpoints',
+        sa.Column('thread_id', sa.String(255), nullable=False),
+        sa.Column('checkpoint_ns', sa.String(255), nullable=False, server_default=''),
+        sa.Column('checkpoint_id', sa.String(64), nullable=False),
+        sa.Column('parent_checkpoint_id', sa.String(64), nullable=True),
+        sa.Column('checkpoint_type', sa.String(32), nullable=False),
+        sa.Column('checkpoint', sa.LargeBinary(), nullable=False),
+        sa.Column('metadata_type', sa.String(32), nullable=False),
+        sa.Column('checkpoint_metadata', sa.LargeBinary(), nullable=False),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now()),
+        sa.PrimaryKeyConstraint('thread_id', 'checkpoint_ns', 'checkpoint_id'),
+    )
+    
+    # Pending writes attached to a checkpoint
+    op.create_table(
+        'graph_checkpoint_writes',
+        sa.Column('thread_id', sa.String(255), nullable=False),
+        sa.Column('checkpoint_ns', sa.String(255), nullable=False, server_default=''),
+        sa.Column('checkpoint_id', sa.String(64), nullable=False),
+        sa.Column('task_id', sa.String(64), nullable=False),
+        sa.Column('idx', sa.Integer(), nullable=False),
+        sa.Column('channel', sa.String(255), nullable=False),
+        sa.Column('value_type', sa.String(32), nullable=False),
+        sa.Column('value', sa.LargeBinary(), nullable=False),
+        sa.Column('task_path', sa.String(255), nullable=False, server_default=''),
+        sa.PrimaryKeyConstraint('thread_id', 'checkpoint_ns', 'checkpoint_id', 'task_id', 'idx'),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('graph_checkpoint_writes')
+    op.drop_table('graph_checkpoints')
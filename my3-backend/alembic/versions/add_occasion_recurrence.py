@@ -0,0 +1,48 @@
+"""add occasion recurrence and next occurrence
+
+Revision ID: add_occasion_recurrence
+Revises: add_recipient_natural_key
+Create Date: 2026-10-17 19:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'add_occasion_recurrence'
+down_revision: Union[str, None] = 'add_recipient_natural_key'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, None] = None
+
+
+def upgrade() -> None:
+    op.add_column('occasions', sa.Column('month', sa.Integer(), nullable=True))
+    op.add_column('occasions', sa.Column('day', sa.Integer(), nullable=True))
+    op.add_column('occasions', sa.Column('recurrence', sa.String(20), nullable=True))
+    op.add_column('occasions', sa.Column('next_occurrence', sa.Date(), nullable=True))
+    op.create_index('ix_occasions_user_id_next_occurrence', 'occasions', ['user_id', 'next_occurrence'])
+
+    # Backfill: same keywords as app/utils/occasion_dates.py RECURRING_KEYWORDS.
+    # Past yearly dates are moved forward by roll_forward_occasions() on first read.
+    op.execute("""
+        UPDATE occasions
+        SET month = EXTRACT(MONTH FROM date)::int,
+            day = EXTRACT(DAY FROM date)::int,
+            next_occurrence = date,
+            recurrence = CASE
+                WHEN lower(coalesce(occasion_type, '') || ' ' || name)
+                     ~ '(birthday|anniversary|christmas|valentine|new year)' THEN 'yearly'
+            END
+        WHERE date IS NOT NULL
+    """)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_occasions_user_id_next_occurrence', table_name='occasions')
+    op.drop_column('occasions', 'next_occurrence')
+    op.drop_column('occasions', 'recurrence')
+    op.drop_column('occasions', 'day')
+    op.drop_column('occasions', 'month')
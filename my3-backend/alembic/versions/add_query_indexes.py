@@ -0,0 +1,55 @@
+"""add composite indexes for per-user and per-parent queries
+
+Revision ID: add_query_indexes
+Revises: add_graph_checkpoints
+Create Date: 2026-10-17 14:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'add_query_indexes'
+down_revision: Union[str, None] = 'add_graph_checkpoints'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, None] = None
+
+
+# (index name, table, columns) matched to the query shapes in routes and services
+INDEXES = [
+    # GET /api/recipients and chat context: WHERE user_id ORDER BY created_at DESC
+    ('ix_recipients_user_id_created_at', 'recipients', ['user_id', sa.text('created_at DESC')]),
+    # Duplicate checks on confirm: WHERE user_id AND lower(name) IN (...)
+    ('ix_recipients_user_id_lower_name', 'recipients', ['user_id', sa.text('lower(name)')]),
+    # Chat context: WHERE user_id (upcoming occasions scan by date)
+    ('ix_occasions_user_id_date', 'occasions', ['user_id', 'date']),
+    # Recipient detail and list join: WHERE recipient_id ORDER BY date
+    ('ix_occasions_recipient_id_date', 'occasions', ['recipient_id', 'date']),
+    # Past gifts: WHERE occasion_id IN (...) ORDER BY created_at DESC
+    ('ix_gift_ideas_occasion_id_created_at', 'gift_ideas', ['occasion_id', sa.text('created_at DESC')]),
+    # Conversation history: WHERE conversation_id ORDER BY created_at
+    ('ix_messages_conversation_id_created_at', 'messages', ['conversation_id', 'created_at']),
+    # Conversation lookups/listing: WHERE user_id ORDER BY created_at DESC
+    ('ix_conversations_user_id_created_at', 'conversations', ['user_id', sa.text('created_at DESC')]),
+    # Recipient detail and confirm de-duplication: WHERE user_id AND from_recipient_id [AND to_recipient_id]
+    ('ix_recipient_relationships_user_from_to', 'recipient_relationships', ['user_id', 'from_recipient_id', 'to_recipient_id']),
+]
+
+
+def upgrade() -> None:
+    # Skip indexes that already exist (e.g. databases bootstrapped with create_all)
+    from sqlalchemy import inspect
+    inspector = inspect(op.get_bind())
+
+    for name, table, columns in INDEXES:
+        existing_indexes = [idx['name'] for idx in inspector.get_indexes(table)]
+        if name not in existing_indexes:
+            op.create_index(name, table, columns)
+
+
+def downgrade() -> None:
+    for name, table, _ in reversed(INDEXES):
+        op.drop_index(name, table_name=table)
@@ -0,0 +1,36 @@
+"""add recipient natural key for duplicate detection
+
+Revision ID: add_recipient_natural_key
+Revises: add_background_jobs
+Create Date: 2026-10-17 18:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'add_recipient_natural_key'
+down_revision: Union[str, None] = 'add_background_jobs'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, None] = None
+
+
+def upgrade() -> None:
+    # Generated column: kept current by PostgreSQL on every insert/update, whichever code path writes
+    op.add_column(
+        'recipients',
+        sa.Column(
+            'natural_key',
+            sa.String(360),
+            sa.Computed("lower(btrim(name)) || '|' || coalesce(lower(btrim(relationship_type)), '')", persisted=True),
+        )
+    )
+    op.create_index('ix_recipients_user_id_natural_key', 'recipients', ['user_id', 'natural_key'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_recipients_user_id_natural_key', table_name='recipients')
+    op.drop_column('recipients', 'natural_key')
@@ -4,6 +4,7 @@ from fastapi.security import OAuth2PasswordBearer
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.database.connection import get_db
 from app.database.models import User
+from app.services.auth_cache import CurrentUser, hash_token, token_cache
 from app.utils.auth import decode_access_token
 from sqlalchemy import select
 
@@ -13,14 +14,22 @@ oauth2_scheme = OAuth2PasswordBearer(tokenUrl="api/auth/login")
 async def get_current_user(
     token: str = Depends(oauth2_scheme),
     db: AsyncSession = Depends(get_db)
-) -> User:
-    """Get current authenticated user from JWT token."""
+) -> CurrentUser:
+    """
+    Get current authenticated user from JWT token.
+    Verified tokens are cached until they expire, so repeat requests skip the DB lookup.
+    """
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
     
+    token_key = hash_token(token)
+    principal = token_cache.get(token_key)
+    if principal is not None:
+        return principal
+    
     payload = decode_access_token(token)
     if payload is None:
         raise credentials_exception
@@ -29,11 +38,13 @@ async def get_current_user(
     if user_id is None:
         raise credentials_exception
     
-    result = await db.execute(select(User).where(User.id == user_id))
-    user = result.scalar_one_or_none()
+    version = token_cache.version(user_id)
+    result = await db.execute(select(User.id, User.email, User.name).where(User.id == user_id))
+    row = result.one_or_none()
     
-    if user is None:
+    if row is None:
         raise credentials_exception
     
-    return user
-
+    principal = CurrentUser(id=row.id, email=row.email, name=row.name)
+    token_cache.put(token_key, principal, version, token_exp=payload.get("exp"))
+    return principal
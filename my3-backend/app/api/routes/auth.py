@@ -5,12 +5,20 @@ from sqlalchemy import select
 from app.database.connection import get_db
 from app.database.models import User
 from app.database.schemas import UserCreate, UserResponse, UserLogin
-from app.utils.auth import get_password_hash, verify_password, create_access_token
+from app.utils.auth import password_hasher, PasswordHasherBusyError, create_access_token
 from app.config import settings
 
 router = APIRouter(prefix="/api/auth", tags=["auth"])
 
 
+def _hasher_busy() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail="Too many authentication requests, please retry shortly",
+        headers={"Retry-After": "1"},
+    )
+
+
 @router.post("/register", status_code=status.HTTP_201_CREATED)
 async def register(user_data: UserCreate, db: AsyncSession = Depends(get_db)):
     """
@@ -34,8 +42,11 @@ async def register(user_data: UserCreate, db: AsyncSession = Depends(get_db)):
             detail="Password must be at least 8 characters long"
         )
     
-    # Create new user
-    hashed_password = get_password_hash(user_data.password)
+    # Create new user (bcrypt runs on the hashing pool, off the event loop)
+    try:
+        hashed_password = await password_hasher.hash(user_data.password)
+    except PasswordHasherBusyError:
+        raise _hasher_busy()
     new_user = User(
         email=user_data.email,
         name=user_data.name,
@@ -71,13 +82,31 @@ async def login(
         result = await db.execute(select(User).where(User.email == login_data.email))
         user = result.scalar_one_or_none()
         
-        if not user or not verify_password(login_data.password, user.hashed_password):
+        if not user:
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="Incorrect email or password",
+                headers={"WWW-Authenticate": "Bearer"},
+            )
+        
+        try:
+            valid, new_hash = await password_hasher.verify_and_update(login_data.password, user.hashed_password)
+        except PasswordHasherBusyError:
+            raise _hasher_busy()
+        
+        if not valid:
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 detail="Incorrect email or password",
                 headers={"WWW-Authenticate": "Bearer"},
             )
         
+        # Transparently upgrade hashes made with outdated cost settings
+        if new_hash:
+            user.hashed_password = new_hash
+            await db.commit()
+            await db.refresh(user)
+        
         # Create access token (7 days expiry)
         access_token_expires = timedelta(days=7)
         access_token = create_access_token(
@@ -95,7 +124,7 @@ async def login(
     except Exception as e:
         import logging
         logger = logging.getLogger(__name__)
-        logger.error(f"Login error: {e}", exc_info=True)
+        logger.error("Login error: %s", e, exc_info=True)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Login failed: {str(e)}"
@@ -28,7 +28,7 @@ async def health_check():
         http_status = status.HTTP_200_OK
         
     except Exception as e:
-        logger.error(f"Database health check failed: {e}", exc_info=True)
+        logger.error("Database health check failed: %s", e, exc_info=True)
         database_status = "disconnected"
         overall_status = "unhealthy"
         http_status = status.HTTP_503_SERVICE_UNAVAILABLE
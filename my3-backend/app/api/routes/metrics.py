@@ -0,0 +1,68 @@
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+import logging
+from app.database.connection import engine
+from app.utils.auth import password_hasher
+from app.utils.metrics import registry
+from app.services.auth_cache import token_cache
+from app.services.user_context import user_context_cache
+from app.services.gift_cache import gift_idea_cache
+from app.services.image_extractor import image_url_cache
+from app.services.address_validator import address_result_cache
+from app.services.job_queue import job_runner
+from app.utils.logging_config import logging_stats
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter(prefix="/api", tags=["metrics"])
+
+CACHES = {
+    "auth_token": token_cache,
+    "user_context": user_context_cache,
+    "gift_idea": gift_idea_cache,
+    "image_url": image_url_cache,
+    "address_result": address_result_cache,
+}
+
+
+def collect_component_stats():
+    """Counters kept by the caches, the password hasher, the DB pool, the job runner and logging."""
+    yield ("cache_hits_total", "counter", "In-process cache hits",
+           [({"cache": name}, cache.hits) for name, cache in CACHES.items()])
+    yield ("cache_misses_total", "counter", "In-process cache misses",
+           [({"cache": name}, cache.misses) for name, cache in CACHES.items()])
+    
+    stats = password_hasher.stats()
+    yield ("password_hasher_in_flight", "gauge", "Password hash operations running or queued", [({}, stats["in_flight"])])
+    yield ("password_hasher_completed_total", "counter", "Password hash operations completed", [({}, stats["completed"])])
+    yield ("password_hasher_rejected_total", "counter", "Password hash operations rejected as busy", [({}, stats["rejected"])])
+    yield ("password_hasher_avg_wait_ms", "gauge", "Mean queue wait per hash operation", [({}, stats["avg_wait_ms"])])
+    
+    pool = engine.sync_engine.pool
+    if hasattr(pool, "checkedout"):
+        yield ("db_pool_checked_out_connections", "gauge", "Pooled connections currently in use", [({}, pool.checkedout())])
+        yield ("db_pool_size", "gauge", "Connections held open by the pool", [({}, pool.size())])
+    
+    yield ("background_jobs_total", "counter", "Background jobs processed by this worker", [
+        ({"outcome": "completed"}, job_runner.completed),
+        ({"outcome": "retried"}, job_runner.retried),
+        ({"outcome": "failed"}, job_runner.failed),
+    ])
+    
+    log_stats = logging_stats()
+    yield ("log_records_discarded_total", "counter", "Log records not written", [
+        ({"reason": "queue_full"}, log_stats["dropped"]),
+        ({"reason": "sampled"}, log_stats["sampled"]),
+    ])
+
+
+registry.add_collector(collect_component_stats)
+
+
+@router.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    """
+    Prometheus metrics for this worker: request latency per route/status, DB time per
+    request, pool checkout wait, in-flight requests, cache and job counters.
+    """
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
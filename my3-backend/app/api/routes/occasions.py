@@ -0,0 +1,56 @@
+from datetime import date
+from typing import List
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+import logging
+from app.database.connection import get_db
+from app.database.schemas import UpcomingOccasionResponse
+from app.api.dependencies import get_current_user, CurrentUser
+from app.services.occasions import get_upcoming_occasions, roll_forward_occasions
+from app.services.user_context import invalidate_user_context
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter(prefix="/api/occasions", tags=["occasions"])
+
+
+@router.get("/upcoming", response_model=List[UpcomingOccasionResponse])
+async def get_upcoming(
+    days: int = Query(30, ge=0, le=366, description="Look-ahead window in days"),
+    current_user: CurrentUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Get the current user's occasions due within the next `days` days, soonest first.
+    Recurring occasions (birthdays, anniversaries) are included every year.
+    """
+    today = date.today()
+    
+    # Passed yearly occasions move to next year first (usually a no-op index probe)
+    if await roll_forward_occasions(db, current_user.id, today):
+        await db.commit()
+        invalidate_user_context(current_user.id)
+    
+    upcoming = await get_upcoming_occasions(db, current_user.id, days, today)
+    
+    response = [
+        UpcomingOccasionResponse(
+            id=occasion.id,
+            recipient_id=occasion.recipient_id,
+            recipient_name=recipient_name,
+            name=occasion.name,
+            occasion_type=occasion.occasion_type,
+            date=occasion.date,
+            month=occasion.month,
+            day=occasion.day,
+            recurrence=occasion.recurrence,
+            next_occurrence=occasion.next_occurrence,
+            days_until=(occasion.next_occurrence - today).days,
+            budget_range=occasion.budget_range,
+            status=occasion.status
+        )
+        for occasion, recipient_name in upcoming
+    ]
+    
+    logger.info("Retrieved %d occasions in the next %s days for user %s", len(response), days, current_user.id)
+    return response
@@ -7,12 +7,17 @@ from sqlalchemy import select, func, and_
 from sqlalchemy.orm import selectinload
 import logging
 from app.database.connection import get_db
-from app.database.models import User, Recipient, Occasion, GiftIdea, RecipientRelationship
+from app.database.models import Recipient, Occasion, GiftIdea, RecipientRelationship
 from app.database.schemas import (
     RecipientCreate, RecipientUpdate, RecipientResponse, 
-    RecipientDetailResponse, OccasionResponse, GiftIdeaResponse
+    RecipientDetailResponse, OccasionResponse, GiftIdeaResponse, DuplicateRecipientGroup
 )
-from app.api.dependencies import get_current_user
+from app.api.dependencies import get_current_user, CurrentUser
+from app.services.user_context import invalidate_user_context
+from app.services.address_validator import address_job, recipient_address_key
+from app.services.job_queue import enqueue_jobs, job_runner
+from app.services.recipient_duplicates import find_duplicate_recipients
+from app.services.occasions import roll_forward_occasions
 
 logger = logging.getLogger(__name__)
 
@@ -21,7 +26,7 @@ router = APIRouter(prefix="/api/recipients", tags=["recipients"])
 
 @router.get("", response_model=List[RecipientResponse])
 async def get_recipients(
-    current_user: User = Depends(get_current_user),
+    current_user: CurrentUser = Depends(get_current_user),
     db: AsyncSession = Depends(get_db)
 ):
     """
@@ -31,13 +36,18 @@ async def get_recipients(
     """
     today = date.today()
     
+    # Recurring occasions that have passed count again once moved to next year
+    if await roll_forward_occasions(db, current_user.id, today):
+        await db.commit()
+        invalidate_user_context(current_user.id)
+    
     # Get recipients with occasion counts
     result = await db.execute(
         select(
             Recipient,
             func.count(Occasion.id).filter(
                 and_(
-                    Occasion.date >= today,
+                    Occasion.next_occurrence >= today,
                     Occasion.status != "done"
                 )
             ).label("upcoming_occasions_count")
@@ -95,14 +105,60 @@ async def get_recipients(
         }
         recipients.append(RecipientResponse(**recipient_dict))
     
-    logger.info(f"Retrieved {len(recipients)} recipients for user {current_user.id}")
+    logger.info("Retrieved %d recipients for user %s", len(recipients), current_user.id)
     return recipients
 
 
+@router.get("/duplicates", response_model=List[DuplicateRecipientGroup])
+async def get_duplicate_recipients(
+    current_user: CurrentUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Get groups of recipients with the same name and relationship.
+    Uses the indexed natural_key column; most users get an empty list from one aggregate.
+    """
+    groups = await find_duplicate_recipients(db, current_user.id)
+    
+    response = []
+    for group in groups:
+        first = group[0]
+        response.append(DuplicateRecipientGroup(
+            name=first.name.strip(),
+            relationship=first.relationship_type,
+            recipients=[
+                RecipientResponse(
+                    id=recipient.id,
+                    user_id=recipient.user_id,
+                    name=recipient.name,
+                    relationship=recipient.relationship_type,
+                    age_band=recipient.age_band,
+                    interests=recipient.interests or [],
+                    constraints=recipient.constraints or [],
+                    notes=recipient.notes,
+                    is_core_contact=recipient.is_core_contact,
+                    network_level=recipient.network_level,
+                    street_address=recipient.street_address,
+                    city=recipient.city,
+                    state_province=recipient.state_province,
+                    postal_code=recipient.postal_code,
+                    country=recipient.country,
+                    address_validation_status=recipient.address_validation_status,
+                    created_at=recipient.created_at,
+                    updated_at=recipient.updated_at
+                )
+                for recipient in group
+            ]
+        ))
+    
+    logger.info("Found %d duplicate recipient groups for user %s", len(response), current_user.id)
+    return response
+
+
 @router.get("/{recipient_id}", response_model=RecipientDetailResponse)
 async def get_recipient(
     recipient_id: UUID,
-    current_user: User = Depends(get_current_user),
+    current_user: CurrentUser = Depends(get_current_user),
     db: AsyncSession = Depends(get_db)
 ):
     """
@@ -124,18 +180,24 @@ async def get_recipient(
             detail="Recipient not found"
         )
     
+    today = date.today()
+    
+    # Recurring occasions that have passed count again once moved to next year
+    if await roll_forward_occasions(db, current_user.id, today):
+        await db.commit()
+        invalidate_user_context(current_user.id)
+    
     # Get occasions for this recipient
     occasions_result = await db.execute(
         select(Occasion).where(Occasion.recipient_id == recipient_id)
-        .order_by(Occasion.date.desc() if Occasion.date else Occasion.created_at.desc())
+        .order_by(Occasion.next_occurrence.desc().nulls_last(), Occasion.created_at.desc())
     )
     occasions = occasions_result.scalars().all()
     
     # Get past gifts (gifts from occasions that are done or have passed)
-    today = date.today()
     past_occasions_ids = [
         o.id for o in occasions 
-        if (o.date and o.date < today) or o.status.value == "done"
+        if (o.next_occurrence and o.next_occurrence < today) or o.status.value == "done"
     ]
     
     past_gifts = []
@@ -149,7 +211,7 @@ async def get_recipient(
     # Count upcoming occasions
     upcoming_occasions_count = sum(
         1 for o in occasions 
-        if o.date and o.date >= today and o.status.value != "done"
+        if o.next_occurrence and o.next_occurrence >= today and o.status.value != "done"
     )
     
     # Load relationships for this recipient
@@ -194,14 +256,14 @@ async def get_recipient(
         "past_gifts": [GiftIdeaResponse.model_validate(g) for g in past_gifts]
     }
     
-    logger.info(f"Retrieved recipient {recipient_id} with {len(occasions)} occasions and {len(past_gifts)} past gifts")
+    logger.info("Retrieved recipient %s with %d occasions and %d past gifts", recipient_id, len(occasions), len(past_gifts))
     return RecipientDetailResponse(**recipient_dict)
 
 
 @router.post("", response_model=RecipientResponse, status_code=status.HTTP_201_CREATED)
 async def create_recipient(
     recipient_data: RecipientCreate,
-    current_user: User = Depends(get_current_user),
+    current_user: CurrentUser = Depends(get_current_user),
     db: AsyncSession = Depends(get_db)
 ):
     """Create a new recipient."""
@@ -211,26 +273,26 @@ async def create_recipient(
         **recipient_data.model_dump()
     )
     
-    # Validate address if provided
-    if new_recipient.street_address and new_recipient.city:
-        from app.services.address_validator import validate_address
-        import json
-        validation_result = await validate_address(
+    # Validate address if provided (in the background, committed with the recipient)
+    needs_validation = bool(new_recipient.street_address and new_recipient.city)
+    new_recipient.address_validation_status = "pending" if needs_validation else "unvalidated"
+    
+    db.add(new_recipient)
+    if needs_validation:
+        await db.flush()
+        await enqueue_jobs(db, [address_job(
+            new_recipient.id,
             street=new_recipient.street_address,
             city=new_recipient.city,
             state=new_recipient.state_province,
             postal_code=new_recipient.postal_code,
             country=new_recipient.country
-        )
-        new_recipient.address_validation_status = validation_result.get("status", "unvalidated")
-        if validation_result.get("normalized_address"):
-            new_recipient.validated_address_json = json.dumps(validation_result["normalized_address"])
-    else:
-        new_recipient.address_validation_status = "unvalidated"
-    
-    db.add(new_recipient)
+        )])
     await db.commit()
     await db.refresh(new_recipient)
+    invalidate_user_context(current_user.id)
+    if needs_validation:
+        job_runner.notify()
     
     return new_recipient
 
@@ -239,7 +301,7 @@ async def create_recipient(
 async def update_recipient(
     recipient_id: UUID,
     recipient_data: RecipientUpdate,
-    current_user: User = Depends(get_current_user),
+    current_user: CurrentUser = Depends(get_current_user),
     db: AsyncSession = Depends(get_db)
 ):
     """Update a recipient."""
@@ -257,38 +319,34 @@ async def update_recipient(
             detail="Recipient not found"
         )
     
-    # Track if address changed
-    address_changed = False
-    old_street = recipient.street_address
-    old_city = recipient.city
+    # Track if address changed (re-saving the same address, e.g. from a full form, is not a change)
+    old_address_key = recipient_address_key(recipient)
     
     # Update fields
     update_data = recipient_data.model_dump(exclude_unset=True)
     for field, value in update_data.items():
         setattr(recipient, field, value)
-        # Check if address fields changed
-        if field in ["street_address", "city", "state_province", "postal_code", "country"]:
-            address_changed = True
-    
-    # Validate address if changed and complete
-    if address_changed and recipient.street_address and recipient.city:
-        from app.services.address_validator import validate_address
-        import json
-        validation_result = await validate_address(
+    address_changed = recipient_address_key(recipient) != old_address_key
+    
+    # Validate address if changed and complete (in the background, committed with the update)
+    needs_validation = bool(address_changed and recipient.street_address and recipient.city)
+    if needs_validation:
+        recipient.address_validation_status = "pending"
+        await enqueue_jobs(db, [address_job(
+            recipient.id,
             street=recipient.street_address,
             city=recipient.city,
             state=recipient.state_province,
             postal_code=recipient.postal_code,
-            country=recipient.country
-        )
-        recipient.address_validation_status = validation_result.get("status", "unvalidated")
-        if validation_result.get("normalized_address"):
-            recipient.validated_address_json = json.dumps(validation_result["normalized_address"])
-        else:
-            recipient.validated_address_json = None
+            country=recipient.country,
+            clear_on_failure=True
+        )], rearm_finished=True)
     
     await db.commit()
     await db.refresh(recipient)
+    invalidate_user_context(current_user.id)
+    if needs_validation:
+        job_runner.notify()
     
     return recipient
 
@@ -296,7 +354,7 @@ async def update_recipient(
 @router.delete("/{recipient_id}")
 async def delete_recipient(
     recipient_id: UUID,
-    current_user: User = Depends(get_current_user),
+    current_user: CurrentUser = Depends(get_current_user),
     db: AsyncSession = Depends(get_db)
 ):
     """
@@ -324,8 +382,9 @@ async def delete_recipient(
     # In SQLAlchemy 2.0 async, use delete() method
     await db.delete(recipient)
     await db.commit()
+    invalidate_user_context(current_user.id)
     
-    logger.info(f"Deleted recipient {recipient_id} ({recipient_name}) for user {current_user.id}")
+    logger.info("Deleted recipient %s for user %s", recipient_id, current_user.id)
     
     return {
         "message": f"Recipient '{recipient_name}' and all associated occasions have been deleted successfully."
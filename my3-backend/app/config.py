@@ -8,17 +8,98 @@ class Settings(BaseSettings):
     
     # OpenAI
     openai_api_key: str
+    openai_model: str = "gpt-4"
+    openai_base_url: Optional[str] = None  # e.g. the load-test stub (python -m benchmarks.openai_stub)
+    llm_max_connections: int = 100  # Shared HTTP pool for all LLM clients
+    llm_max_keepalive_connections: int = 20
+    llm_keepalive_expiry_seconds: float = 30.0
+    llm_timeout_seconds: float = 60.0
+    
+    # Intent routing: local rules answer confident cases without calling the LLM
+    intent_fast_path_enabled: bool = True
+    intent_fast_path_threshold: float = 0.85
+    combined_intent_extraction: bool = False  # One LLM call for intent + person extraction
+    
+    # LLM record/replay (deterministic tests and benchmarks without network)
+    llm_mode: str = "live"  # "live", "record" (call OpenAI and save replies) or "replay"
+    llm_cassette_path: str = "tests/cassettes/llm.json"
+    llm_replay_latency_ms: float = 0.0  # Simulated latency per replayed call
     
     # Address Validation (optional)
     google_maps_api_key: Optional[str] = None
     smartystreets_api_key: Optional[str] = None
     enable_address_validation: bool = True
+    address_validation_timeout_seconds: float = 10.0
+    address_cache_size: int = 5000  # In-process LRU in front of the address_validations table
+    address_cache_ttl_days: int = 30  # Validated addresses
+    address_cache_negative_ttl_hours: int = 24  # Addresses the provider could not find
+    
+    # Background jobs (address validation after confirmations and recipient edits)
+    job_runner_enabled: bool = True  # Run workers inside the API process
+    job_workers: int = 2
+    job_poll_interval_seconds: float = 5.0
+    job_lease_seconds: int = 300  # A running job is reclaimed after this long
+    job_max_attempts: int = 5
+    job_retry_base_seconds: float = 10.0  # Doubles per attempt
+    job_retry_max_seconds: float = 900.0
     
     # JWT
     secret_key: str
     algorithm: str = "HS256"
     access_token_expire_minutes: int = 10080  # 7 days (7 * 24 * 60)
     
+    # Password hashing (bcrypt runs on a bounded thread pool, off the event loop)
+    password_bcrypt_rounds: int = 12  # Raising this rehashes existing passwords on login
+    password_hash_workers: int = 4
+    password_hash_max_queue: int = 64  # Running + waiting operations before logins get 503
+    
+    # Verified token cache (get_current_user)
+    auth_cache_size: int = 10000
+    auth_cache_ttl_seconds: int = 300  # Upper bound; entries never outlive the token's exp
+    
+    # LangGraph checkpointer
+    checkpointer_backend: str = "postgres"  # "postgres", "sqlite" or "memory"
+    checkpointer_sqlite_path: str = "checkpoints.db"
+    checkpointer_keep_latest: int = 5  # Checkpoints retained per conversation thread
+    
+    # Per-user chat context cache
+    user_context_cache_size: int = 1000  # Max users kept in the LRU
+    user_context_cache_ttl_seconds: int = 300  # Bounds staleness across workers
+    
+    # Gift-idea result cache (generate_gifts_node)
+    gift_cache_size: int = 2000  # 0 disables caching
+    gift_cache_ttl_seconds: int = 3600
+    
+    # Casual-chat prompt context (most relevant recipients/occasions first)
+    chat_context_token_budget: int = 1500  # 0 sends the whole network
+    
+    # Conversation history windowing (older turns folded into a running summary)
+    history_max_messages: int = 20  # Fold once the raw history is longer than this (0 = no limit)
+    history_max_tokens: int = 3000  # ...or larger than this many tokens (0 = no limit)
+    history_keep_messages: int = 8  # Raw messages kept after folding
+    history_summary_max_chars: int = 2000
+    
+    # Per-node timing and token accounting (exported on /api/metrics)
+    chat_trace_in_response: bool = False  # Opt in to a per-node trace in ChatResponse.metadata (development only)
+    
+    # Gift image enrichment (product page og:image lookups after generate_gifts)
+    image_enrichment_enabled: bool = True
+    image_enrichment_deadline_seconds: float = 3.0  # Overall wait for all ideas of one turn
+    image_fetch_timeout_seconds: float = 5.0
+    image_fetch_max_connections: int = 20
+    image_fetch_per_host: int = 2
+    image_head_max_bytes: int = 262144  # Stop reading at </head> or after this many bytes
+    image_cache_size: int = 5000
+    image_cache_ttl_seconds: int = 86400
+    image_cache_negative_ttl_seconds: int = 3600  # Pages without an image
+    
+    # Logging (formatting, redaction and writes happen on a background thread)
+    log_level: str = "INFO"
+    log_json: bool = False  # JSON lines instead of console-style output
+    log_queue_size: int = 10000  # Records beyond this are dropped rather than blocking requests
+    log_sample_rates: str = "app.graph.nodes=0.2,app.api.routes.chat=0.2"  # Share of INFO/DEBUG lines kept per logger
+    log_redact_pii: bool = True
+    
     # CORS
     cors_origins: str = "http://localhost:3000,http://localhost:3001"
     
@@ -2,6 +2,7 @@ from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine, async_sess
 from sqlalchemy.orm import declarative_base
 from sqlalchemy.pool import NullPool
 from app.config import settings
+from app.utils.metrics import TimedAsyncQueuePool, instrument_engine
 import logging
 
 logger = logging.getLogger(__name__)
@@ -16,7 +17,7 @@ if database_url.startswith("postgresql://") and not database_url.startswith("pos
 elif database_url.startswith("postgresql+asyncpg://"):
     logger.debug("Database URL already uses asyncpg driver")
 else:
-    logger.debug(f"Database URL scheme: {database_url.split('://')[0] if '://' in database_url else 'unknown'}")
+    logger.debug("Database URL scheme: %s", database_url.split("://")[0] if "://" in database_url else "unknown")
 
 # Create async engine with proper pool settings
 engine = create_async_engine(
@@ -29,9 +30,11 @@ engine = create_async_engine(
     pool_pre_ping=True,  # Test connections before using them (handles stale connections)
     pool_recycle=3600,  # Recycle connections after 1 hour (prevents stale connections)
     pool_timeout=30,  # Timeout for getting connection from pool
-    # Use NullPool for SQLite, regular pool for PostgreSQL
-    poolclass=None if "postgresql" in database_url.lower() else NullPool,
+    # Use NullPool for SQLite, regular pool (timing checkout waits for /api/metrics) for PostgreSQL
+    poolclass=TimedAsyncQueuePool if "postgresql" in database_url.lower() else NullPool,
 )
+# Query timing per request for /api/metrics
+instrument_engine(engine.sync_engine)
 
 # Create async session factory
 AsyncSessionLocal = async_sessionmaker(
@@ -72,6 +75,6 @@ async def init_db() -> None:
         
         logger.info("Database initialized successfully")
     except Exception as e:
-        logger.error(f"Error initializing database: {e}")
+        logger.error("Error initializing database: %s", e)
         raise
 
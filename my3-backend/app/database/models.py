@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, Text, Date, DateTime, ForeignKey, Enum as SQLEnum, ARRAY, Boolean, Integer
+from sqlalchemy import Column, String, Text, Date, DateTime, ForeignKey, Enum as SQLEnum, ARRAY, Boolean, Integer, LargeBinary, Index, Uuid, Computed
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
@@ -7,6 +7,10 @@ import enum
 from app.database.connection import Base
 
 
+# Same normalization the chat duplicate check used: (name.lower().strip(), relationship.lower().strip())
+RECIPIENT_NATURAL_KEY_SQL = "lower(btrim(name)) || '|' || coalesce(lower(btrim(relationship_type)), '')"
+
+
 class OccasionStatus(str, enum.Enum):
     IDEA_NEEDED = "idea_needed"
     SHORTLISTED = "shortlisted"
@@ -48,11 +52,19 @@ class Recipient(Base):
     state_province = Column(String(100))  # optional
     postal_code = Column(String(20))  # optional
     country = Column(String(100))  # optional
-    address_validation_status = Column(String(20))  # "validated", "unvalidated", "failed", optional
+    address_validation_status = Column(String(20))  # "pending", "validated", "unvalidated", "failed", optional
     validated_address_json = Column(Text)  # Store normalized/validated address from API, optional
+    # Duplicate-detection key "name|relationship" (lowercased, trimmed), maintained by the database on every write
+    natural_key = Column(String(360), Computed(RECIPIENT_NATURAL_KEY_SQL, persisted=True))
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
     
+    __table_args__ = (
+        Index("ix_recipients_user_id_created_at", user_id, created_at.desc()),
+        Index("ix_recipients_user_id_lower_name", user_id, func.lower(name)),
+        Index("ix_recipients_user_id_natural_key", user_id, natural_key),
+    )
+    
     # Relationships
     user = relationship("User", back_populates="recipients")
     occasions = relationship("Occasion", back_populates="recipient", cascade="all, delete-orphan")
@@ -69,11 +81,22 @@ class Occasion(Base):
     name = Column(String(255), nullable=False)  # "Birthday", "Anniversary", etc.
     occasion_type = Column(String(100))  # birthday, anniversary, holiday, etc.
     date = Column(Date)  # optional
+    # Recurrence (app/utils/occasion_dates.py): month/day repeat "yearly"; None is a one-off on date
+    month = Column(Integer)
+    day = Column(Integer)
+    recurrence = Column(String(20))
+    next_occurrence = Column(Date)  # Kept current by roll_forward_occasions(); what "upcoming" scans
     budget_range = Column(String(50))  # "$50-100", etc.
     status = Column(SQLEnum(OccasionStatus), default=OccasionStatus.IDEA_NEEDED)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
     
+    __table_args__ = (
+        Index("ix_occasions_user_id_date", user_id, date),
+        Index("ix_occasions_recipient_id_date", recipient_id, date),
+        Index("ix_occasions_user_id_next_occurrence", user_id, next_occurrence),
+    )
+    
     # Relationships
     recipient = relationship("Recipient", back_populates="occasions")
     gift_ideas = relationship("GiftIdea", back_populates="occasion", cascade="all, delete-orphan")
@@ -94,6 +117,10 @@ class GiftIdea(Base):
     is_shortlisted = Column(String(10), default="false")  # "true" or "false" as string for LangGraph compatibility
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     
+    __table_args__ = (
+        Index("ix_gift_ideas_occasion_id_created_at", occasion_id, created_at.desc()),
+    )
+    
     # Relationships
     occasion = relationship("Occasion", back_populates="gift_ideas")
 
@@ -105,6 +132,10 @@ class Conversation(Base):
     user_id = Column(UUID(as_uuid=True), ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     
+    __table_args__ = (
+        Index("ix_conversations_user_id_created_at", user_id, created_at.desc()),
+    )
+    
     # Relationships
     user = relationship("User", back_populates="conversations")
     messages = relationship("Message", back_populates="conversation", cascade="all, delete-orphan")
@@ -120,6 +151,10 @@ class Message(Base):
     message_metadata = Column(Text)  # JSON string for additional data
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     
+    __table_args__ = (
+        Index("ix_messages_conversation_id_created_at", conversation_id, created_at),
+    )
+    
     # Relationships
     conversation = relationship("Conversation", back_populates="messages")
 
@@ -135,7 +170,76 @@ class RecipientRelationship(Base):
     is_bidirectional = Column(Boolean, default=False)  # True for spouse/partner relationships
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     
+    __table_args__ = (
+        Index("ix_recipient_relationships_user_from_to", user_id, from_recipient_id, to_recipient_id),
+    )
+    
     # Relationships
     from_recipient = relationship("Recipient", foreign_keys=[from_recipient_id], back_populates="relationships_from")
     to_recipient = relationship("Recipient", foreign_keys=[to_recipient_id], back_populates="relationships_to")
 
+
+
+class GraphCheckpoint(Base):
+    """Serialized LangGraph checkpoint (one row per conversation step)."""
+    __tablename__ = "graph_checkpoints"
+    
+    thread_id = Column(String(255), primary_key=True)  # conversation id
+    checkpoint_ns = Column(String(255), primary_key=True, default="")
+    checkpoint_id = Column(String(64), primary_key=True)  # time-ordered (uuid6)
+    parent_checkpoint_id = Column(String(64))
+    checkpoint_type = Column(String(32), nullable=False)  # serializer type tag
+    checkpoint = Column(LargeBinary, nullable=False)
+    metadata_type = Column(String(32), nullable=False)
+    checkpoint_metadata = Column(LargeBinary, nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+
+class GraphCheckpointWrite(Base):
+    """Pending channel write attached to a LangGraph checkpoint."""
+    __tablename__ = "graph_checkpoint_writes"
+    
+    thread_id = Column(String(255), primary_key=True)
+    checkpoint_ns = Column(String(255), primary_key=True, default="")
+    checkpoint_id = Column(String(64), primary_key=True)
+    task_id = Column(String(64), primary_key=True)
+    idx = Column(Integer, primary_key=True)
+    channel = Column(String(255), nullable=False)
+    value_type = Column(String(32), nullable=False)
+    value = Column(LargeBinary, nullable=False)
+    task_path = Column(String(255), nullable=False, default="")
+
+
+class AddressValidation(Base):
+    """Cached address validation result, keyed by a hash of the normalized address."""
+    __tablename__ = "address_validations"
+    
+    address_key = Column(String(64), primary_key=True)  # sha256 (see normalize_address_key)
+    validated = Column(Boolean, nullable=False, default=False)
+    status = Column(String(20), nullable=False)  # validated, unvalidated
+    normalized_address = Column(Text)  # JSON string
+    error = Column(Text)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    expires_at = Column(DateTime(timezone=True), nullable=False, index=True)
+
+
+class BackgroundJob(Base):
+    """Queued unit of background work (see app/services/job_queue.py)."""
+    __tablename__ = "background_jobs"
+    
+    id = Column(Uuid, primary_key=True, default=uuid.uuid4)  # generic type: also runs on SQLite
+    kind = Column(String(50), nullable=False)  # handler name, e.g. validate_address
+    job_key = Column(String(255), unique=True, nullable=False)  # idempotency key
+    payload = Column(Text, nullable=False)  # JSON string
+    status = Column(String(20), nullable=False, default="pending")  # pending, running, done, failed
+    attempts = Column(Integer, nullable=False, default=0)
+    max_attempts = Column(Integer, nullable=False, default=5)
+    run_after = Column(DateTime(timezone=True), nullable=False)
+    locked_at = Column(DateTime(timezone=True))
+    last_error = Column(Text)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+    
+    __table_args__ = (
+        Index("ix_background_jobs_status_run_after", status, run_after),
+    )
@@ -100,6 +100,13 @@ class RecipientResponse(RecipientBase):
         from_attributes = True
 
 
+class DuplicateRecipientGroup(BaseModel):
+    """Recipients sharing the same name and relationship (newest first)."""
+    name: str
+    relationship: Optional[str] = None
+    recipients: List[RecipientResponse]
+
+
 # Occasion Schemas
 class OccasionBase(BaseModel):
     name: str
@@ -154,6 +161,23 @@ class OccasionResponse(OccasionBase):
         from_attributes = True
 
 
+class UpcomingOccasionResponse(BaseModel):
+    """An occasion due soon, with its resolved next date (no future-date validation: birth dates are past)."""
+    id: UUID
+    recipient_id: UUID
+    recipient_name: str
+    name: str
+    next_occurrence: date  # Declared before the "date" field, which shadows the type below it
+    days_until: int
+    occasion_type: Optional[str] = None
+    date: Optional[date] = None
+    month: Optional[int] = None
+    day: Optional[int] = None
+    recurrence: Optional[str] = None
+    budget_range: Optional[str] = None
+    status: OccasionStatus
+
+
 # Gift Idea Schemas
 class GiftIdeaBase(BaseModel):
     title: str
@@ -271,6 +295,7 @@ class ChatMessage(BaseModel):
 class ChatRequest(BaseModel):
     message: str
     conversation_id: Optional[UUID] = None
+    regenerate: bool = False  # Skip cached gift ideas and ask the LLM again
 
 
 class ChatResponse(BaseModel):
@@ -0,0 +1,237 @@
+"""
+Context selection for casual-chat prompts.
+
+compose_response_node used to serialize every recipient and occasion into the
+system prompt, so prompt size grew with the network. build_chat_context() ranks
+people by relevance to the message and adds them, with their occasions, until a
+token budget is reached:
+- names mentioned in the message (full name or any name part)
+- relationship words ("my mom", "sister's", ...)
+- interest keywords
+- date questions (birthday, when, upcoming, month names) favour people with the
+  soonest occasions
+- people linked to a mentioned person (for "who is Ravi's wife?")
+Everyone else fills the remaining budget in network order, so small networks are
+sent in full exactly as before.
+"""
+import logging
+import re
+from dataclasses import dataclass, field
+from datetime import date
+from typing import Dict, List, Optional
+
+from app.graph.name_index import normalize_name
+from app.graph.network_directory import NetworkDirectory
+
+logger = logging.getLogger(__name__)
+
+RELATIONSHIP_SYNONYMS = {
+    "mother": "mom", "mum": "mom", "mommy": "mom", "mama": "mom",
+    "father": "dad", "daddy": "dad", "papa": "dad",
+    "spouse": "wife", "partner": "wife",
+    "bro": "brother", "sis": "sister",
+    "coworker": "colleague", "boss": "colleague",
+}
+DATE_WORDS = {
+    "when", "date", "birthday", "birthdays", "anniversary", "anniversaries", "upcoming", "next",
+    "soon", "occasion", "occasions", "month", "week", "today", "tomorrow",
+    "january", "february", "march", "april", "may", "june", "july", "august",
+    "september", "october", "november", "december",
+}
+STOP_WORDS = {"what", "does", "like", "likes", "love", "loves", "with", "about", "that", "this", "have", "their", "them"}
+WORD_RX = re.compile(r"[a-z0-9]+")
+
+_encoding = None
+_encoding_failed = False
+
+
+def estimate_tokens(text: str) -> int:
+    """Cheap token estimate (~4 characters per token)."""
+    return (len(text) + 3) // 4
+
+
+def count_tokens(text: str) -> int:
+    """Prompt tokens for text, using tiktoken when its encoding is available."""
+    global _encoding, _encoding_failed
+    if _encoding is None and not _encoding_failed:
+        try:
+            import tiktoken
+            _encoding = tiktoken.get_encoding("cl100k_base")
+        except Exception as e:
+            _encoding_failed = True
+            logger.info("tiktoken unavailable, estimating prompt tokens: %s", e)
+    if _encoding is not None:
+        return len(_encoding.encode(text))
+    return estimate_tokens(text)
+
+
+def format_recipient_line(recipient: dict, directory: NetworkDirectory) -> str:
+    """One line of the 'People in the user's network' section."""
+    recipient_str = f"- {recipient.get('name', 'Unknown')}"
+    if recipient.get('relationship'):
+        recipient_str += f" ({recipient.get('relationship')})"
+    if recipient.get('interests'):
+        recipient_str += f" - Interests: {', '.join(recipient.get('interests', []))}"
+    if recipient.get('notes'):
+        recipient_str += f" - Notes: {recipient.get('notes')}"
+    # Include relationships (secondary contacts)
+    relationship_descriptions = []
+    for rel in recipient.get('relationships', []) or []:
+        related_name = directory.recipient_name(rel.get('to_recipient_id'), 'Unknown')
+        relationship_descriptions.append(f"{related_name} ({rel.get('relationship_type', '')})")
+    if relationship_descriptions:
+        recipient_str += f" - Relationships: {', '.join(relationship_descriptions)}"
+    return recipient_str
+
+
+def format_occasion_line(occasion: dict, directory: NetworkDirectory) -> str:
+    """One line of the 'Occasions' section."""
+    recipient_name = directory.recipient_name(occasion.get('recipient_id'), 'Unknown')
+    occasion_str = f"- {recipient_name}'s {occasion.get('name', 'Occasion')}"
+    if occasion.get('date'):
+        occasion_str += f" is on {occasion.get('date')}"
+    return occasion_str
+
+
+@dataclass
+class ChatContext:
+    """Selected prompt sections plus before/after sizes for reporting."""
+    recipients_context: str = ""
+    occasions_context: str = ""
+    selected_recipient_ids: List[str] = field(default_factory=list)
+    total_recipients: int = 0
+    tokens_before: int = 0  # Everything, as previously sent (estimated for skipped lines)
+    tokens_after: int = 0
+
+
+def _days_until(date_str: Optional[str], today: date) -> Optional[int]:
+    """Days until the next anniversary of an ISO date."""
+    try:
+        occasion_date = date.fromisoformat(date_str[:10]) if date_str else None
+    except ValueError:
+        return None
+    if occasion_date is None:
+        return None
+    try:
+        upcoming = occasion_date.replace(year=today.year)
+    except ValueError:  # Feb 29
+        upcoming = date(today.year, 3, 1)
+    if upcoming < today:
+        try:
+            upcoming = upcoming.replace(year=today.year + 1)
+        except ValueError:
+            upcoming = date(today.year + 1, 3, 1)
+    return (upcoming - today).days
+
+
+def score_recipients(message: str, directory: NetworkDirectory, today: Optional[date] = None) -> Dict[str, float]:
+    """Relevance score per recipient id (only recipients with a positive score)."""
+    today = today or date.today()
+    normalized_message = normalize_name(message)
+    words = set(WORD_RX.findall(normalized_message.replace("'s", "")))
+    scores: Dict[str, float] = {}
+
+    def add(recipient: dict, points: float) -> None:
+        recipient_id = recipient.get("id")
+        if recipient_id:
+            scores[recipient_id] = scores.get(recipient_id, 0) + points
+
+    # Names: the full name, or any name part of 3+ letters, mentioned in the message
+    for recipient in directory.recipients:
+        name = normalize_name(recipient.get("name"))
+        if not name:
+            continue
+        if name in normalized_message or any(len(part) >= 3 and part in words for part in name.split()):
+            add(recipient, 100)
+
+    # Relationship words ("my mom", "sister")
+    for word in words:
+        for recipient in directory.by_relationship(RELATIONSHIP_SYNONYMS.get(word, word)):
+            add(recipient, 50)
+
+    # Interest keywords
+    keywords = {word for word in words if len(word) >= 4 and word not in STOP_WORDS and word not in DATE_WORDS}
+    if keywords:
+        for recipient in directory.recipients:
+            interest_words = set(WORD_RX.findall(" ".join(recipient.get("interests") or []).lower()))
+            overlap = len(keywords & interest_words)
+            if overlap:
+                add(recipient, 20 * overlap)
+
+    # Date questions: people with the soonest occasions first
+    if words & DATE_WORDS:
+        for occasion in directory.occasions:
+            days = _days_until(occasion.get("date"), today)
+            recipient = directory.recipient(occasion.get("recipient_id"))
+            if recipient is not None and days is not None:
+                add(recipient, 10 + max(0, 30 - days / 12))
+
+    # One hop from people the message is clearly about
+    for recipient_id, score in list(scores.items()):
+        if score >= 50:
+            recipient = directory.recipient(recipient_id)
+            for rel in recipient.get("relationships", []) or []:
+                related = directory.recipient(rel.get("to_recipient_id"))
+                if related is not None:
+                    add(related, 30)
+            for related in directory.related_from(recipient_id):
+                add(related, 30)
+
+    return scores
+
+
+def build_chat_context(
+    message: str,
+    directory: NetworkDirectory,
+    budget_tokens: int,
+    today: Optional[date] = None
+) -> ChatContext:
+    """
+    Pick recipients (and their occasions) for the casual-chat prompt, most relevant
+    first, until budget_tokens is used. A budget of 0 or less includes everyone.
+    """
+    recipients = directory.recipients
+    context = ChatContext(total_recipients=len(recipients))
+    scores = score_recipients(message, directory, today) if budget_tokens > 0 else {}
+
+    order = sorted(
+        range(len(recipients)),
+        key=lambda position: -scores.get(recipients[position].get("id"), 0)
+    )
+    recipient_lines: List[str] = []
+    occasion_lines: List[str] = []
+    used = 0
+    skipped_chars = 0
+    budget_full = False
+    for position in order:
+        recipient = recipients[position]
+        lines = [format_recipient_line(recipient, directory)]
+        occasions = [format_occasion_line(o, directory) for o in directory.occasions_for(recipient.get("id"))]
+        cost = count_tokens("\n".join(lines + occasions)) if budget_tokens > 0 and not budget_full else 0
+        if budget_tokens > 0 and (budget_full or used + cost > budget_tokens):
+            budget_full = budget_full or bool(recipient_lines)
+            skipped_chars += sum(len(line) + 1 for line in lines + occasions)
+            continue
+        used += cost
+        recipient_lines.extend(lines)
+        occasion_lines.extend(occasions)
+        if recipient.get("id"):
+            context.selected_recipient_ids.append(recipient["id"])
+
+    # Occasions for people not in the network list (shown as "Unknown" before)
+    known_ids = {r.get("id") for r in recipients}
+    for occasion in directory.occasions:
+        if occasion.get("recipient_id") not in known_ids:
+            line = format_occasion_line(occasion, directory)
+            cost = count_tokens(line) if budget_tokens > 0 else 0
+            if budget_tokens > 0 and used + cost > budget_tokens:
+                skipped_chars += len(line) + 1
+                continue
+            used += cost
+            occasion_lines.append(line)
+
+    context.recipients_context = "\n".join(recipient_lines)
+    context.occasions_context = "\n".join(occasion_lines)
+    context.tokens_after = count_tokens(context.recipients_context) + count_tokens(context.occasions_context)
+    context.tokens_before = context.tokens_after + estimate_tokens(" " * skipped_chars)
+    return context
@@ -0,0 +1,352 @@
+"""
+Durable LangGraph checkpointer backed by SQLAlchemy.
+
+Stores conversation checkpoints in the application database (PostgreSQL via
+asyncpg) or in an embedded SQLite file for local runs, so graph state survives
+restarts and is shared between uvicorn workers. Only the latest N checkpoints
+per thread are kept; older checkpoints and their pending writes are compacted
+away on every write.
+"""
+import asyncio
+import logging
+from typing import Any, AsyncIterator, Dict, Optional, Sequence, Tuple
+
+from langchain_core.runnables import RunnableConfig
+from langgraph.checkpoint.base import (
+    WRITES_IDX_MAP,
+    BaseCheckpointSaver,
+    ChannelVersions,
+    Checkpoint,
+    CheckpointMetadata,
+    CheckpointTuple,
+    get_checkpoint_id,
+    get_checkpoint_metadata,
+)
+from langgraph.checkpoint.memory import MemorySaver
+from sqlalchemy import and_, delete, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine
+
+from app.config import settings
+from app.database.connection import Base
+from app.database.models import GraphCheckpoint, GraphCheckpointWrite
+
+logger = logging.getLogger(__name__)
+
+checkpoints_table = GraphCheckpoint.__table__
+writes_table = GraphCheckpointWrite.__table__
+
+
+class SQLAlchemyCheckpointSaver(BaseCheckpointSaver):
+    """
+    Async checkpoint saver that persists LangGraph state through an AsyncEngine.
+
+    Each checkpoint row holds the full serialized checkpoint (channel values
+    included), so any retained checkpoint can be restored on its own and older
+    rows can be deleted without breaking the latest state.
+    """
+
+    def __init__(
+        self,
+        engine: AsyncEngine,
+        keep_latest: int = 5,
+        create_tables: bool = False,
+        **kwargs: Any
+    ):
+        super().__init__(**kwargs)
+        self.engine = engine
+        self.keep_latest = max(1, keep_latest)
+        self._create_tables = create_tables
+        self._setup_done = not create_tables
+        self._setup_lock = asyncio.Lock()
+
+    async def setup(self) -> None:
+        """Create checkpoint tables (used for the embedded SQLite backend)."""
+        if self._setup_done:
+            return
+        async with self._setup_lock:
+            if self._setup_done:
+                return
+            async with self.engine.begin() as conn:
+                await conn.run_sync(
+                    Base.metadata.create_all,
+                    tables=[checkpoints_table, writes_table]
+                )
+            self._setup_done = True
+
+    def _insert(self, table):
+        """Dialect-specific INSERT supporting ON CONFLICT clauses."""
+        if self.engine.dialect.name == "sqlite":
+            return sqlite_insert(table)
+        return pg_insert(table)
+
+    def _row_to_tuple(self, row, writes) -> CheckpointTuple:
+        """Build a CheckpointTuple from a checkpoint row and its writes."""
+        thread_id = row.thread_id
+        checkpoint_ns = row.checkpoint_ns
+        return CheckpointTuple(
+            config={
+                "configurable": {
+                    "thread_id": thread_id,
+                    "checkpoint_ns": checkpoint_ns,
+                    "checkpoint_id": row.checkpoint_id,
+                }
+            },
+            checkpoint=self.serde.loads_typed((row.checkpoint_type, row.checkpoint)),
+            metadata=self.serde.loads_typed((row.metadata_type, row.checkpoint_metadata)),
+            parent_config=(
+                {
+                    "configurable": {
+                        "thread_id": thread_id,
+                        "checkpoint_ns": checkpoint_ns,
+                        "checkpoint_id": row.parent_checkpoint_id,
+                    }
+                }
+                if row.parent_checkpoint_id
+                else None
+            ),
+            pending_writes=[
+                (w.task_id, w.channel, self.serde.loads_typed((w.value_type, w.value)))
+                for w in writes
+            ],
+        )
+
+    async def _load_writes(self, conn, thread_id: str, checkpoint_ns: str, checkpoint_id: str):
+        result = await conn.execute(
+            select(writes_table)
+            .where(
+                writes_table.c.thread_id == thread_id,
+                writes_table.c.checkpoint_ns == checkpoint_ns,
+                writes_table.c.checkpoint_id == checkpoint_id
+            )
+            .order_by(writes_table.c.task_path, writes_table.c.task_id, writes_table.c.idx)
+        )
+        return result.all()
+
+    async def aget_tuple(self, config: RunnableConfig) -> Optional[CheckpointTuple]:
+        """Fetch the requested checkpoint, or the latest one for the thread."""
+        await self.setup()
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        checkpoint_id = get_checkpoint_id(config)
+
+        query = select(checkpoints_table).where(
+            checkpoints_table.c.thread_id == thread_id,
+            checkpoints_table.c.checkpoint_ns == checkpoint_ns
+        )
+        if checkpoint_id:
+            query = query.where(checkpoints_table.c.checkpoint_id == checkpoint_id)
+        else:
+            query = query.order_by(checkpoints_table.c.checkpoint_id.desc()).limit(1)
+
+        async with self.engine.connect() as conn:
+            row = (await conn.execute(query)).first()
+            if row is None:
+                return None
+            writes = await self._load_writes(conn, thread_id, checkpoint_ns, row.checkpoint_id)
+        return self._row_to_tuple(row, writes)
+
+    async def alist(
+        self,
+        config: Optional[RunnableConfig],
+        *,
+        filter: Optional[Dict[str, Any]] = None,
+        before: Optional[RunnableConfig] = None,
+        limit: Optional[int] = None,
+    ) -> AsyncIterator[CheckpointTuple]:
+        """List retained checkpoints, newest first."""
+        await self.setup()
+        query = select(checkpoints_table)
+        if config:
+            query = query.where(checkpoints_table.c.thread_id == config["configurable"]["thread_id"])
+            checkpoint_ns = config["configurable"].get("checkpoint_ns")
+            if checkpoint_ns is not None:
+                query = query.where(checkpoints_table.c.checkpoint_ns == checkpoint_ns)
+            if checkpoint_id := get_checkpoint_id(config):
+                query = query.where(checkpoints_table.c.checkpoint_id == checkpoint_id)
+        if before and (before_id := get_checkpoint_id(before)):
+            query = query.where(checkpoints_table.c.checkpoint_id < before_id)
+        query = query.order_by(checkpoints_table.c.checkpoint_id.desc())
+        # Metadata filters are applied after decoding, so only push the limit down without them
+        if limit and not filter:
+            query = query.limit(limit)
+
+        async with self.engine.connect() as conn:
+            rows = (await conn.execute(query)).all()
+            returned = 0
+            for row in rows:
+                checkpoint_tuple = self._row_to_tuple(row, [])
+                if filter and not all(
+                    checkpoint_tuple.metadata.get(key) == value for key, value in filter.items()
+                ):
+                    continue
+                writes = await self._load_writes(conn, row.thread_id, row.checkpoint_ns, row.checkpoint_id)
+                yield checkpoint_tuple._replace(
+                    pending_writes=[
+                        (w.task_id, w.channel, self.serde.loads_typed((w.value_type, w.value)))
+                        for w in writes
+                    ]
+                )
+                returned += 1
+                if limit and returned >= limit:
+                    break
+
+    async def aput(
+        self,
+        config: RunnableConfig,
+        checkpoint: Checkpoint,
+        metadata: CheckpointMetadata,
+        new_versions: ChannelVersions,
+    ) -> RunnableConfig:
+        """Store a checkpoint and compact the thread down to the latest N."""
+        await self.setup()
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        checkpoint_type, checkpoint_blob = self.serde.dumps_typed(checkpoint)
+        metadata_type, metadata_blob = self.serde.dumps_typed(
+            get_checkpoint_metadata(config, metadata)
+        )
+        values = {
+            "thread_id": thread_id,
+            "checkpoint_ns": checkpoint_ns,
+            "checkpoint_id": checkpoint["id"],
+            "parent_checkpoint_id": config["configurable"].get("checkpoint_id"),
+            "checkpoint_type": checkpoint_type,
+            "checkpoint": checkpoint_blob,
+            "metadata_type": metadata_type,
+            "checkpoint_metadata": metadata_blob,
+        }
+        stmt = self._insert(checkpoints_table).values(**values)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["thread_id", "checkpoint_ns", "checkpoint_id"],
+            set_={
+                "checkpoint_type": stmt.excluded.checkpoint_type,
+                "checkpoint": stmt.excluded.checkpoint,
+                "metadata_type": stmt.excluded.metadata_type,
+                "checkpoint_metadata": stmt.excluded.checkpoint_metadata,
+            }
+        )
+
+        async with self.engine.begin() as conn:
+            await conn.execute(stmt)
+            await self._compact(conn, thread_id, checkpoint_ns)
+
+        return {
+            "configurable": {
+                "thread_id": thread_id,
+                "checkpoint_ns": checkpoint_ns,
+                "checkpoint_id": checkpoint["id"],
+            }
+        }
+
+    async def aput_writes(
+        self,
+        config: RunnableConfig,
+        writes: Sequence[Tuple[str, Any]],
+        task_id: str,
+        task_path: str = "",
+    ) -> None:
+        """Store intermediate writes for a checkpoint."""
+        await self.setup()
+        if not writes:
+            return
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        checkpoint_id = config["configurable"]["checkpoint_id"]
+
+        rows = []
+        for idx, (channel, value) in enumerate(writes):
+            value_type, value_blob = self.serde.dumps_typed(value)
+            rows.append({
+                "thread_id": thread_id,
+                "checkpoint_ns": checkpoint_ns,
+                "checkpoint_id": checkpoint_id,
+                "task_id": task_id,
+                "idx": WRITES_IDX_MAP.get(channel, idx),
+                "channel": channel,
+                "value_type": value_type,
+                "value": value_blob,
+                "task_path": task_path,
+            })
+
+        stmt = self._insert(writes_table)
+        index_elements = ["thread_id", "checkpoint_ns", "checkpoint_id", "task_id", "idx"]
+        # Special channels (error, interrupt, ...) overwrite; regular writes are idempotent
+        if all(channel in WRITES_IDX_MAP for channel, _ in writes):
+            stmt = stmt.on_conflict_do_update(
+                index_elements=index_elements,
+                set_={
+                    "channel": stmt.excluded.channel,
+                    "value_type": stmt.excluded.value_type,
+                    "value": stmt.excluded.value,
+                }
+            )
+        else:
+            stmt = stmt.on_conflict_do_nothing(index_elements=index_elements)
+
+        async with self.engine.begin() as conn:
+            await conn.execute(stmt, rows)
+
+    async def adelete_thread(self, thread_id: str) -> None:
+        """Delete all checkpoints and writes for a thread."""
+        await self.setup()
+        async with self.engine.begin() as conn:
+            await conn.execute(delete(writes_table).where(writes_table.c.thread_id == thread_id))
+            await conn.execute(delete(checkpoints_table).where(checkpoints_table.c.thread_id == thread_id))
+
+    async def _compact(self, conn, thread_id: str, checkpoint_ns: str) -> None:
+        """Drop checkpoints (and their writes) older than the latest `keep_latest`."""
+        result = await conn.execute(
+            select(checkpoints_table.c.checkpoint_id)
+            .where(
+                checkpoints_table.c.thread_id == thread_id,
+                checkpoints_table.c.checkpoint_ns == checkpoint_ns
+            )
+            .order_by(checkpoints_table.c.checkpoint_id.desc())
+            .offset(self.keep_latest - 1)
+            .limit(1)
+        )
+        oldest_kept = result.scalar_one_or_none()
+        if oldest_kept is None:
+            return
+
+        for table in (writes_table, checkpoints_table):
+            await conn.execute(
+                delete(table).where(
+                    and_(
+                        table.c.thread_id == thread_id,
+                        table.c.checkpoint_ns == checkpoint_ns,
+                        table.c.checkpoint_id < oldest_kept
+                    )
+                )
+            )
+
+
+def create_checkpointer(backend: Optional[str] = None) -> BaseCheckpointSaver:
+    """
+    Build the checkpointer configured in settings.
+
+    - "postgres": shares the application's asyncpg engine (tables via Alembic/init_db)
+    - "sqlite": embedded file database for local runs (tables created on first use)
+    - "memory": in-process MemorySaver (tests only; not shared across workers)
+    """
+    backend = (backend or settings.checkpointer_backend).lower()
+    keep_latest = settings.checkpointer_keep_latest
+
+    if backend == "memory":
+        return MemorySaver()
+
+    if backend == "sqlite":
+        sqlite_engine = create_async_engine(
+            f"sqlite+aiosqlite:///{settings.checkpointer_sqlite_path}",
+            future=True
+        )
+        logger.info("Using SQLite checkpointer at %s", settings.checkpointer_sqlite_path)
+        return SQLAlchemyCheckpointSaver(sqlite_engine, keep_latest=keep_latest, create_tables=True)
+
+    if backend == "postgres":
+        from app.database.connection import engine
+        return SQLAlchemyCheckpointSaver(engine, keep_latest=keep_latest)
+
+    raise ValueError(f"Unknown checkpointer backend: {backend}")
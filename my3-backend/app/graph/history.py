@@ -0,0 +1,122 @@
+"""
+Rolling summarization of the conversation history.
+
+messages uses the add_messages reducer and is checkpointed every turn, so without a
+bound the state (and every checkpoint write) grows with the conversation. Once the
+history passes settings.history_max_messages or settings.history_max_tokens,
+summarize_history_node folds everything but the last settings.history_keep_messages
+into conversation_summary (one LLM call) and removes the raw messages with
+RemoveMessage. Nodes that show the conversation to the LLM use build_conversation_text(),
+which puts the summary in front of the recent messages.
+"""
+import logging
+from typing import Any, Dict, List, Optional
+
+from langchain_core.messages import BaseMessage, HumanMessage, RemoveMessage
+from langchain_core.prompts import ChatPromptTemplate
+
+from app.config import settings
+from app.graph.chat_context import count_tokens
+from app.graph.state import AgentState
+from app.utils.llm import get_llm
+
+logger = logging.getLogger(__name__)
+
+SUMMARY_SYSTEM_PROMPT = """You maintain a running summary of a conversation between a user and My3, a gift concierge assistant.
+Update the existing summary with the new messages. Keep facts that matter later: people mentioned (names, relationships, interests),
+occasions and dates, gift ideas discussed or rejected, and anything the user asked to remember or is still waiting on.
+Drop greetings and small talk. Write plain prose, at most {max_words} words."""
+
+
+def _content(message: Any) -> str:
+    return message.content if hasattr(message, "content") else str(message)
+
+
+def _speaker(message: Any) -> str:
+    return "User" if isinstance(message, HumanMessage) else "Assistant"
+
+
+def format_messages(messages: List[BaseMessage]) -> str:
+    """Transcript lines for a list of messages."""
+    return "\n".join(f"{_speaker(message)}: {_content(message)}" for message in messages)
+
+
+def build_conversation_text(state: AgentState, last: int = 5) -> str:
+    """The running summary (if any) followed by the last few raw messages."""
+    recent = "\n".join(_content(message) for message in state.get("messages", [])[-last:])
+    summary = state.get("conversation_summary")
+    if summary:
+        return f"Earlier in this conversation: {summary}\n\n{recent}"
+    return recent
+
+
+def history_needs_folding(messages: List[BaseMessage]) -> bool:
+    """True once the raw history is past the message or token limit."""
+    if len(messages) <= settings.history_keep_messages:
+        return False
+    if settings.history_max_messages and len(messages) > settings.history_max_messages:
+        return True
+    if settings.history_max_tokens:
+        return count_tokens(format_messages(messages)) > settings.history_max_tokens
+    return False
+
+
+def split_history(messages: List[BaseMessage], keep: int) -> int:
+    """
+    Index where the kept window starts: the last `keep` messages, moved back to the
+    nearest user message so a turn is never split from its reply.
+    """
+    start = max(0, len(messages) - keep)
+    while start > 0 and not isinstance(messages[start], HumanMessage):
+        start -= 1
+    return start
+
+
+def fallback_summary(previous: Optional[str], folded: List[BaseMessage]) -> str:
+    """Summary without the LLM: previous summary plus clipped user lines, capped in length."""
+    lines = [previous] if previous else []
+    lines += [f"User said: {_content(message)[:200]}" for message in folded if isinstance(message, HumanMessage)]
+    return " ".join(lines)[-settings.history_summary_max_chars:]
+
+
+async def summarize_messages(previous: Optional[str], folded: List[BaseMessage]) -> str:
+    """Fold messages into the running summary with one LLM call (fallback on error)."""
+    try:
+        prompt = ChatPromptTemplate.from_messages([
+            ("system", SUMMARY_SYSTEM_PROMPT),
+            ("human", "Existing summary:\n{summary}\n\nNew messages:\n{transcript}")
+        ])
+        llm = get_llm(temperature=0.2)
+        response = await llm.ainvoke(prompt.format_messages(
+            max_words=settings.history_summary_max_chars // 6,
+            summary=previous or "(none yet)",
+            transcript=format_messages(folded)
+        ))
+        summary = (response.content or "").strip()
+        if summary:
+            return summary[:settings.history_summary_max_chars]
+    except Exception as e:
+        logger.warning("History summarization failed, using fallback summary: %s", e)
+    return fallback_summary(previous, folded)
+
+
+async def summarize_history_node(state: AgentState) -> Dict[str, Any]:
+    """
+    Fold old messages into conversation_summary once the history is over its limits.
+    Returns: {"conversation_summary": str, "messages": [RemoveMessage, ...]} or {}
+    """
+    messages = state.get("messages", [])
+    if not history_needs_folding(messages):
+        return {}
+
+    start = split_history(messages, settings.history_keep_messages)
+    folded = messages[:start]
+    if not folded:
+        return {}
+
+    summary = await summarize_messages(state.get("conversation_summary"), folded)
+    logger.info("Folded %d messages into the conversation summary, %d kept", len(folded), len(messages) - start)
+    return {
+        "conversation_summary": summary,
+        "messages": [RemoveMessage(id=message.id) for message in folded if message.id]
+    }
@@ -0,0 +1,121 @@
+"""
+Per-node latency and token accounting for the My3 workflow.
+
+create_my3_workflow wraps every node with instrument_node() when the graph is built.
+For each node run it records wall time, the time spent waiting on the LLM, prompt and
+completion tokens, and the size of the state the node was handed. These are exported
+as histograms labelled by node on /api/metrics, so p95 can be compared across
+router, extract_person, generate_gifts and the rest.
+
+LLM time and tokens come from the LLMUsageHandler attached to every pooled client
+(app/utils/llm.py), which charges each call to the node running in the current
+context. In development the chat routes also collect a per-turn trace of the same
+numbers and return it in ChatResponse.metadata["trace"].
+"""
+import json
+import logging
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar, Token
+from functools import wraps
+from typing import Any, Awaitable, Callable, Dict, Iterator, List, Optional
+
+from app.utils.llm import LLMUsage, _llm_usage
+from app.utils.metrics import LATENCY_BUCKETS, registry
+
+logger = logging.getLogger(__name__)
+
+TOKEN_BUCKETS = (0, 50, 100, 250, 500, 1000, 2000, 4000, 8000, 16000)
+STATE_BYTES_BUCKETS = (1000, 2500, 5000, 10000, 25000, 50000, 100000, 250000, 500000)
+
+NODE_DURATION = registry.histogram(
+    "graph_node_duration_seconds", "Wall time per workflow node run", ("node",), LATENCY_BUCKETS
+)
+NODE_LLM_SECONDS = registry.histogram(
+    "graph_node_llm_seconds", "Time spent in LLM calls per workflow node run", ("node",), LATENCY_BUCKETS
+)
+NODE_PROMPT_TOKENS = registry.histogram(
+    "graph_node_prompt_tokens", "Prompt tokens sent per workflow node run", ("node",), TOKEN_BUCKETS
+)
+NODE_COMPLETION_TOKENS = registry.histogram(
+    "graph_node_completion_tokens", "Completion tokens received per workflow node run", ("node",), TOKEN_BUCKETS
+)
+NODE_STATE_BYTES = registry.histogram(
+    "graph_node_state_bytes", "Approximate serialized size of the state handed to a node", ("node",), STATE_BYTES_BUCKETS
+)
+
+# Trace entries for the current chat turn (None unless trace_turn() is active)
+_turn_trace: ContextVar[Optional[List[Dict[str, Any]]]] = ContextVar("turn_trace", default=None)
+
+NodeFunction = Callable[[Dict[str, Any]], Awaitable[Dict[str, Any]]]
+
+
+def state_size(state: Dict[str, Any]) -> int:
+    """Approximate size in bytes of a workflow state (messages are measured by their text)."""
+    try:
+        return len(json.dumps(state, default=str))
+    except (TypeError, ValueError):
+        return 0
+
+
+def instrument_node(name: str, node: NodeFunction) -> NodeFunction:
+    """Wrap an async workflow node so each run is timed and its LLM usage recorded."""
+
+    @wraps(node)
+    async def instrumented(state: Dict[str, Any]) -> Dict[str, Any]:
+        usage = LLMUsage()
+        token = _llm_usage.set(usage)
+        size = state_size(state)
+        start = time.perf_counter()
+        try:
+            return await node(state)
+        finally:
+            duration = time.perf_counter() - start
+            _llm_usage.reset(token)
+            record_node_run(name, duration, usage, size)
+
+    return instrumented
+
+
+def record_node_run(name: str, duration: float, usage: LLMUsage, size: int) -> None:
+    """Export one node run and append it to the active turn trace, if any."""
+    NODE_DURATION.observe(duration, name)
+    NODE_LLM_SECONDS.observe(usage.seconds, name)
+    NODE_PROMPT_TOKENS.observe(usage.prompt_tokens, name)
+    NODE_COMPLETION_TOKENS.observe(usage.completion_tokens, name)
+    NODE_STATE_BYTES.observe(size, name)
+    logger.debug(
+        "Node %s: %.3fs (llm %.3fs / %d calls, %d+%d tokens), state %d bytes",
+        name, duration, usage.seconds, usage.calls, usage.prompt_tokens, usage.completion_tokens, size
+    )
+
+    trace = _turn_trace.get()
+    if trace is not None:
+        trace.append({
+            "node": name,
+            "duration_ms": round(duration * 1000, 1),
+            "llm_ms": round(usage.seconds * 1000, 1),
+            "llm_calls": usage.calls,
+            "prompt_tokens": usage.prompt_tokens,
+            "completion_tokens": usage.completion_tokens,
+            "state_bytes": size,
+        })
+
+
+@contextmanager
+def trace_turn(enabled: bool) -> Iterator[Optional[List[Dict[str, Any]]]]:
+    """
+    Collect trace entries for the nodes run inside the block. Yields the list
+    (filled as nodes finish), or None when tracing is disabled.
+    Restores with set() rather than reset(): a streaming body may be closed
+    from a different context after a client disconnect.
+    """
+    if not enabled:
+        yield None
+        return
+    trace: List[Dict[str, Any]] = []
+    previous = _turn_trace.set(trace).old_value
+    try:
+        yield trace
+    finally:
+        _turn_trace.set(None if previous is Token.MISSING else previous)
@@ -0,0 +1,129 @@
+"""
+Deterministic fast-path intent classifier.
+
+Runs before the LLM in router_node. Rule and lexical patterns cover the common,
+unambiguous phrasings (gift requests, greetings, "who is X?", "add my ...",
+"update ...") and return an intent with a confidence score. router_node only
+calls the LLM when no rule fires or the confidence is below the configured
+threshold.
+
+Rules are kept narrow: a phrasing that can also mean something else ("Add hiking
+to Ritika's interests", "What time do I need to get to...", a bare "yes" answering
+a confirmation) is left to the LLM rather than decided here. Corpus entries with
+"local": false in benchmarks/data/intent_corpus.jsonl pin those misses.
+"""
+import re
+from dataclasses import dataclass
+from typing import Iterable, Optional
+
+
+@dataclass(frozen=True)
+class LocalIntent:
+    """Intent decided without the LLM."""
+    intent: str
+    confidence: float
+    rule: str
+
+
+def _rx(pattern: str) -> re.Pattern:
+    return re.compile(pattern, re.IGNORECASE)
+
+
+# "What should I get <person>": the verb must be followed (optionally after "for") by
+# a person, not "for dinner" or "my boss to say yes"
+_WHAT_TO_GET = r"(should|can|could|do)\s+(i|we)\s+(get|buy|gift|purchase)|to\s+(get|buy|gift)"
+_PERSON_TARGET = r"((my|our)\s+\w+\b|him\b|her\b|them\b)(?!\s+to\b)"
+WHAT_TO_GET_FOR_NAME_RX = rf"^what\s+({_WHAT_TO_GET})\s+(for\s+)?{{name}}\b(?!\s+to\b)"
+
+# Thanks and past purchases mention gifts without asking for any
+NOT_A_GIFT_REQUEST_RX = _rx(r"^(thanks|thank\s+you)\b|\b(already|bought|gave|received)\b")
+
+# Gift requests (these also override the LLM when it disagrees)
+GIFT_RULES = [
+    (_rx(r"\bgift\s+(idea|ideas|recommendations?|suggestions?)\b"), 0.97, "gift_ideas"),
+    (_rx(r"\bsuggest\w*\b.*\bgifts?\b|\bgifts?\b.*\bsuggest\w*\b"), 0.95, "suggest_gift"),
+    (_rx(r"\bfind\b.*\bgifts?\b"), 0.95, "find_gift"),
+    (_rx(r"\b(buy|purchase|get)\s+(something|anything|a\s+(gift|present)|gifts?|presents?)\s+(nice\s+|special\s+)?for\b"), 0.92, "buy_for"),
+    (_rx(r"^what\s+(gift|present)s?\s+(should|can|could|do)\s+(i|we)\s+(get|buy|give)\b"), 0.92, "what_gift"),
+    (_rx(rf"^what\s+({_WHAT_TO_GET})\s+(for\s+)?{_PERSON_TARGET}"), 0.92, "what_should_i_get"),
+    (_rx(r"\bgifts?\s+for\b"), 0.9, "gift_for"),
+    (_rx(r"\bpresents?\s+for\b"), 0.9, "present_for"),
+]
+
+# Questions and small talk. The whole message must be greetings; yes/no/ok are
+# usually answers to a confirmation or follow-up and go to the LLM.
+_GREETING = (
+    r"((hi|hello|hey|yo)(\s+there)?|thanks|thank\s+you(\s+so\s+much)?|good\s+(morning|afternoon|evening)|"
+    r"how\s+are\s+you(\s+doing)?(\s+today)?|what'?s\s+up)"
+)
+GREETING_RX = _rx(rf"^{_GREETING}([\s,!.]+{_GREETING})*[\s,!.?]*$")
+PERSON_QUESTION_RX = _rx(
+    r"^(who is|who's|when is|when's|what do you know about|do you know|tell me about|how old is)\b"
+)
+
+# Network edits
+ADD_TO_NETWORK_RX = _rx(r"\badd\b.*\bto\s+(my|the)\s+(network|contacts|list)\b")
+# "Add my sister Priya", not "Add hiking to Ritika's interests" or "Add my mom's birthday"
+ADD_COMMAND_RX = _rx(r"^(please\s+)?(can you\s+)?add\s+(my|our)\s+(?!\w+'s\b)")
+# "Update Ravi's address", "Change my mom's age", not "Change of plans, ..."
+UPDATE_COMMAND_RX = _rx(r"^(please\s+)?(can you\s+)?(update|change|correct|edit)\s+(my|our|his|her|their|\w+'s)\b")
+# "Ritika is 6 / is allergic to nuts / also loves ..." but not "Ritika is coming over"
+# or "Ritika is a bit sad today"
+KNOWN_PERSON_FACT_RX = (
+    r"^{name}(?:'?s)?\s+(?:(?:also\s+)?(?:likes|loves|enjoys)"
+    r"|is\s+(?:\d+|my|allergic|vegetarian|vegan|into|turning)|was\s+born"
+    r"|wife|husband|birthday|anniversary|age|address|lives|interests?|son|daughter)\b"
+)
+
+
+def _normalize(message: str) -> str:
+    return " ".join(message.strip().split())
+
+
+def classify_intent_locally(
+    message: str,
+    known_names: Optional[Iterable[str]] = None
+) -> Optional[LocalIntent]:
+    """
+    Classify a user message with local rules.
+
+    Args:
+        message: Latest user message
+        known_names: Names of recipients already in the user's network
+
+    Returns:
+        LocalIntent with confidence, or None when no rule applies.
+    """
+    text = _normalize(message or "")
+    if not text:
+        return None
+    lower = text.lower()
+
+    names = [n for n in (_normalize(name or "").lower() for name in known_names or ()) if n]
+
+    if not NOT_A_GIFT_REQUEST_RX.search(lower):
+        for pattern, confidence, rule in GIFT_RULES:
+            if pattern.search(lower):
+                return LocalIntent("gift_search", confidence, rule)
+        for name in names:
+            if re.match(WHAT_TO_GET_FOR_NAME_RX.format(name=re.escape(name)), lower):
+                return LocalIntent("gift_search", 0.92, "what_should_i_get")
+
+    if ADD_TO_NETWORK_RX.search(lower):
+        return LocalIntent("add_recipient", 0.95, "add_to_network")
+    if ADD_COMMAND_RX.search(lower):
+        return LocalIntent("add_recipient", 0.9, "add_command")
+    if UPDATE_COMMAND_RX.search(lower):
+        return LocalIntent("update_info", 0.9, "update_command")
+
+    if PERSON_QUESTION_RX.search(lower):
+        return LocalIntent("casual_chat", 0.9, "person_question")
+    if GREETING_RX.search(lower):
+        return LocalIntent("casual_chat", 0.9, "greeting")
+
+    # Facts about someone already in the network are updates
+    for name in names:
+        if re.match(KNOWN_PERSON_FACT_RX.format(name=re.escape(name)), lower):
+            return LocalIntent("update_info", 0.88, "known_person_fact")
+
+    return None
@@ -0,0 +1,119 @@
+"""
+Per-user recipient name index for check_recipient_node and friends.
+
+Built once from a user_recipients list and reused across turns (the list comes from
+the cached UserContextSnapshot, so its identity is stable until the user's network
+changes). Provides:
+- exact lookups on normalized names (dict, O(1))
+- fuzzy lookups: a trigram inverted index ranks top-k candidates, and only those
+  are scored with difflib.SequenceMatcher
+- relationship-type lookups (dict, O(1))
+"""
+import threading
+from collections import Counter, OrderedDict, defaultdict
+from difflib import SequenceMatcher
+from typing import Dict, List, Optional
+
+FUZZY_CANDIDATES = 25
+
+
+def normalize_name(name: Optional[str]) -> str:
+    """Lowercase, strip and collapse whitespace."""
+    return " ".join((name or "").lower().strip().split())
+
+
+def trigrams(normalized: str) -> set:
+    """Character trigrams of a normalized name, padded like pg_trgm."""
+    padded = f"  {normalized} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class RecipientNameIndex:
+    """Read-only lookup structure over a list of recipient dicts."""
+
+    def __init__(self, recipients: List[dict]):
+        self.recipients = recipients
+        self._normalized: List[str] = []
+        self._by_name: Dict[str, int] = {}
+        self._by_relationship: Dict[str, List[int]] = defaultdict(list)
+        self._postings: Dict[str, List[int]] = defaultdict(list)
+
+        for position, recipient in enumerate(recipients):
+            normalized = normalize_name(recipient.get("name"))
+            self._normalized.append(normalized)
+            if normalized:
+                # Keep the first recipient for a name, like a linear scan would
+                self._by_name.setdefault(normalized, position)
+                for gram in trigrams(normalized):
+                    self._postings[gram].append(position)
+            relationship = (recipient.get("relationship") or "").lower()
+            if relationship:
+                self._by_relationship[relationship].append(position)
+
+    def __len__(self) -> int:
+        return len(self.recipients)
+
+    def exact(self, name: Optional[str]) -> Optional[dict]:
+        """Recipient whose normalized name equals the given name."""
+        position = self._by_name.get(normalize_name(name))
+        return self.recipients[position] if position is not None else None
+
+    def candidates(self, name: Optional[str], k: int = FUZZY_CANDIDATES) -> List[int]:
+        """Positions of the top-k recipients sharing the most trigrams with name."""
+        normalized = normalize_name(name)
+        if not normalized:
+            return []
+        shared = Counter()
+        for gram in trigrams(normalized):
+            shared.update(self._postings.get(gram, ()))
+        return [position for position, _ in shared.most_common(k)]
+
+    def fuzzy(self, name: Optional[str], threshold: float = 0.85, k: int = FUZZY_CANDIDATES) -> Optional[dict]:
+        """
+        First recipient (in list order) whose name similarity is at least threshold,
+        scoring only the top-k trigram candidates.
+        """
+        normalized = normalize_name(name)
+        matches = [
+            position for position in self.candidates(normalized, k)
+            if SequenceMatcher(None, normalized, self._normalized[position]).ratio() >= threshold
+        ]
+        return self.recipients[min(matches)] if matches else None
+
+    def by_relationship(self, relationship: Optional[str]) -> List[dict]:
+        """All recipients with the given relationship type (case-insensitive)."""
+        positions = self._by_relationship.get((relationship or "").lower(), [])
+        return [self.recipients[position] for position in positions]
+
+
+class _IndexCache:
+    """Small LRU of indexes keyed by the identity of the source recipients list."""
+
+    def __init__(self, max_entries: int = 1000):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[int, RecipientNameIndex]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, recipients: List[dict]) -> RecipientNameIndex:
+        key = id(recipients)
+        with self._lock:
+            index = self._entries.get(key)
+            # The index holds a reference to its list, so a matching id is the same list
+            if index is not None and index.recipients is recipients and len(index) == len(recipients):
+                self._entries.move_to_end(key)
+                return index
+        index = RecipientNameIndex(recipients)
+        with self._lock:
+            self._entries[key] = index
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return index
+
+
+_index_cache = _IndexCache()
+
+
+def get_name_index(recipients: Optional[List[dict]]) -> RecipientNameIndex:
+    """Get the (cached) name index for a user_recipients list."""
+    return _index_cache.get(recipients if recipients is not None else [])
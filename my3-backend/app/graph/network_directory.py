@@ -0,0 +1,133 @@
+"""
+ID-keyed directory over a user's network for the LangGraph nodes.
+
+The chat route builds the directory once per turn from user_recipients and
+user_occasions and stores it in AgentState["network_directory"]. It is a plain
+dict of positions into those two lists, so it checkpoints like the rest of the
+state. Nodes wrap it in NetworkDirectory for O(1) lookups:
+- id -> recipient, recipient id -> occasions
+- normalized name and relationship-type indexes
+- forward (from -> to) and reverse (to -> from) relationship adjacency
+"""
+from typing import Dict, List, Optional
+
+from app.graph.name_index import RecipientNameIndex, get_name_index, normalize_name
+
+SPOUSE_TYPES = ("wife", "husband", "spouse", "partner")
+
+
+def build_network_directory(user_recipients: Optional[List[dict]], user_occasions: Optional[List[dict]]) -> dict:
+    """Build the serializable directory maps for AgentState (O(recipients + occasions))."""
+    user_recipients = user_recipients or []
+    user_occasions = user_occasions or []
+    by_id: Dict[str, int] = {}
+    by_name: Dict[str, int] = {}
+    by_relationship: Dict[str, List[int]] = {}
+    related_from: Dict[str, List[int]] = {}
+    occasions_by_recipient: Dict[str, List[int]] = {}
+
+    for position, recipient in enumerate(user_recipients):
+        recipient_id = recipient.get("id")
+        if recipient_id:
+            by_id.setdefault(recipient_id, position)
+        normalized = normalize_name(recipient.get("name"))
+        if normalized:
+            by_name.setdefault(normalized, position)
+        relationship = (recipient.get("relationship") or "").lower()
+        if relationship:
+            by_relationship.setdefault(relationship, []).append(position)
+        for rel in recipient.get("relationships", []) or []:
+            to_id = rel.get("to_recipient_id")
+            if to_id:
+                related_from.setdefault(to_id, []).append(position)
+
+    for position, occasion in enumerate(user_occasions):
+        recipient_id = occasion.get("recipient_id")
+        if recipient_id:
+            occasions_by_recipient.setdefault(recipient_id, []).append(position)
+
+    return {
+        "recipient_count": len(user_recipients),
+        "occasion_count": len(user_occasions),
+        "by_id": by_id,
+        "by_name": by_name,
+        "by_relationship": by_relationship,
+        "related_from": related_from,
+        "occasions_by_recipient": occasions_by_recipient,
+    }
+
+
+class NetworkDirectory:
+    """Lookup view over the directory maps and the lists they point into."""
+
+    def __init__(self, user_recipients: Optional[List[dict]], user_occasions: Optional[List[dict]], maps: Optional[dict] = None):
+        self.recipients = user_recipients or []
+        self.occasions = user_occasions or []
+        if (
+            not maps
+            or maps.get("recipient_count") != len(self.recipients)
+            or maps.get("occasion_count") != len(self.occasions)
+        ):
+            # Missing or built for different lists (e.g. state from an older checkpoint)
+            maps = build_network_directory(self.recipients, self.occasions)
+        self.maps = maps
+
+    @classmethod
+    def from_state(cls, state) -> "NetworkDirectory":
+        """Wrap the directory attached to the state, rebuilding it if absent."""
+        return cls(
+            state.get("user_recipients", []),
+            state.get("user_occasions", []),
+            state.get("network_directory")
+        )
+
+    @property
+    def names(self) -> RecipientNameIndex:
+        """Name index (exact + fuzzy) over the same recipients list."""
+        return get_name_index(self.recipients)
+
+    def recipient(self, recipient_id: Optional[str]) -> Optional[dict]:
+        """Recipient with the given id."""
+        position = self.maps["by_id"].get(recipient_id) if recipient_id else None
+        return self.recipients[position] if position is not None else None
+
+    def recipient_name(self, recipient_id: Optional[str], default: Optional[str] = None) -> Optional[str]:
+        """Name of the recipient with the given id, or default."""
+        recipient = self.recipient(recipient_id)
+        return recipient.get("name", default) if recipient else default
+
+    def find_by_name(self, name: Optional[str]) -> Optional[dict]:
+        """First recipient whose normalized name equals name."""
+        position = self.maps["by_name"].get(normalize_name(name))
+        return self.recipients[position] if position is not None else None
+
+    def by_relationship(self, relationship: Optional[str]) -> List[dict]:
+        """All recipients with the given relationship type (case-insensitive)."""
+        positions = self.maps["by_relationship"].get((relationship or "").lower(), [])
+        return [self.recipients[position] for position in positions]
+
+    def occasions_for(self, recipient_id: Optional[str]) -> List[dict]:
+        """Occasions belonging to a recipient."""
+        positions = self.maps["occasions_by_recipient"].get(recipient_id, []) if recipient_id else []
+        return [self.occasions[position] for position in positions]
+
+    def related_from(self, recipient_id: Optional[str]) -> List[dict]:
+        """Recipients that have a relationship pointing at recipient_id (reverse adjacency)."""
+        positions = self.maps["related_from"].get(recipient_id, []) if recipient_id else []
+        return [self.recipients[position] for position in positions]
+
+    def partner(self, recipient_id: Optional[str]) -> Optional[dict]:
+        """Spouse/partner of a recipient, following the relationship in either direction."""
+        recipient = self.recipient(recipient_id)
+        if not recipient:
+            return None
+        for rel in recipient.get("relationships", []) or []:
+            if rel.get("relationship_type") in SPOUSE_TYPES:
+                partner = self.recipient(rel.get("to_recipient_id"))
+                if partner:
+                    return partner
+        for other in self.related_from(recipient_id):
+            for rel in other.get("relationships", []) or []:
+                if rel.get("to_recipient_id") == recipient_id and rel.get("relationship_type") in SPOUSE_TYPES:
+                    return other
+        return None
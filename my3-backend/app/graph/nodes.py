@@ -3,10 +3,17 @@ from langchain_core.messages import HumanMessage, AIMessage
 from langchain_core.prompts import ChatPromptTemplate
 from pydantic import BaseModel, Field
 import logging
-from difflib import SequenceMatcher
 
+from app.config import settings
 from app.graph.state import AgentState
-from app.utils.llm import get_llm
+from app.graph.chat_context import build_chat_context
+from app.graph.history import build_conversation_text
+from app.graph.intent_classifier import classify_intent_locally
+from app.graph.name_index import get_name_index
+from app.graph.network_directory import NetworkDirectory
+from app.services.gift_cache import gift_cache_key, gift_idea_cache
+from app.services.image_extractor import enrich_gift_images
+from app.utils.llm import get_llm, get_structured_llm
 
 logger = logging.getLogger(__name__)
 
@@ -35,6 +42,12 @@ class PersonInfo(BaseModel):
     country: Optional[str] = Field(None, description="Country name or code (e.g., 'US', 'USA', 'United States', 'Canada')")
 
 
+class IntentAndPersonInfo(PersonInfo):
+    """Intent classification and person extraction returned by a single LLM call."""
+    intent: str = Field(description="One of: gift_search, add_recipient, update_info, casual_chat, unclear")
+    confidence: float = Field(description="Confidence score 0-1", ge=0, le=1)
+
+
 class GiftIdea(BaseModel):
     """Gift idea structure."""
     title: str = Field(description="Gift title/name")
@@ -51,31 +64,8 @@ class GiftIdeasList(BaseModel):
     gift_ideas: List[GiftIdea] = Field(description="List of 5 personalized gift ideas")
 
 
-def _fuzzy_match_name(name1: str, name2: str, threshold: float = 0.8) -> bool:
-    """Check if two names are similar using fuzzy matching."""
-    if not name1 or not name2:
-        return False
-    similarity = SequenceMatcher(None, name1.lower(), name2.lower()).ratio()
-    return similarity >= threshold
-
-
-async def router_node(state: AgentState) -> Dict[str, Any]:
-    """
-    Classify user intent using ChatOpenAI with structured output.
-    Returns: {"current_intent": str}
-    """
-    try:
-        messages = state.get("messages", [])
-        if not messages:
-            return {"current_intent": "unclear", "error": "No messages in state"}
-        
-        # Get the last user message
-        last_message = messages[-1]
-        user_message = last_message.content if hasattr(last_message, 'content') else str(last_message)
-        
-        # Create prompt for intent classification
-        prompt = ChatPromptTemplate.from_messages([
-            ("system", """You are an intent classifier for a gift recommendation assistant.
+# System prompts (shared by the separate and combined classification/extraction nodes)
+INTENT_SYSTEM_PROMPT = """You are an intent classifier for a gift recommendation assistant.
 Classify the user's intent into one of these categories:
 - gift_search: User explicitly wants gift ideas, recommendations, or suggestions for someone
 - add_recipient: User wants to add a new person to their network (providing info about someone new)
@@ -159,133 +149,9 @@ Examples:
 - "Ramesh Naidus wife is Swetha" → update_info (if Ramesh Naidu exists)
 - "When is my wife's birthday?" → casual_chat
 - "Who is Ritika?" → casual_chat
-- "Do you know Visala?" → casual_chat"""),
-            ("human", "{message}")
-        ])
-        
-        # Get LLM with structured output
-        llm = get_llm(temperature=0.3)
-        structured_llm = llm.with_structured_output(IntentClassification)
-        
-        # Invoke LLM
-        result = await structured_llm.ainvoke(prompt.format_messages(message=user_message))
-        
-        intent = result.intent
-        logger.info(f"=== ROUTER NODE ===")
-        logger.info(f"User message: '{user_message}'")
-        logger.info(f"Intent classified by LLM: {intent} (confidence: {result.confidence})")
-        
-        # Fallback: If LLM misclassifies but message clearly contains gift request keywords, override to gift_search
-        user_message_lower = user_message.lower()
-        
-        # Check for gift request patterns - comprehensive list
-        has_gift = "gift" in user_message_lower or "gifts" in user_message_lower
-        has_suggest = "suggest" in user_message_lower
-        has_find = "find" in user_message_lower
-        has_buy = "buy" in user_message_lower
-        has_get = "get" in user_message_lower
-        has_for = "for" in user_message_lower
-        has_what = "what" in user_message_lower
-        has_should = "should" in user_message_lower
-        has_gift_ideas = "gift idea" in user_message_lower or "gift ideas" in user_message_lower
-        
-        logger.info(f"Pattern check - has_gift: {has_gift}, has_suggest: {has_suggest}, has_find: {has_find}, has_buy: {has_buy}, has_get: {has_get}, has_for: {has_for}")
-        
-        # Determine if this is clearly a gift request
-        is_gift_request = False
-        
-        # Pattern 1: "suggest" + "gift"/"gifts"
-        if has_suggest and has_gift:
-            is_gift_request = True
-            logger.info(f"✓ Detected gift request pattern: 'suggest' + 'gift'/'gifts'")
-        # Pattern 2: "find" + "gift"/"gifts" + "for" (e.g., "Find gifts for my wife")
-        elif has_find and has_gift and has_for:
-            is_gift_request = True
-            logger.info(f"✓ Detected gift request pattern: 'find gift/gifts for'")
-        # Pattern 2b: "find" + "gift"/"gifts" (even without "for", if it's clearly a gift request)
-        elif has_find and has_gift:
-            is_gift_request = True
-            logger.info(f"✓ Detected gift request pattern: 'find gift/gifts'")
-        # Pattern 3: "buy" + "for" (when asking about a person)
-        elif has_buy and has_for:
-            is_gift_request = True
-            logger.info(f"✓ Detected gift request pattern: 'buy for'")
-        # Pattern 4: "what should I get" + "for"
-        elif has_what and has_should and has_get and has_for:
-            is_gift_request = True
-            logger.info(f"✓ Detected gift request pattern: 'what should I get for'")
-        # Pattern 5: "gift ideas"
-        elif has_gift_ideas:
-            is_gift_request = True
-            logger.info(f"✓ Detected gift request pattern: 'gift ideas'")
-        
-        logger.info(f"is_gift_request: {is_gift_request}, current intent: {intent}")
-        
-        # Override if it's clearly a gift request but misclassified
-        if is_gift_request and intent != "gift_search":
-            logger.warning(f"⚠️ LLM misclassified gift request as '{intent}' (confidence: {result.confidence}). Overriding to 'gift_search' based on keyword detection.")
-            logger.warning(f"Original message: '{user_message}'")
-            intent = "gift_search"
-            logger.info(f"✓ Intent overridden to: {intent}")
-        
-        logger.info(f"Final intent returned: {intent}")
-        logger.info(f"=== END ROUTER NODE ===")
-        
-        # Safety check: If intent is still unclear but message seems clear, log a warning
-        if intent == "unclear":
-            logger.warning(f"⚠️ Intent classified as 'unclear' for message: '{user_message}'. This might indicate a classification issue.")
-            # Try to infer intent from message content as a last resort
-            user_message_lower = user_message.lower()
-            if "who is" in user_message_lower or "what do you know about" in user_message_lower:
-                logger.warning(f"⚠️ Message appears to be a question about a person, but classified as unclear. Consider this as casual_chat.")
-                # Don't override here - let it go to casual_chat handling which should work
-            elif "find" in user_message_lower and ("gift" in user_message_lower or "gifts" in user_message_lower):
-                logger.warning(f"⚠️ Message appears to be a gift search, but classified as unclear. This should have been caught by fallback.")
-        
-        return {"current_intent": intent}
-        
-    except Exception as e:
-        error_type = type(e).__name__
-        error_msg = str(e)
-        logger.error(f"Error in router_node: {error_type}: {error_msg}", exc_info=True)
-        logger.error(f"Error occurred while processing message: '{user_message if 'user_message' in locals() else 'unknown'}'")
-        
-        # Check for specific OpenAI API errors
-        if "authentication" in error_msg.lower() or "invalid" in error_msg.lower() or "401" in error_msg:
-            logger.error("[CRITICAL] OpenAI API Authentication Error - API key may be invalid or expired")
-        elif "rate limit" in error_msg.lower() or "429" in error_msg or "insufficient_quota" in error_msg.lower():
-            logger.error("[CRITICAL] OpenAI API Quota/Credit Exhausted - Account has run out of credits")
-            logger.error("  -> This is why all requests are returning generic responses")
-            logger.error("  -> Please add credits at https://platform.openai.com/account/billing")
-        elif "insufficient" in error_msg.lower() or "quota" in error_msg.lower() or "credit" in error_msg.lower():
-            logger.error("[CRITICAL] OpenAI API Credit/Quota Exhausted - Account has run out of credits")
-            logger.error("  -> This is why all requests are returning generic responses")
-            logger.error("  -> Please add credits at https://platform.openai.com/account/billing")
-        elif "timeout" in error_msg.lower():
-            logger.error("[WARNING] OpenAI API Timeout - Request took too long")
-        
-        return {"current_intent": "unclear", "error": str(e)}
-
+- "Do you know Visala?" → casual_chat"""
 
-async def extract_person_node(state: AgentState) -> Dict[str, Any]:
-    """
-    Extract person information from message using structured LLM output.
-    Returns: {"detected_person": {name, relationship, interests, age_band}}
-    """
-    try:
-        messages = state.get("messages", [])
-        if not messages:
-            return {"detected_person": None, "error": "No messages in state"}
-        
-        # Get conversation context
-        conversation_text = "\n".join([
-            msg.content if hasattr(msg, 'content') else str(msg)
-            for msg in messages[-5:]  # Last 5 messages for context
-        ])
-        
-        # Create prompt for person extraction
-        prompt = ChatPromptTemplate.from_messages([
-            ("system", """Extract person information from the conversation.
+PERSON_EXTRACTION_SYSTEM_PROMPT = """Extract person information from the conversation.
 Extract:
 - name: Person's name if mentioned (e.g., "Ritika", "John", "Visala", "Mom")
   - Extract names from possessive forms: "Visala's birthday" → name: "Visala"
@@ -365,56 +231,262 @@ Examples:
 - "John's address is 456 Oak Avenue, Los Angeles, CA 90210" → name: "John", street_address: "456 Oak Avenue", city: "Los Angeles", state_province: "CA", postal_code: "90210", country: "US", occasion_name: None, occasion_date: None, notes: None, secondary_contacts: []
 
 If information is not mentioned, use None for that field.
-Be accurate and extract information from both explicit statements and clear context."""),
+Be accurate and extract information from both explicit statements and clear context."""
+
+
+COMBINED_SYSTEM_PROMPT = """You perform two tasks in one pass for a gift recommendation assistant.
+
+TASK 1 - INTENT: Classify the intent of the LATEST user message only (earlier messages are context).
+
+""" + INTENT_SYSTEM_PROMPT + """
+
+TASK 2 - PERSON: Fill in the person fields from the whole conversation. For casual_chat and unclear
+intents, leave every person field empty.
+
+""" + PERSON_EXTRACTION_SYSTEM_PROMPT
+
+# Intents that need person extraction before check_recipient
+PERSON_INTENTS = ("gift_search", "add_recipient", "update_info")
+
+
+def _person_fields(detected_person: Optional[Dict[str, Any]]) -> str:
+    """Names of the filled-in detected_person fields, for logs (never the values)."""
+    if not detected_person:
+        return "none"
+    return ",".join(field for field, value in detected_person.items() if value) or "none"
+
+
+def _build_detected_person(result: PersonInfo, conversation_text: str) -> Dict[str, Any]:
+    """Convert extracted PersonInfo to the detected_person dict, normalizing the relationship."""
+    relationship = result.relationship
+    if relationship:
+        # Normalize relationship: remove "my" prefix, lowercase
+        relationship = relationship.lower().replace("my ", "").strip()
+        # Handle common variations
+        relationship_map = {
+            "mother": "mom",
+            "father": "dad",
+            "spouse": "wife" if "wife" in conversation_text.lower() else "husband",
+            "partner": "wife" if "wife" in conversation_text.lower() else "husband"
+        }
+        relationship = relationship_map.get(relationship, relationship)
+    
+    return {
+        "name": result.name,
+        "relationship": relationship,
+        "interests": result.interests or [],
+        "age_band": result.age_band,
+        "notes": result.notes,
+        "occasion_name": result.occasion_name,
+        "occasion_date": result.occasion_date,
+        "secondary_contacts": result.secondary_contacts or [],
+        "street_address": result.street_address,
+        "city": result.city,
+        "state_province": result.state_province,
+        "postal_code": result.postal_code,
+        "country": result.country
+    }
+
+
+def _classify_locally(state: AgentState, user_message: str):
+    """
+    Run the local intent rules for a message.
+    Returns (local_result, confident) where confident means the fast path may skip the LLM.
+    """
+    known_names = [r.get("name") for r in state.get("user_recipients", []) or []]
+    local_result = classify_intent_locally(user_message, known_names)
+    confident = bool(
+        settings.intent_fast_path_enabled
+        and local_result
+        and local_result.confidence >= settings.intent_fast_path_threshold
+    )
+    return local_result, confident
+
+
+async def router_node(state: AgentState) -> Dict[str, Any]:
+    """
+    Classify user intent. Confident local rule matches return immediately;
+    otherwise falls back to ChatOpenAI with structured output.
+    Returns: {"current_intent": str}
+    """
+    try:
+        messages = state.get("messages", [])
+        if not messages:
+            return {"current_intent": "unclear", "error": "No messages in state"}
+        
+        # Get the last user message
+        last_message = messages[-1]
+        user_message = last_message.content if hasattr(last_message, 'content') else str(last_message)
+        
+        # Fast path: deterministic local rules decide unambiguous messages without the LLM
+        local_result, confident = _classify_locally(state, user_message)
+        if confident:
+            logger.info(
+                "Intent classified locally: %s (confidence: %.2f, rule: %s)",
+                local_result.intent, local_result.confidence, local_result.rule
+            )
+            return {"current_intent": local_result.intent}
+        
+        # Create prompt for intent classification
+        prompt = ChatPromptTemplate.from_messages([
+            ("system", INTENT_SYSTEM_PROMPT),
+            ("human", "{message}")
+        ])
+        
+        # Get shared LLM runnable with structured output
+        structured_llm = get_structured_llm(IntentClassification, temperature=0.3)
+        
+        # Invoke LLM
+        result = await structured_llm.ainvoke(prompt.format_messages(message=user_message))
+        
+        intent = result.intent
+        logger.info("Intent classified by LLM: %s (confidence: %.2f)", intent, result.confidence)
+        
+        # Fallback: If LLM misclassifies but message clearly contains gift request keywords, override to gift_search
+        if local_result and local_result.intent == "gift_search" and intent != "gift_search":
+            logger.warning(
+                "LLM misclassified gift request as '%s' (confidence: %.2f). Overriding to 'gift_search' based on keyword detection (rule: %s).",
+                intent, result.confidence, local_result.rule
+            )
+            intent = "gift_search"
+        
+        # Safety check: If intent is still unclear but message seems clear, log a warning
+        if intent == "unclear":
+            logger.warning("Intent classified as 'unclear' (%d-char message). This might indicate a classification issue.", len(user_message))
+            # Try to infer intent from message content as a last resort
+            user_message_lower = user_message.lower()
+            if "who is" in user_message_lower or "what do you know about" in user_message_lower:
+                logger.warning("Message appears to be a question about a person, but classified as unclear. Consider this as casual_chat.")
+                # Don't override here - let it go to casual_chat handling which should work
+            elif "find" in user_message_lower and ("gift" in user_message_lower or "gifts" in user_message_lower):
+                logger.warning("Message appears to be a gift search, but classified as unclear. This should have been caught by fallback.")
+        
+        return {"current_intent": intent}
+        
+    except Exception as e:
+        error_type = type(e).__name__
+        error_msg = str(e)
+        logger.error("Error in router_node: %s: %s", error_type, error_msg, exc_info=True)
+        
+        # Check for specific OpenAI API errors
+        if "authentication" in error_msg.lower() or "invalid" in error_msg.lower() or "401" in error_msg:
+            logger.error("[CRITICAL] OpenAI API Authentication Error - API key may be invalid or expired")
+        elif "rate limit" in error_msg.lower() or "429" in error_msg or "insufficient_quota" in error_msg.lower():
+            logger.error("[CRITICAL] OpenAI API Quota/Credit Exhausted - Account has run out of credits")
+            logger.error("  -> This is why all requests are returning generic responses")
+            logger.error("  -> Please add credits at https://platform.openai.com/account/billing")
+        elif "insufficient" in error_msg.lower() or "quota" in error_msg.lower() or "credit" in error_msg.lower():
+            logger.error("[CRITICAL] OpenAI API Credit/Quota Exhausted - Account has run out of credits")
+            logger.error("  -> This is why all requests are returning generic responses")
+            logger.error("  -> Please add credits at https://platform.openai.com/account/billing")
+        elif "timeout" in error_msg.lower():
+            logger.error("[WARNING] OpenAI API Timeout - Request took too long")
+        
+        return {"current_intent": "unclear", "error": str(e)}
+
+
+async def extract_person_node(state: AgentState) -> Dict[str, Any]:
+    """
+    Extract person information from message using structured LLM output.
+    Returns: {"detected_person": {name, relationship, interests, age_band}}
+    """
+    try:
+        messages = state.get("messages", [])
+        if not messages:
+            return {"detected_person": None, "error": "No messages in state"}
+        
+        # Get conversation context
+        conversation_text = build_conversation_text(state)  # Summary + last 5 messages
+        
+        # Create prompt for person extraction
+        prompt = ChatPromptTemplate.from_messages([
+            ("system", PERSON_EXTRACTION_SYSTEM_PROMPT),
             ("human", "{conversation}")
         ])
         
-        # Get LLM with structured output
-        llm = get_llm(temperature=0.3)
-        structured_llm = llm.with_structured_output(PersonInfo)
+        # Get shared LLM runnable with structured output
+        structured_llm = get_structured_llm(PersonInfo, temperature=0.3)
         
         # Invoke LLM
         result = await structured_llm.ainvoke(prompt.format_messages(conversation=conversation_text))
         
-        # Convert to dict and normalize relationship
-        relationship = result.relationship
-        if relationship:
-            # Normalize relationship: remove "my" prefix, lowercase
-            relationship = relationship.lower().replace("my ", "").strip()
-            # Handle common variations
-            relationship_map = {
-                "mother": "mom",
-                "father": "dad",
-                "spouse": "wife" if "wife" in conversation_text.lower() else "husband",
-                "partner": "wife" if "wife" in conversation_text.lower() else "husband"
-            }
-            relationship = relationship_map.get(relationship, relationship)
-        
-        detected_person = {
-            "name": result.name,
-            "relationship": relationship,
-            "interests": result.interests or [],
-            "age_band": result.age_band,
-            "notes": result.notes,
-            "occasion_name": result.occasion_name,
-            "occasion_date": result.occasion_date,
-            "secondary_contacts": result.secondary_contacts or [],
-            "street_address": result.street_address,
-            "city": result.city,
-            "state_province": result.state_province,
-            "postal_code": result.postal_code,
-            "country": result.country
-        }
+        detected_person = _build_detected_person(result, conversation_text)
         
-        logger.info(f"Extracted person info: {detected_person} from conversation: {conversation_text[:100]}")
+        logger.info(
+            "Extracted person info (fields: %s) from %d chars of conversation",
+            _person_fields(detected_person), len(conversation_text)
+        )
         
         return {"detected_person": detected_person}
         
     except Exception as e:
-        logger.error(f"Error in extract_person_node: {e}", exc_info=True)
+        logger.error("Error in extract_person_node: %s", e, exc_info=True)
         return {"detected_person": None, "error": str(e)}
 
 
+async def classify_and_extract_node(state: AgentState) -> Dict[str, Any]:
+    """
+    Classify intent and extract person info with one structured LLM call
+    (replaces router -> extract_person when settings.combined_intent_extraction is on).
+    Confident local matches that need no extraction return without calling the LLM.
+    Returns: {"current_intent": str, "detected_person": dict | None}
+    """
+    try:
+        messages = state.get("messages", [])
+        if not messages:
+            return {"current_intent": "unclear", "detected_person": None, "error": "No messages in state"}
+        
+        last_message = messages[-1]
+        user_message = last_message.content if hasattr(last_message, 'content') else str(last_message)
+        
+        # Fast path: no LLM call at all for confident small talk / questions
+        local_result, confident = _classify_locally(state, user_message)
+        if confident and local_result.intent not in PERSON_INTENTS:
+            logger.info(
+                "Intent classified locally: %s (confidence: %.2f, rule: %s); skipping extraction",
+                local_result.intent, local_result.confidence, local_result.rule
+            )
+            return {"current_intent": local_result.intent, "detected_person": None}
+        
+        conversation_text = build_conversation_text(state)  # Summary + last 5 messages
+        
+        prompt = ChatPromptTemplate.from_messages([
+            ("system", COMBINED_SYSTEM_PROMPT),
+            ("human", "Conversation:\n{conversation}\n\nLatest user message (classify this one):\n{message}")
+        ])
+        
+        structured_llm = get_structured_llm(IntentAndPersonInfo, temperature=0.3)
+        result = await structured_llm.ainvoke(
+            prompt.format_messages(conversation=conversation_text, message=user_message)
+        )
+        
+        intent = result.intent
+        if confident:
+            # Local rules already decided the intent; the call was only needed for extraction
+            intent = local_result.intent
+        elif local_result and local_result.intent == "gift_search" and intent != "gift_search":
+            logger.warning(
+                "LLM misclassified gift request as '%s' (confidence: %.2f). Overriding to 'gift_search' (rule: %s).",
+                intent, result.confidence, local_result.rule
+            )
+            intent = "gift_search"
+        
+        detected_person = None
+        if intent in PERSON_INTENTS:
+            detected_person = _build_detected_person(result, conversation_text)
+        
+        logger.info(
+            "Combined classification: intent=%s (LLM: %s, confidence: %.2f), person fields: %s",
+            intent, result.intent, result.confidence, _person_fields(detected_person)
+        )
+        
+        return {"current_intent": intent, "detected_person": detected_person}
+        
+    except Exception as e:
+        logger.error("Error in classify_and_extract_node: %s: %s", type(e).__name__, e, exc_info=True)
+        return {"current_intent": "unclear", "detected_person": None, "error": str(e)}
+
+
 async def check_recipient_node(state: AgentState) -> Dict[str, Any]:
     """
     Check if detected_person exists in user_recipients.
@@ -435,50 +507,40 @@ async def check_recipient_node(state: AgentState) -> Dict[str, Any]:
         person_name = detected_person.get("name")
         person_relationship = detected_person.get("relationship")
         
-        logger.info(f"Checking recipient match - name: {person_name}, relationship: {person_relationship}")
-        logger.info(f"Available recipients: {[(r.get('name'), r.get('relationship')) for r in user_recipients]}")
+        logger.debug("Checking recipient match among %d recipients - name given: %s, relationship: %s", len(user_recipients), bool(person_name), person_relationship)
+        
+        # Prebuilt per-user index: O(1) exact/relationship lookups, trigram top-k for fuzzy
+        name_index = get_name_index(user_recipients)
         
         # Try to match by name (exact first, then fuzzy)
         if person_name:
-            # Normalize name: lowercase, strip whitespace, remove extra spaces
-            person_name_normalized = " ".join(person_name.lower().strip().split())
-            
             # First try exact match (case-insensitive, normalized)
-            for recipient in user_recipients:
-                recipient_name = recipient.get("name", "")
-                recipient_name_normalized = " ".join(recipient_name.lower().strip().split())
-                if recipient_name_normalized == person_name_normalized:
-                    logger.info(f"Matched recipient by exact name: {recipient_name} (ID: {recipient.get('id')})")
-                    return {
-                        "recipient_exists": True,
-                        "matched_recipient_id": recipient.get("id")
-                    }
+            recipient = name_index.exact(person_name)
+            if recipient:
+                logger.info("Matched recipient %s by exact name", recipient.get("id"))
+                return {
+                    "recipient_exists": True,
+                    "matched_recipient_id": recipient.get("id")
+                }
             
             # Then try fuzzy match (with higher threshold for better accuracy)
-            for recipient in user_recipients:
-                recipient_name = recipient.get("name", "")
-                if recipient_name:
-                    recipient_name_normalized = " ".join(recipient_name.lower().strip().split())
-                    # Use normalized names for fuzzy matching
-                    if _fuzzy_match_name(person_name_normalized, recipient_name_normalized, threshold=0.85):
-                        logger.info(f"Matched recipient by fuzzy name: {recipient_name} (ID: {recipient.get('id')})")
-                        return {
-                            "recipient_exists": True,
-                            "matched_recipient_id": recipient.get("id"),
-                            "ambiguous_recipients": None
-                        }
+            recipient = name_index.fuzzy(person_name, threshold=0.85)
+            if recipient:
+                logger.info("Matched recipient %s by fuzzy name", recipient.get("id"))
+                return {
+                    "recipient_exists": True,
+                    "matched_recipient_id": recipient.get("id"),
+                    "ambiguous_recipients": None
+                }
         
         # Only match by relationship if name matching failed AND we have a relationship
         if person_relationship and not person_name:
-            matching_by_relationship = [
-                r for r in user_recipients
-                if r.get("relationship", "").lower() == person_relationship.lower()
-            ]
+            matching_by_relationship = name_index.by_relationship(person_relationship)
             
             if len(matching_by_relationship) == 1:
                 # Only one person with this relationship - safe to match
                 recipient = matching_by_relationship[0]
-                logger.info(f"Matched recipient by unique relationship: {recipient.get('relationship')} - {recipient.get('name')} (ID: {recipient.get('id')})")
+                logger.info("Matched recipient %s by unique relationship '%s'", recipient.get("id"), recipient.get("relationship"))
                 return {
                     "recipient_exists": True,
                     "matched_recipient_id": recipient.get("id"),
@@ -487,7 +549,7 @@ async def check_recipient_node(state: AgentState) -> Dict[str, Any]:
             elif len(matching_by_relationship) > 1:
                 # Multiple people with same relationship - mark as ambiguous
                 # Return the list of matching recipients so we can ask for clarification
-                logger.info(f"Ambiguous relationship match: {len(matching_by_relationship)} people have relationship '{person_relationship}'. Need name to disambiguate.")
+                logger.info("Ambiguous relationship match: %d people have relationship '%s'. Need name to disambiguate.", len(matching_by_relationship), person_relationship)
                 return {
                     "recipient_exists": True,  # At least one exists, but ambiguous
                     "matched_recipient_id": None,  # Can't match without name
@@ -505,7 +567,7 @@ async def check_recipient_node(state: AgentState) -> Dict[str, Any]:
         return {"recipient_exists": False, "matched_recipient_id": None}
         
     except Exception as e:
-        logger.error(f"Error in check_recipient_node: {e}", exc_info=True)
+        logger.error("Error in check_recipient_node: %s", e, exc_info=True)
         return {"recipient_exists": False, "matched_recipient_id": None, "error": str(e)}
 
 
@@ -520,7 +582,6 @@ async def process_relationships_node(state: AgentState) -> Dict[str, Any]:
     try:
         detected_person = state.get("detected_person")
         matched_recipient_id = state.get("matched_recipient_id")
-        user_recipients = state.get("user_recipients", [])
         pending_actions = state.get("pending_actions", [])
         
         if not detected_person:
@@ -530,19 +591,20 @@ async def process_relationships_node(state: AgentState) -> Dict[str, Any]:
         if not secondary_contacts:
             return {"pending_actions": pending_actions}
         
+        directory = NetworkDirectory.from_state(state)
+        
         # Need a primary recipient to link relationships to
         primary_recipient_id = matched_recipient_id
         if not primary_recipient_id:
             # Try to find by name
             primary_name = detected_person.get("name")
             if primary_name:
-                for recipient in user_recipients:
-                    if recipient.get("name", "").lower() == primary_name.lower():
-                        primary_recipient_id = recipient.get("id")
-                        break
+                recipient = directory.find_by_name(primary_name)
+                if recipient:
+                    primary_recipient_id = recipient.get("id")
         
         if not primary_recipient_id:
-            logger.warning(f"Cannot create relationships: no primary recipient found for {detected_person.get('name')}")
+            logger.warning("Cannot create relationships: no primary recipient found for the detected person")
             return {"pending_actions": pending_actions}
         
         # Process each secondary contact
@@ -554,11 +616,7 @@ async def process_relationships_node(state: AgentState) -> Dict[str, Any]:
                 continue
             
             # Check if secondary contact already exists
-            existing_secondary = None
-            for recipient in user_recipients:
-                if recipient.get("name", "").lower() == secondary_name.lower():
-                    existing_secondary = recipient
-                    break
+            existing_secondary = directory.find_by_name(secondary_name)
             
             # Determine if relationship is bidirectional (spouse/partner relationships)
             is_bidirectional = relationship_type in ["wife", "husband", "spouse", "partner"]
@@ -586,12 +644,16 @@ async def process_relationships_node(state: AgentState) -> Dict[str, Any]:
                     "is_bidirectional": is_bidirectional
                 })
         
-        logger.info(f"Processed {len(secondary_contacts)} secondary contacts, created {len([a for a in pending_actions if a.get('type') in ['create_secondary_contact', 'create_relationship']])} relationship actions")
+        logger.info(
+            "Processed %d secondary contacts, created %d relationship actions",
+            len(secondary_contacts),
+            sum(1 for a in pending_actions if a.get("type") in ("create_secondary_contact", "create_relationship"))
+        )
         
         return {"pending_actions": pending_actions}
         
     except Exception as e:
-        logger.error(f"Error in process_relationships_node: {e}", exc_info=True)
+        logger.error("Error in process_relationships_node: %s", e, exc_info=True)
         return {"pending_actions": state.get("pending_actions", [])}
 
 
@@ -605,7 +667,7 @@ async def generate_gifts_node(state: AgentState) -> Dict[str, Any]:
     try:
         detected_person = state.get("detected_person")
         matched_recipient_id = state.get("matched_recipient_id")
-        user_recipients = state.get("user_recipients", [])
+        directory = NetworkDirectory.from_state(state)
         messages = state.get("messages", [])
         
         # Check if this is an anniversary gift request
@@ -621,10 +683,7 @@ async def generate_gifts_node(state: AgentState) -> Dict[str, Any]:
         
         if matched_recipient_id:
             # Use existing recipient data
-            matched_recipient = next(
-                (r for r in user_recipients if r.get("id") == matched_recipient_id),
-                None
-            )
+            matched_recipient = directory.recipient(matched_recipient_id)
             if matched_recipient:
                 recipient_info = {
                     "name": matched_recipient.get("name"),
@@ -636,25 +695,15 @@ async def generate_gifts_node(state: AgentState) -> Dict[str, Any]:
                 
                 # For anniversary gifts, find partner
                 if is_anniversary:
-                    relationships = matched_recipient.get("relationships", [])
                     # Find spouse/partner relationship
-                    partner_relationship = next(
-                        (r for r in relationships if r.get("relationship_type") in ["wife", "husband", "spouse", "partner"]),
-                        None
-                    )
-                    if partner_relationship:
-                        partner_id = partner_relationship.get("to_recipient_id")
-                        partner = next(
-                            (r for r in user_recipients if r.get("id") == partner_id),
-                            None
-                        )
-                        if partner:
-                            partner_info = {
-                                "name": partner.get("name"),
-                                "interests": partner.get("interests", []),
-                                "age_band": partner.get("age_band"),
-                                "constraints": partner.get("constraints", [])
-                }
+                    partner = directory.partner(matched_recipient_id)
+                    if partner:
+                        partner_info = {
+                            "name": partner.get("name"),
+                            "interests": partner.get("interests", []),
+                            "age_band": partner.get("age_band"),
+                            "constraints": partner.get("constraints", [])
+                        }
         
         if not recipient_info.get("name") and not recipient_info.get("relationship"):
             return {"gift_ideas": [], "error": "Insufficient recipient information"}
@@ -702,14 +751,21 @@ The personalized_reason should be concise (one sentence) and highlight why this
         if partner_info:
             system_prompt += "\n\nIMPORTANT: This is an anniversary gift. Consider BOTH partners' interests when generating gift ideas. Suggest gifts that both people can enjoy together, experiences they can share, or items that enhance their relationship."
         
+        # Identical recipient context -> reuse earlier ideas unless the user asked to regenerate
+        cache_key = gift_cache_key(recipient_info, partner_info, system_prompt)
+        if not state.get("regenerate"):
+            cached_ideas = gift_idea_cache.get(cache_key)
+            if cached_ideas is not None:
+                logger.info("Returning %d cached gift ideas", len(cached_ideas))
+                return {"gift_ideas": cached_ideas}
+        
         prompt = ChatPromptTemplate.from_messages([
             ("system", system_prompt),
             ("human", "Generate gift ideas for:\n{context}")
         ])
         
-        # Get LLM with structured output
-        llm = get_llm(temperature=0.7)
-        structured_llm = llm.with_structured_output(GiftIdeasList)
+        # Get shared LLM runnable with structured output
+        structured_llm = get_structured_llm(GiftIdeasList, temperature=0.7)
         
         # Invoke LLM
         result = await structured_llm.ainvoke(prompt.format_messages(context=context))
@@ -728,15 +784,35 @@ The personalized_reason should be concise (one sentence) and highlight why this
             for gift in result.gift_ideas
         ]
         
-        logger.info(f"Generated {len(gift_ideas)} gift ideas")
+        logger.info("Generated %d gift ideas", len(gift_ideas))
+        gift_idea_cache.put(cache_key, gift_ideas)
         
         return {"gift_ideas": gift_ideas}
         
     except Exception as e:
-        logger.error(f"Error in generate_gifts_node: {e}", exc_info=True)
+        logger.error("Error in generate_gifts_node: %s", e, exc_info=True)
         return {"gift_ideas": [], "error": str(e)}
 
 
+async def enrich_images_node(state: AgentState) -> Dict[str, Any]:
+    """
+    Resolve product images for gift ideas that have a url but no image_url.
+    All pages are fetched concurrently under one deadline; ideas whose page is slow
+    or has no image are returned unchanged.
+    Returns: {"gift_ideas": List[dict]}
+    """
+    gift_ideas = state.get("gift_ideas") or []
+    if not settings.image_enrichment_enabled or not gift_ideas:
+        return {"gift_ideas": gift_ideas}
+    
+    try:
+        enriched = await enrich_gift_images([dict(idea) for idea in gift_ideas])
+        return {"gift_ideas": enriched}
+    except Exception as e:
+        logger.error("Error in enrich_images_node: %s", e, exc_info=True)
+        return {"gift_ideas": gift_ideas}
+
+
 async def compose_response_node(state: AgentState) -> Dict[str, Any]:
     """
     Craft final AI response based on intent and data.
@@ -757,6 +833,7 @@ async def compose_response_node(state: AgentState) -> Dict[str, Any]:
         gift_ideas = state.get("gift_ideas", [])
         messages = state.get("messages", [])
         user_recipients = state.get("user_recipients", [])
+        directory = NetworkDirectory.from_state(state)
         
         # Get last user message for context
         last_message = messages[-1] if messages else None
@@ -773,10 +850,7 @@ async def compose_response_node(state: AgentState) -> Dict[str, Any]:
                 # Simple message - gift cards will show the details
                 recipient_name = None
                 if matched_recipient_id:
-                    matched_recipient = next(
-                        (r for r in user_recipients if r.get("id") == matched_recipient_id),
-                        None
-                    )
+                    matched_recipient = directory.recipient(matched_recipient_id)
                     if matched_recipient:
                         recipient_name = matched_recipient.get("name")
                 
@@ -791,10 +865,7 @@ async def compose_response_node(state: AgentState) -> Dict[str, Any]:
                 # No gift ideas generated - check if we have recipient info
                 recipient_name = None
                 if matched_recipient_id:
-                    matched_recipient = next(
-                        (r for r in user_recipients if r.get("id") == matched_recipient_id),
-                        None
-                    )
+                    matched_recipient = directory.recipient(matched_recipient_id)
                     if matched_recipient:
                         recipient_name = matched_recipient.get("name")
                 
@@ -814,7 +885,10 @@ async def compose_response_node(state: AgentState) -> Dict[str, Any]:
             
             user_recipients = state.get("user_recipients", [])
             
-            logger.info(f"add_recipient: recipient_exists={recipient_exists}, has_name={has_name}, has_relationship={has_relationship}, detected_person={detected_person}")
+            logger.info(
+                "add_recipient: recipient_exists=%s, has_name=%s, has_relationship=%s, person fields: %s",
+                recipient_exists, bool(has_name), bool(has_relationship), _person_fields(detected_person)
+            )
             
             if not recipient_exists and has_minimum_info:
                 # We have enough info to add
@@ -864,10 +938,7 @@ async def compose_response_node(state: AgentState) -> Dict[str, Any]:
                     person_name = detected_person.get("name")
                 
                 if not person_name and matched_recipient_id:
-                    matched_recipient = next(
-                        (r for r in user_recipients if r.get("id") == matched_recipient_id),
-                        None
-                    )
+                    matched_recipient = directory.recipient(matched_recipient_id)
                     if matched_recipient:
                         person_name = matched_recipient.get("name")
                 
@@ -913,10 +984,7 @@ async def compose_response_node(state: AgentState) -> Dict[str, Any]:
                 
                 if has_new_info and matched_recipient_id:
                     # They're providing new info for existing person - treat as update_info
-                    matched_recipient = next(
-                        (r for r in user_recipients if r.get("id") == matched_recipient_id),
-                        None
-                    )
+                    matched_recipient = directory.recipient(matched_recipient_id)
                     if matched_recipient:
                         person_name = matched_recipient.get("name", person_name)
                     
@@ -1019,11 +1087,7 @@ async def compose_response_node(state: AgentState) -> Dict[str, Any]:
             
             if recipient_exists and matched_recipient_id and detected_person:
                 # Get the actual matched recipient name to use in the response
-                user_recipients = state.get("user_recipients", [])
-                matched_recipient = next(
-                    (r for r in user_recipients if r.get("id") == matched_recipient_id),
-                    None
-                )
+                matched_recipient = directory.recipient(matched_recipient_id)
                 
                 # Use the matched recipient's name (from database) for accuracy
                 if matched_recipient:
@@ -1170,61 +1234,19 @@ async def compose_response_node(state: AgentState) -> Dict[str, Any]:
                 }
             
             # Use LLM for natural conversation with access to user's data
-            user_recipients = state.get("user_recipients", [])
-            user_occasions = state.get("user_occasions", [])
-            
-            # Format recipients for context
-            recipients_context = ""
-            if user_recipients:
-                recipients_list = []
-                for r in user_recipients:
-                    recipient_str = f"- {r.get('name', 'Unknown')}"
-                    if r.get('relationship'):
-                        recipient_str += f" ({r.get('relationship')})"
-                    if r.get('interests'):
-                        recipient_str += f" - Interests: {', '.join(r.get('interests', []))}"
-                    if r.get('notes'):
-                        recipient_str += f" - Notes: {r.get('notes')}"
-                    # Include relationships (secondary contacts)
-                    relationships = r.get('relationships', [])
-                    if relationships:
-                        relationship_descriptions = []
-                        for rel in relationships:
-                            # Find the name of the related recipient
-                            related_recipient_id = rel.get('to_recipient_id')
-                            related_name = "Unknown"
-                            if related_recipient_id:
-                                related_recipient = next(
-                                    (rec for rec in user_recipients if rec.get('id') == related_recipient_id),
-                                    None
-                                )
-                                if related_recipient:
-                                    related_name = related_recipient.get('name', 'Unknown')
-                            rel_type = rel.get('relationship_type', '')
-                            relationship_descriptions.append(f"{related_name} ({rel_type})")
-                        if relationship_descriptions:
-                            recipient_str += f" - Relationships: {', '.join(relationship_descriptions)}"
-                    recipients_list.append(recipient_str)
-                recipients_context = "\n".join(recipients_list)
-            
-            # Format occasions for context (grouped by recipient)
-            occasions_context = ""
-            if user_occasions:
-                occasions_list = []
-                for o in user_occasions:
-                    # Find recipient name
-                    recipient_id = o.get('recipient_id')
-                    recipient_name = "Unknown"
-                    if recipient_id:
-                        recipient = next((r for r in user_recipients if r.get('id') == recipient_id), None)
-                        if recipient:
-                            recipient_name = recipient.get('name', 'Unknown')
-                    
-                    occasion_str = f"- {recipient_name}'s {o.get('name', 'Occasion')}"
-                    if o.get('date'):
-                        occasion_str += f" is on {o.get('date')}"
-                    occasions_list.append(occasion_str)
-                occasions_context = "\n".join(occasions_list)
+            # Only the people relevant to this message, within the prompt token budget
+            chat_context = build_chat_context(
+                user_message,
+                directory,
+                settings.chat_context_token_budget
+            )
+            recipients_context = chat_context.recipients_context
+            occasions_context = chat_context.occasions_context
+            logger.info(
+                "Casual chat context: %d/%d recipients, ~%d tokens (full network ~%d)",
+                len(chat_context.selected_recipient_ids), chat_context.total_recipients,
+                chat_context.tokens_after, chat_context.tokens_before
+            )
             
             # Build system prompt with user data
             system_prompt = """You are My3, a friendly and helpful AI gift concierge assistant.
@@ -1238,6 +1260,8 @@ IMPORTANT:
             
             if recipients_context:
                 system_prompt += f"\n\nPeople in the user's network:\n{recipients_context}"
+                if len(chat_context.selected_recipient_ids) < chat_context.total_recipients:
+                    system_prompt += f"\n(The {len(chat_context.selected_recipient_ids)} people most relevant to this message, out of {chat_context.total_recipients} in the network.)"
             
             if occasions_context:
                 system_prompt += f"\n\nOccasions:\n{occasions_context}"
@@ -1251,26 +1275,22 @@ IMPORTANT:
             system_prompt += "\n- If the person is not found in the network list above, clearly state that you don't have information about that person yet, but you can help them add it."
             system_prompt += "\n- If you detect duplicate entries (same name and relationship), inform the user and ask if they want to remove the duplicates. When they confirm (say 'yes'), you should create delete_recipient actions for the duplicate entries (keep the one with the most information or the most recent one)."
             
-            # Check for duplicates before generating response
+            # Duplicates are precomputed at write time (recipients.natural_key, cached with the user context)
             duplicates_found = []
-            try:
-                if user_recipients:
-                    from collections import defaultdict
-                    name_relationship_map = defaultdict(list)
-                    for r in user_recipients:
-                        key = (r.get('name', '').lower().strip(), r.get('relationship', '').lower().strip() if r.get('relationship') else None)
-                        name_relationship_map[key].append(r)
-                    
-                    for key, recipients in name_relationship_map.items():
-                        if len(recipients) > 1:
-                            duplicates_found.append({
-                                'name': key[0],
-                                'relationship': key[1],
-                                'recipients': recipients
-                            })
-            except Exception as e:
-                logger.warning(f"Error detecting duplicates: {e}")
-                duplicates_found = []
+            for id_group in state.get("duplicate_groups") or []:
+                recipients = [r for r in (directory.recipient(recipient_id) for recipient_id in id_group) if r is not None]
+                if len(recipients) > 1:
+                    duplicates_found.append({
+                        'name': recipients[0].get('name', '').lower().strip(),
+                        'relationship': (recipients[0].get('relationship') or '').lower().strip() or None,
+                        'recipients': recipients
+                    })
+            if duplicates_found:
+                duplicate_descriptions = [
+                    f"{dup['recipients'][0].get('name', 'Unknown')} ({dup['relationship'] or 'no relationship'}) x{len(dup['recipients'])}"
+                    for dup in duplicates_found
+                ]
+                system_prompt += f"\n\nDuplicate entries in the network: {', '.join(duplicate_descriptions)}"
             
             prompt = ChatPromptTemplate.from_messages([
                 ("system", system_prompt),
@@ -1294,7 +1314,7 @@ IMPORTANT:
                                 prev_ai_mentioned_duplicates = True
                                 break
             except Exception as e:
-                logger.warning(f"Error checking previous messages for duplicates: {e}")
+                logger.warning("Error checking previous messages for duplicates: %s", e)
                 prev_ai_mentioned_duplicates = False
             
             # If user confirms duplicate removal and we found duplicates, create delete actions
@@ -1345,12 +1365,12 @@ IMPORTANT:
                         confirmation_prompt = f"Would you like me to remove {total_to_delete} duplicate entr{'y' if total_to_delete == 1 else 'ies'}?"
                         ai_response = f"I'll remove {total_to_delete} duplicate entr{'y' if total_to_delete == 1 else 'ies'}, keeping the most complete ones. {confirmation_prompt}"
             except Exception as e:
-                logger.warning(f"Error processing duplicate removal confirmation: {e}")
+                logger.warning("Error processing duplicate removal confirmation: %s", e)
                 # Continue with normal response if duplicate removal fails
         
         elif current_intent == "unclear" or current_intent is None:
             # If intent is unclear or None, try to provide a helpful response based on the message
-            logger.warning(f"[WARNING] Intent is unclear or None. User message: '{user_message}'. Attempting fallback response.")
+            logger.warning("Intent is unclear or None (%d-char message). Attempting fallback response.", len(user_message))
             
             # Check if there was an error that indicates API issues
             error = state.get("error", "")
@@ -1383,11 +1403,7 @@ IMPORTANT:
                 
                 if potential_name:
                     # Try to find the person in the network
-                    matched_recipient = None
-                    for r in user_recipients:
-                        if r.get('name', '').lower() == potential_name:
-                            matched_recipient = r
-                            break
+                    matched_recipient = directory.find_by_name(potential_name)
                     
                     if matched_recipient:
                         # Build a response with their info
@@ -1419,7 +1435,7 @@ IMPORTANT:
             else:
                 ai_response = "I'm here to help you with gift ideas and managing your important relationships! What would you like to do? You can ask me to find gifts, add someone to your network, or update information about someone."
         
-        logger.info(f"Composed response for intent: {current_intent}")
+        logger.info("Composed response for intent: %s", current_intent)
         
         return {
             "ai_response": ai_response,
@@ -1430,7 +1446,7 @@ IMPORTANT:
         }
         
     except Exception as e:
-        logger.error(f"Error in compose_response_node: {e}", exc_info=True)
+        logger.error("Error in compose_response_node: %s", e, exc_info=True)
         error_msg = "I apologize, but I encountered an error. Please try again."
         return {
             "ai_response": error_msg,
@@ -1458,10 +1474,10 @@ async def execute_actions_node(state: AgentState) -> Dict[str, Any]:
         
         # Actions are validated and ready to execute
         # They will be executed by the chat route after confirmation
-        logger.info(f"Validated {len(pending_actions)} pending actions")
+        logger.info("Validated %d pending actions", len(pending_actions))
         
         return {"pending_actions": pending_actions}
         
     except Exception as e:
-        logger.error(f"Error in execute_actions_node: {e}", exc_info=True)
+        logger.error("Error in execute_actions_node: %s", e, exc_info=True)
         return {"pending_actions": [], "error": str(e)}
@@ -9,10 +9,13 @@ class AgentState(TypedDict):
     messages: Annotated[List[BaseMessage], add_messages]
     user_id: str
     conversation_id: Optional[str]
+    conversation_summary: Optional[str]  # Older turns folded by summarize_history (app/graph/history.py)
     
     # Context (loaded from DB)
     user_recipients: List[dict]
     user_occasions: List[dict]
+    network_directory: Optional[dict]  # ID-keyed maps over the two lists above (app/graph/network_directory.py)
+    duplicate_groups: Optional[List[List[str]]]  # Recipient ids sharing name + relationship (recipients.natural_key)
     
     # Current processing
     current_intent: Optional[Literal["gift_search", "add_recipient", "update_info", "casual_chat", "unclear"]]
@@ -20,6 +23,7 @@ class AgentState(TypedDict):
     recipient_exists: Optional[bool]
     matched_recipient_id: Optional[str]
     ambiguous_recipients: Optional[List[dict]]  # List of recipients when relationship is ambiguous
+    regenerate: Optional[bool]  # Skip the gift-idea cache for this turn
     
     # Actions to execute
     pending_actions: List[dict]
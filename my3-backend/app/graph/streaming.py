@@ -0,0 +1,38 @@
+"""
+Server-sent-event streaming for the My3 workflow.
+
+Translates the LangGraph async event stream into a small set of client events:
+- node:  {"node": str, "status": "started" | "completed"} for each workflow node
+- token: {"content": str} for LLM tokens generated inside compose_response
+"""
+import json
+import logging
+from typing import Any, AsyncIterator, Dict, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Only tokens from the node that writes the user-facing reply are forwarded
+TOKEN_STREAM_NODES = {"compose_response"}
+
+
+async def stream_workflow_events(graph, state: Dict[str, Any], config: Dict[str, Any]) -> AsyncIterator[Tuple[str, Dict[str, Any]]]:
+    """
+    Run the compiled graph and yield (event, data) pairs as nodes progress.
+    The final state is persisted by the graph's checkpointer as usual.
+    """
+    async for event in graph.astream_events(state, config, version="v2"):
+        kind = event["event"]
+        node = event.get("metadata", {}).get("langgraph_node")
+
+        if kind in ("on_chain_start", "on_chain_end") and node and event.get("name") == node:
+            yield "node", {"node": node, "status": "started" if kind == "on_chain_start" else "completed"}
+        elif kind == "on_chat_model_stream" and node in TOKEN_STREAM_NODES:
+            chunk = event["data"].get("chunk")
+            content = getattr(chunk, "content", None)
+            if content:
+                yield "token", {"content": content}
+
+
+def format_sse(event: str, data: Dict[str, Any]) -> str:
+    """Format one server-sent event."""
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
@@ -1,32 +1,59 @@
 from langgraph.graph import StateGraph, END
-from langgraph.checkpoint.memory import MemorySaver
+from langgraph.checkpoint.base import BaseCheckpointSaver
+from typing import Optional
+from app.config import settings
 from app.graph.state import AgentState
+from app.graph.checkpointer import create_checkpointer
 from app.graph.nodes import (
     router_node,
     extract_person_node,
+    classify_and_extract_node,
     check_recipient_node,
     process_relationships_node,
     generate_gifts_node,
+    enrich_images_node,
     compose_response_node,
     execute_actions_node
 )
+from app.graph.history import summarize_history_node
+from app.graph.instrumentation import instrument_node
 
 
-def create_my3_workflow():
-    """Create and compile the My3 LangGraph workflow with conditional routing."""
+def create_my3_workflow(
+    checkpointer: Optional[BaseCheckpointSaver] = None,
+    combined_extraction: Optional[bool] = None
+):
+    """
+    Create and compile the My3 LangGraph workflow with conditional routing.
+    Uses the checkpointer configured in settings unless one is passed in.
+    With combined_extraction (default: settings.combined_intent_extraction) the entry
+    node classifies intent and extracts person info in a single LLM call.
+    """
+    if combined_extraction is None:
+        combined_extraction = settings.combined_intent_extraction
+    
     workflow = StateGraph(AgentState)
     
+    def add_node(name: str, node) -> None:
+        """Register a node wrapped with per-node latency and token accounting."""
+        workflow.add_node(name, instrument_node(name, node))
+    
     # Add all nodes
-    workflow.add_node("router", router_node)
-    workflow.add_node("extract_person", extract_person_node)
-    workflow.add_node("check_recipient", check_recipient_node)
-    workflow.add_node("process_relationships", process_relationships_node)
-    workflow.add_node("generate_gifts", generate_gifts_node)
-    workflow.add_node("compose_response", compose_response_node)
-    workflow.add_node("execute_actions", execute_actions_node)
+    if combined_extraction:
+        add_node("classify_and_extract", classify_and_extract_node)
+    else:
+        add_node("router", router_node)
+        add_node("extract_person", extract_person_node)
+    add_node("check_recipient", check_recipient_node)
+    add_node("process_relationships", process_relationships_node)
+    add_node("generate_gifts", generate_gifts_node)
+    add_node("enrich_images", enrich_images_node)
+    add_node("compose_response", compose_response_node)
+    add_node("execute_actions", execute_actions_node)
+    add_node("summarize_history", summarize_history_node)
     
     # Set entry point
-    workflow.set_entry_point("router")
+    workflow.set_entry_point("classify_and_extract" if combined_extraction else "router")
     
     # Define conditional routing functions
     def route_after_router(state: AgentState) -> str:
@@ -37,6 +64,14 @@ def create_my3_workflow():
         else:
             return "compose_response"
     
+    def route_after_classify_and_extract(state: AgentState) -> str:
+        """Route after combined node; person info is already extracted."""
+        intent = state.get("current_intent")
+        if intent in ["gift_search", "add_recipient", "update_info"]:
+            return "check_recipient"
+        else:
+            return "compose_response"
+    
     def route_after_check(state: AgentState) -> str:
         """Route after check_recipient node based on intent."""
         intent = state.get("current_intent")
@@ -48,26 +83,33 @@ def create_my3_workflow():
     def route_after_compose(state: AgentState) -> str:
         """Route after compose_response node based on state."""
         if state.get("requires_confirmation"):
-            return END  # Wait for user confirmation
+            return "summarize_history"  # Then wait for user confirmation
         elif state.get("pending_actions"):
             return "execute_actions"
         else:
-            return END
+            return "summarize_history"
     
     # Add edges with conditional routing
-    workflow.add_conditional_edges("router", route_after_router)
-    workflow.add_edge("extract_person", "check_recipient")
+    if combined_extraction:
+        workflow.add_conditional_edges("classify_and_extract", route_after_classify_and_extract)
+    else:
+        workflow.add_conditional_edges("router", route_after_router)
+        workflow.add_edge("extract_person", "check_recipient")
     workflow.add_edge("check_recipient", "process_relationships")
     workflow.add_conditional_edges("process_relationships", route_after_check)
-    workflow.add_edge("generate_gifts", "compose_response")
+    workflow.add_edge("generate_gifts", "enrich_images")
+    workflow.add_edge("enrich_images", "compose_response")
     workflow.add_conditional_edges("compose_response", route_after_compose)
-    workflow.add_edge("execute_actions", END)
+    workflow.add_edge("execute_actions", "summarize_history")
+    # Every turn ends by bounding the checkpointed history
+    workflow.add_edge("summarize_history", END)
     
-    # Add memory for conversation persistence
-    memory = MemorySaver()
+    # Durable checkpointer for conversation persistence (shared across workers)
+    if checkpointer is None:
+        checkpointer = create_checkpointer()
     
     # Compile graph with checkpointer
-    return workflow.compile(checkpointer=memory)
+    return workflow.compile(checkpointer=checkpointer)
 
 
 # Export compiled graph
@@ -2,16 +2,19 @@ from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
 import logging
-import time
 from app.config import settings
-from app.api.routes import auth, chat, recipients, health
+from app.api.routes import auth, chat, recipients, occasions, health, metrics
 from app.database.connection import init_db
+from app.utils.llm import close_llm_clients
+from app.utils.auth import password_hasher
+from app.services.image_extractor import close_image_clients
+from app.services.address_validator import close_address_clients
+from app.services.job_queue import job_runner
+from app.utils.metrics import MetricsMiddleware
+from app.utils.logging_config import configure_logging, stop_logging
 
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format="%(asctime)s - %(name)s - %(levelname)s - %(message)s"
-)
+# Queue-based structured logging: records are formatted and written off the event loop
+configure_logging()
 logger = logging.getLogger(__name__)
 
 # Create FastAPI app
@@ -26,9 +29,9 @@ cors_origins = settings.cors_origins_list
 if settings.environment == "development":
     # In development, allow all localhost ports
     cors_origins = ["http://localhost:3000", "http://localhost:3001", "http://127.0.0.1:3000", "http://127.0.0.1:3001"]
-    logger.info(f"Development mode: Using permissive CORS origins: {cors_origins}")
+    logger.info("Development mode: Using permissive CORS origins: %s", cors_origins)
 else:
-    logger.info(f"Production mode: CORS origins configured: {cors_origins}")
+    logger.info("Production mode: CORS origins configured: %s", cors_origins)
 
 app.add_middleware(
     CORSMiddleware,
@@ -38,27 +41,17 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Request logging middleware
-@app.middleware("http")
-async def log_requests(request: Request, call_next):
-    start_time = time.time()
-    
-    # Log incoming request
-    logger.info(f"→ {request.method} {request.url.path}")
-    
-    response = await call_next(request)
-    duration = time.time() - start_time
-    
-    logger.info(f"← {request.method} {request.url.path} - {response.status_code} ({duration:.3f}s)")
-    
-    return response
+# Request metrics (latency per route/status, DB time, in-flight), exported at /api/metrics
+app.add_middleware(MetricsMiddleware)
 
 # Include routers
 # Note: Routers already have prefixes defined, so we don't add them here
 app.include_router(auth.router)
 app.include_router(chat.router)
 app.include_router(recipients.router)
+app.include_router(occasions.router)
 app.include_router(health.router)
+app.include_router(metrics.router)
 
 
 # Root endpoint
@@ -71,14 +64,29 @@ async def root():
 # Startup event
 @app.on_event("startup")
 async def startup():
-    """Initialize database on startup."""
+    """Initialize database and start background job workers on startup."""
     try:
         await init_db()
         logger.info("Database initialized successfully")
     except Exception as e:
-        logger.error(f"Error initializing database: {e}", exc_info=True)
+        logger.error("Error initializing database: %s", e, exc_info=True)
         # Don't raise - allow app to start even if DB init fails
         # (migrations should handle this in production)
+    
+    if settings.job_runner_enabled:
+        job_runner.start()
+
+
+# Shutdown event
+@app.on_event("shutdown")
+async def shutdown():
+    """Stop background workers; close pooled HTTP connections and the password hashing pool."""
+    await job_runner.stop()
+    await close_llm_clients()
+    await close_image_clients()
+    await close_address_clients()
+    password_hasher.shutdown()
+    stop_logging()
 
 
 @app.exception_handler(Exception)
@@ -86,7 +94,7 @@ async def global_exception_handler(request: Request, exc: Exception):
     """Global exception handler."""
     import traceback
     error_trace = traceback.format_exc()
-    logger.error(f"Unhandled exception: {exc}\n{error_trace}", exc_info=True)
+    logger.error("Unhandled exception: %s\n%s", exc, error_trace, exc_info=True)
     
     # In development, return more details
     if settings.environment == "development":
@@ -0,0 +1,524 @@
+"""
+Batched executor for confirmed action plans (pending_actions from the workflow).
+
+Execution runs in three phases so a confirmation costs a handful of round trips
+instead of several per action:
+
+1. Lookup: every recipient the plan references (by id or by name) is loaded in one
+   SELECT, and existing relationships for all candidate pairs in a second one.
+2. Plan: actions are turned into plain row dicts and field updates (pure Python,
+   see plan_actions).
+3. Write: recipients, occasions and relationships are each inserted with a single
+   multi-row INSERT ... RETURNING, updates are flushed together, deletes are one
+   DELETE ... WHERE id IN (...). Address validation is not awaited: recipients
+   with a new address are marked "pending" and validate_address jobs are queued
+   in the same transaction (see app/services/job_queue.py). Nothing is committed
+   here; the caller commits once so the whole confirmation is a single transaction.
+"""
+import logging
+import uuid
+from dataclasses import dataclass, field
+from datetime import date
+from typing import Any, Dict, List, Optional, Set, Tuple
+from uuid import UUID
+
+from sqlalchemy import delete, func, insert, or_, select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.database.models import Occasion, OccasionStatus, Recipient, RecipientRelationship
+from app.services.address_validator import address_job, normalize_address_key
+from app.services.job_queue import enqueue_jobs
+from app.utils.occasion_dates import occasion_schedule
+
+logger = logging.getLogger(__name__)
+
+ADDRESS_FIELDS = ("street_address", "city", "state_province", "postal_code", "country")
+
+def _reverse_relationship_type(relationship_type: Optional[str]) -> str:
+    return "husband" if relationship_type == "wife" else "wife"
+
+
+def _parse_uuid(value: Any) -> Optional[UUID]:
+    if not value:
+        return None
+    try:
+        return value if isinstance(value, UUID) else UUID(str(value))
+    except ValueError:
+        logger.warning("Ignoring invalid recipient id in action: %s", value)
+        return None
+
+
+def _merge_notes(existing_notes: Optional[str], new_notes: str) -> str:
+    """Append new information to existing notes unless it already contains them."""
+    if existing_notes and new_notes and existing_notes.lower() not in new_notes.lower():
+        return f"{existing_notes}. {new_notes}"
+    return new_notes
+
+
+@dataclass
+class PlanLookups:
+    """Recipient ids and names an action plan needs loaded from the database."""
+    recipient_ids: Set[UUID] = field(default_factory=set)
+    exact_names: Set[str] = field(default_factory=set)  # lowercased
+    partial_names: Set[str] = field(default_factory=set)
+
+
+@dataclass
+class AddressCheck:
+    recipient_id: UUID
+    clear_on_failure: bool = False  # update_recipient clears stale validated JSON
+
+
+@dataclass
+class ActionPlan:
+    """Rows and field updates produced from pending actions."""
+    new_recipients: List[dict] = field(default_factory=list)
+    recipient_updates: Dict[UUID, dict] = field(default_factory=dict)
+    new_occasions: List[dict] = field(default_factory=list)
+    new_relationships: List[dict] = field(default_factory=list)
+    delete_ids: List[UUID] = field(default_factory=list)
+    address_checks: List[AddressCheck] = field(default_factory=list)
+    summary_recipient_id: Optional[UUID] = None
+    summary_occasion_id: Optional[UUID] = None
+
+
+@dataclass
+class ActionPlanResult:
+    """Outcome of an executed plan (dicts match the ChatConfirmResponse payload)."""
+    recipient: Optional[dict] = None
+    occasion: Optional[dict] = None
+    created_recipient_ids: List[str] = field(default_factory=list)
+    created_occasion_ids: List[str] = field(default_factory=list)
+    created_relationship_ids: List[str] = field(default_factory=list)
+    updated_recipient_ids: List[str] = field(default_factory=list)
+    deleted_recipient_ids: List[str] = field(default_factory=list)
+    queued_jobs: int = 0  # Background jobs committed with the plan (address validation)
+
+
+def collect_lookups(actions: List[dict]) -> PlanLookups:
+    """Gather every recipient id and name referenced by the actions."""
+    lookups = PlanLookups()
+    for action in actions:
+        action_type = action.get("type")
+        if action_type == "create_recipient":
+            name = (action.get("data", {}).get("name") or "").strip()
+            if name:
+                lookups.exact_names.add(name.lower())
+        elif action_type == "create_secondary_contact":
+            lookups.recipient_ids.add(_parse_uuid(action.get("primary_recipient_id")))
+            secondary_name = (action.get("secondary_contact") or {}).get("name")
+            if secondary_name:
+                lookups.partial_names.add(secondary_name)
+        elif action_type == "create_relationship":
+            lookups.recipient_ids.add(_parse_uuid(action.get("from_recipient_id")))
+            lookups.recipient_ids.add(_parse_uuid(action.get("to_recipient_id")))
+        elif action_type in ("update_recipient", "delete_recipient", "create_occasion"):
+            lookups.recipient_ids.add(_parse_uuid(action.get("recipient_id")))
+    lookups.recipient_ids.discard(None)
+    return lookups
+
+
+def plan_actions(
+    actions: List[dict],
+    user_id: UUID,
+    existing: List[Recipient],
+    today: Optional[date] = None
+) -> ActionPlan:
+    """
+    Turn pending actions into rows and updates without touching the database.
+    `existing` holds the recipients returned by the lookup query. Relationship
+    rows may still contain pairs that already exist; execute_action_plan drops them.
+    """
+    plan = ActionPlan()
+    by_id: Dict[UUID, Any] = {r.id: r for r in existing}
+    by_name: Dict[str, Any] = {}
+    for r in existing:
+        by_name.setdefault(r.name.lower(), r)
+    new_by_id: Dict[UUID, dict] = {}
+
+    def current(recipient_id: UUID, attr: str):
+        """Effective value of a recipient field, including earlier updates in this plan."""
+        if recipient_id in new_by_id:
+            return new_by_id[recipient_id].get(attr)
+        updates = plan.recipient_updates.get(recipient_id, {})
+        if attr in updates:
+            return updates[attr]
+        return getattr(by_id[recipient_id], attr)
+
+    def set_field(recipient_id: UUID, attr: str, value) -> None:
+        if recipient_id in new_by_id:
+            new_by_id[recipient_id][attr] = value
+        else:
+            plan.recipient_updates.setdefault(recipient_id, {})[attr] = value
+
+    def add_recipient(row: dict) -> UUID:
+        # Every row carries the same keys so the INSERT stays a single multi-row statement
+        row = {
+            "id": uuid.uuid4(),
+            "user_id": user_id,
+            "relationship_type": None,
+            "age_band": None,
+            "interests": [],
+            "constraints": [],
+            "notes": None,
+            "is_core_contact": True,
+            "network_level": 1,
+            **{attr: None for attr in ADDRESS_FIELDS},
+            "address_validation_status": None,
+            "validated_address_json": None,
+            **row
+        }
+        plan.new_recipients.append(row)
+        new_by_id[row["id"]] = row
+        by_name.setdefault(row["name"].lower(), row)
+        return row["id"]
+
+    def add_occasion(recipient_id: UUID, occasion_data: dict, default_name: str, default_type: Optional[str]) -> None:
+        occasion_id = uuid.uuid4()
+        plan.new_occasions.append({
+            "id": occasion_id,
+            "user_id": user_id,
+            "recipient_id": recipient_id,
+            "name": occasion_data.get("name", default_name),
+            "occasion_type": occasion_data.get("occasion_type", default_type),
+            # date, month, day, recurrence and the indexed next_occurrence
+            **occasion_schedule(
+                occasion_data.get("date"),
+                occasion_data.get("name", default_name),
+                occasion_data.get("occasion_type", default_type),
+                today
+            ),
+            "budget_range": occasion_data.get("budget_range"),
+            "status": OccasionStatus.IDEA_NEEDED
+        })
+        plan.summary_occasion_id = occasion_id
+
+    def add_relationship(from_id: UUID, to_id: UUID, relationship_type: str, is_bidirectional: bool) -> None:
+        plan.new_relationships.append({
+            "id": uuid.uuid4(),
+            "user_id": user_id,
+            "from_recipient_id": from_id,
+            "to_recipient_id": to_id,
+            "relationship_type": relationship_type,
+            "is_bidirectional": is_bidirectional
+        })
+        if is_bidirectional:
+            plan.new_relationships.append({
+                "id": uuid.uuid4(),
+                "user_id": user_id,
+                "from_recipient_id": to_id,
+                "to_recipient_id": from_id,
+                "relationship_type": _reverse_relationship_type(relationship_type),
+                "is_bidirectional": True
+            })
+
+    def address_key(recipient_id: UUID) -> str:
+        return normalize_address_key(*(current(recipient_id, attr) for attr in ADDRESS_FIELDS))
+
+    def known(recipient_id: Optional[UUID]) -> bool:
+        return recipient_id is not None and (recipient_id in by_id or recipient_id in new_by_id)
+
+    for action in actions:
+        action_type = action.get("type")
+
+        if action_type == "create_recipient":
+            person_data = action.get("data", {})
+            recipient_name = (person_data.get("name") or "").strip()
+            if not recipient_name:
+                logger.warning("Skipping create_recipient action - missing name")
+                continue
+
+            duplicate = by_name.get(recipient_name.lower())
+            if duplicate is not None:
+                recipient_id = duplicate["id"] if isinstance(duplicate, dict) else duplicate.id
+                logger.warning("Duplicate recipient detected: name already exists (ID: %s). Merging instead of creating.", recipient_id)
+                # Update the existing recipient with new information
+                if person_data.get("interests"):
+                    set_field(recipient_id, "interests", list(set((current(recipient_id, "interests") or []) + person_data["interests"])))
+                if person_data.get("notes"):
+                    set_field(recipient_id, "notes", _merge_notes(current(recipient_id, "notes"), person_data["notes"]))
+                if person_data.get("age_band") and not current(recipient_id, "age_band"):
+                    set_field(recipient_id, "age_band", person_data["age_band"])
+                if person_data.get("street_address") and not current(recipient_id, "street_address"):
+                    for attr in ADDRESS_FIELDS:
+                        set_field(recipient_id, attr, person_data.get(attr))
+                    if current(recipient_id, "city"):
+                        plan.address_checks.append(AddressCheck(recipient_id))
+                plan.summary_recipient_id = recipient_id
+                continue
+
+            recipient_id = add_recipient({
+                "name": recipient_name,
+                "relationship_type": person_data.get("relationship"),
+                "age_band": person_data.get("age_band"),
+                "interests": person_data.get("interests", []),
+                "constraints": person_data.get("constraints", []),
+                "notes": person_data.get("notes"),
+                **{attr: person_data.get(attr) for attr in ADDRESS_FIELDS},
+                "address_validation_status": "unvalidated"
+            })
+            if person_data.get("street_address") and person_data.get("city"):
+                plan.address_checks.append(AddressCheck(recipient_id))
+            plan.summary_recipient_id = recipient_id
+
+            occasion_data = action.get("occasion_data")
+            if occasion_data:
+                add_occasion(recipient_id, occasion_data, "Birthday", "birthday")
+
+        elif action_type == "update_recipient":
+            recipient_id = _parse_uuid(action.get("recipient_id"))
+            if not known(recipient_id):
+                logger.warning("Recipient %s not found for update", action.get("recipient_id"))
+                continue
+
+            person_data = action.get("data", {})
+            if person_data.get("name"):
+                set_field(recipient_id, "name", person_data["name"])
+            if person_data.get("relationship"):
+                set_field(recipient_id, "relationship_type", person_data["relationship"])
+            if person_data.get("age_band"):
+                set_field(recipient_id, "age_band", person_data["age_band"])
+            if person_data.get("interests"):
+                set_field(recipient_id, "interests", list(set((current(recipient_id, "interests") or []) + person_data["interests"])))
+            # Only a different address (after normalization) is validated again
+            old_address_key = address_key(recipient_id)
+            for attr in ADDRESS_FIELDS:
+                if person_data.get(attr) is not None:
+                    set_field(recipient_id, attr, person_data[attr])
+            address_changed = address_key(recipient_id) != old_address_key
+            if address_changed and current(recipient_id, "street_address") and current(recipient_id, "city"):
+                plan.address_checks.append(AddressCheck(recipient_id, clear_on_failure=True))
+            if person_data.get("constraints"):
+                set_field(recipient_id, "constraints", list(set((current(recipient_id, "constraints") or []) + person_data["constraints"])))
+            if person_data.get("notes"):
+                set_field(recipient_id, "notes", _merge_notes(current(recipient_id, "notes"), person_data["notes"]))
+            plan.summary_recipient_id = recipient_id
+
+        elif action_type == "create_secondary_contact":
+            primary_id = _parse_uuid(action.get("primary_recipient_id"))
+            secondary_contact_data = action.get("secondary_contact", {})
+            if not primary_id or not secondary_contact_data:
+                continue
+            if not known(primary_id):
+                logger.warning("Primary recipient %s not found", primary_id)
+                continue
+
+            secondary_name = secondary_contact_data.get("name") or ""
+            secondary = next(
+                (r for r in list(by_id.values()) + plan.new_recipients
+                 if secondary_name and secondary_name.lower() in (r["name"] if isinstance(r, dict) else r.name).lower()
+                 and (r["id"] if isinstance(r, dict) else r.id) != primary_id),
+                None
+            )
+            if secondary is not None:
+                secondary_id = secondary["id"] if isinstance(secondary, dict) else secondary.id
+            else:
+                secondary_id = add_recipient({
+                    "name": secondary_name,
+                    "relationship_type": secondary_contact_data.get("relationship_type"),
+                    "is_core_contact": secondary_contact_data.get("is_core_contact", False),
+                    "network_level": secondary_contact_data.get("network_level", 2)
+                })
+            add_relationship(
+                primary_id,
+                secondary_id,
+                secondary_contact_data.get("relationship_type", ""),
+                action.get("is_bidirectional", False)
+            )
+
+        elif action_type == "create_relationship":
+            from_id = _parse_uuid(action.get("from_recipient_id"))
+            to_id = _parse_uuid(action.get("to_recipient_id"))
+            relationship_type = action.get("relationship_type")
+            if not from_id or not to_id or not relationship_type:
+                continue
+            if not known(from_id) or not known(to_id):
+                logger.warning("Recipients not found for relationship: %s -> %s", from_id, to_id)
+                continue
+            add_relationship(from_id, to_id, relationship_type, action.get("is_bidirectional", False))
+
+        elif action_type == "delete_recipient":
+            recipient_id = _parse_uuid(action.get("recipient_id"))
+            if recipient_id not in by_id:
+                logger.warning("Recipient %s not found or doesn't belong to user", action.get("recipient_id"))
+                continue
+            plan.delete_ids.append(recipient_id)
+
+        elif action_type == "create_occasion":
+            recipient_id = _parse_uuid(action.get("recipient_id"))
+            if not known(recipient_id):
+                logger.warning("Recipient %s not found for occasion creation", action.get("recipient_id"))
+                continue
+            add_occasion(recipient_id, action.get("occasion_data", {}), "", None)
+
+    return plan
+
+
+def recipient_to_dict(recipient: Recipient) -> dict:
+    return {
+        "id": str(recipient.id),
+        "name": recipient.name,
+        "relationship": recipient.relationship_type,
+        "age_band": recipient.age_band,
+        "interests": recipient.interests or [],
+        "constraints": recipient.constraints or [],
+        "notes": recipient.notes,
+        "street_address": recipient.street_address,
+        "city": recipient.city,
+        "state_province": recipient.state_province,
+        "postal_code": recipient.postal_code,
+        "country": recipient.country,
+        "address_validation_status": recipient.address_validation_status
+    }
+
+
+def occasion_to_dict(occasion: Occasion) -> dict:
+    return {
+        "id": str(occasion.id),
+        "recipient_id": str(occasion.recipient_id),
+        "name": occasion.name,
+        "occasion_type": occasion.occasion_type,
+        "date": str(occasion.date) if occasion.date else None,
+        "recurrence": occasion.recurrence,
+        "next_occurrence": str(occasion.next_occurrence) if occasion.next_occurrence else None,
+        "budget_range": occasion.budget_range,
+        "status": occasion.status.value if occasion.status else None
+    }
+
+
+def _address_jobs(plan: ActionPlan, existing_by_id: Dict[UUID, Recipient]) -> List[dict]:
+    """Mark planned address changes as pending and build their validation jobs."""
+    new_by_id = {row["id"]: row for row in plan.new_recipients}
+
+    def value(recipient_id: UUID, attr: str):
+        if recipient_id in new_by_id:
+            return new_by_id[recipient_id].get(attr)
+        updates = plan.recipient_updates.get(recipient_id, {})
+        return updates[attr] if attr in updates else getattr(existing_by_id[recipient_id], attr)
+
+    # One check per recipient (the last one wins, like sequential execution)
+    checks = list({check.recipient_id: check for check in plan.address_checks}.values())
+    jobs = []
+    for check in checks:
+        if check.recipient_id in plan.delete_ids:
+            continue
+        jobs.append(address_job(
+            check.recipient_id,
+            street=value(check.recipient_id, "street_address"),
+            city=value(check.recipient_id, "city"),
+            state=value(check.recipient_id, "state_province"),
+            postal_code=value(check.recipient_id, "postal_code"),
+            country=value(check.recipient_id, "country"),
+            clear_on_failure=check.clear_on_failure
+        ))
+        if check.recipient_id in new_by_id:
+            new_by_id[check.recipient_id]["address_validation_status"] = "pending"
+        else:
+            plan.recipient_updates.setdefault(check.recipient_id, {})["address_validation_status"] = "pending"
+    return jobs
+
+
+async def execute_action_plan(db: AsyncSession, user_id: UUID, actions: List[dict]) -> ActionPlanResult:
+    """
+    Execute confirmed actions in bulk. Leaves the transaction open; the caller commits
+    (or rolls back) once for the whole confirmation.
+    """
+    result = ActionPlanResult()
+
+    # Phase 1: bulk lookups
+    lookups = collect_lookups(actions)
+    conditions = []
+    if lookups.recipient_ids:
+        conditions.append(Recipient.id.in_(lookups.recipient_ids))
+    if lookups.exact_names:
+        conditions.append(func.lower(Recipient.name).in_(lookups.exact_names))
+    for name in lookups.partial_names:
+        conditions.append(Recipient.name.ilike(f"%{name}%"))
+    existing: List[Recipient] = []
+    if conditions:
+        existing_result = await db.execute(
+            select(Recipient).where(Recipient.user_id == user_id, or_(*conditions))
+        )
+        existing = list(existing_result.scalars().all())
+    existing_by_id = {r.id: r for r in existing}
+
+    # Phase 2: plan; address validation is queued rather than awaited
+    plan = plan_actions(actions, user_id, existing)
+    address_jobs = _address_jobs(plan, existing_by_id)
+
+    # Drop relationships that already exist (single query for every candidate pair)
+    if plan.new_relationships:
+        pairs = {(row["from_recipient_id"], row["to_recipient_id"]) for row in plan.new_relationships}
+        existing_pairs_result = await db.execute(
+            select(RecipientRelationship.from_recipient_id, RecipientRelationship.to_recipient_id).where(
+                RecipientRelationship.user_id == user_id,
+                tuple_(RecipientRelationship.from_recipient_id, RecipientRelationship.to_recipient_id).in_(pairs)
+            )
+        )
+        existing_pairs: Set[Tuple[UUID, UUID]] = {tuple(row) for row in existing_pairs_result.all()}
+        planned_rows = []
+        for row in plan.new_relationships:
+            pair = (row["from_recipient_id"], row["to_recipient_id"])
+            if pair not in existing_pairs:
+                existing_pairs.add(pair)
+                planned_rows.append(row)
+        plan.new_relationships = planned_rows
+
+    # Phase 3: writes (one statement per table)
+    created_recipients: Dict[UUID, Recipient] = {}
+    if plan.new_recipients:
+        inserted = await db.scalars(insert(Recipient).returning(Recipient), plan.new_recipients)
+        created_recipients = {r.id: r for r in inserted.all()}
+        result.created_recipient_ids = [str(r_id) for r_id in created_recipients]
+        logger.info("Created %d recipients for user %s", len(created_recipients), user_id)
+
+    for recipient_id, updates in plan.recipient_updates.items():
+        recipient = existing_by_id[recipient_id]
+        for attr, value in updates.items():
+            setattr(recipient, attr, value)
+    if plan.recipient_updates:
+        await db.flush()
+        result.updated_recipient_ids = [str(r_id) for r_id in plan.recipient_updates]
+        logger.info("Updated recipients %s", result.updated_recipient_ids)
+
+    created_occasions: Dict[UUID, Occasion] = {}
+    if plan.new_occasions:
+        inserted = await db.scalars(insert(Occasion).returning(Occasion), plan.new_occasions)
+        created_occasions = {o.id: o for o in inserted.all()}
+        result.created_occasion_ids = [str(o_id) for o_id in created_occasions]
+        logger.info("Created occasions %s", result.created_occasion_ids)
+
+    if plan.new_relationships:
+        inserted_ids = await db.scalars(
+            insert(RecipientRelationship).returning(RecipientRelationship.id),
+            plan.new_relationships
+        )
+        result.created_relationship_ids = [str(r_id) for r_id in inserted_ids.all()]
+        logger.info("Created %d relationships", len(result.created_relationship_ids))
+
+    if plan.delete_ids:
+        # Occasions, gift ideas and relationships cascade at the database level
+        await db.execute(
+            delete(Recipient)
+            .where(Recipient.user_id == user_id, Recipient.id.in_(plan.delete_ids))
+            .execution_options(synchronize_session=False)
+        )
+        for recipient_id in plan.delete_ids:
+            if recipient_id in existing_by_id:
+                db.expunge(existing_by_id[recipient_id])
+        result.deleted_recipient_ids = [str(r_id) for r_id in plan.delete_ids]
+        logger.info("Deleted recipients %s for user %s", result.deleted_recipient_ids, user_id)
+
+    if address_jobs:
+        await enqueue_jobs(db, address_jobs, rearm_finished=True)
+        result.queued_jobs = len(address_jobs)
+        logger.info("Queued address validation for %d recipients", len(address_jobs))
+
+    if plan.summary_recipient_id is not None:
+        summary = created_recipients.get(plan.summary_recipient_id) or existing_by_id.get(plan.summary_recipient_id)
+        if summary is not None and plan.summary_recipient_id not in plan.delete_ids:
+            result.recipient = recipient_to_dict(summary)
+    if plan.summary_occasion_id is not None and plan.summary_occasion_id in created_occasions:
+        result.occasion = occasion_to_dict(created_occasions[plan.summary_occasion_id])
+
+    return result
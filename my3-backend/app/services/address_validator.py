@@ -1,16 +1,213 @@
 """
 Address validation service using Google Maps Geocoding API or SmartyStreets API.
 Handles validation gracefully - always returns a result, never blocks recipient creation.
+
+Definitive provider answers (validated / not found) are cached under a hash of the
+normalized address: an in-process LRU in front of the address_validations table,
+so repeat validations across workers and restarts don't call the provider again.
+Concurrent lookups of the same address share one in-flight request, and provider
+calls reuse one pooled HTTP client per event loop. Timeouts and provider errors
+are never cached.
 """
+import asyncio
+import copy
+import hashlib
 import logging
 import json
-from typing import Optional, Dict, Any
+import re
+import threading
+import time
+import weakref
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+from typing import Optional, Dict, Any, Tuple
+from uuid import UUID
 import httpx
+from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from app.config import settings
+from app.database.connection import AsyncSessionLocal
+from app.database.models import AddressValidation
+from app.services.job_queue import job_handler
 
 logger = logging.getLogger(__name__)
 
 
+def normalize_address_key(
+    street: Optional[str],
+    city: Optional[str],
+    state: Optional[str] = None,
+    postal_code: Optional[str] = None,
+    country: Optional[str] = None
+) -> str:
+    """
+    Stable cache key for an address: case, punctuation and whitespace are ignored,
+    and the configured providers are included so enabling one doesn't reuse old misses.
+    """
+    parts = []
+    for value in (street, city, state, postal_code, country):
+        text = re.sub(r"[^\w\s]", " ", (value or "").lower())
+        parts.append(" ".join(text.split()))
+    providers = [name for name, key in (("google", settings.google_maps_api_key), ("smarty", settings.smartystreets_api_key)) if key]
+    raw = "|".join(parts) + "#" + ",".join(providers)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def _is_cacheable(result: Dict[str, Any]) -> bool:
+    """
+    Only cache definitive answers: a validated address or a provider's "no such
+    address" (Google ZERO_RESULTS, SmartyStreets' empty list). Timeouts, HTTP
+    errors, quota/key statuses and missing services are left for a retry.
+    """
+    return bool(result.get("validated")) or (result.get("error") or "").startswith("Address not found")
+
+
+class AddressResultCache:
+    """In-process LRU of validation results; negative results expire sooner."""
+
+    def __init__(self, max_entries: int = 5000, ttl_seconds: float = 30 * 86400, negative_ttl_seconds: float = 86400):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.negative_ttl_seconds = negative_ttl_seconds
+        self._entries: "OrderedDict[str, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def ttl_for(self, result: Dict[str, Any]) -> float:
+        return self.ttl_seconds if result.get("validated") else self.negative_ttl_seconds
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or time.monotonic() > entry[0]:
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return copy.deepcopy(entry[1])
+
+    def put(self, key: str, result: Dict[str, Any], ttl_seconds: Optional[float] = None) -> None:
+        ttl = self.ttl_for(result) if ttl_seconds is None else ttl_seconds
+        with self._lock:
+            self._entries[key] = (time.monotonic() + ttl, copy.deepcopy(result))
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+address_result_cache = AddressResultCache(
+    max_entries=settings.address_cache_size,
+    ttl_seconds=settings.address_cache_ttl_days * 86400,
+    negative_ttl_seconds=settings.address_cache_negative_ttl_hours * 3600
+)
+
+# Single-flight: one provider lookup per address at a time, shared by concurrent callers
+_inflight: Dict[str, "asyncio.Future"] = {}
+
+# One pooled client per event loop: pooled connections cannot cross loops
+_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, httpx.AsyncClient]" = weakref.WeakKeyDictionary()
+_clients_lock = threading.Lock()
+
+
+def get_address_client() -> httpx.AsyncClient:
+    """Get the pooled provider HTTP client for the running event loop."""
+    loop = asyncio.get_running_loop()
+    with _clients_lock:
+        client = _clients.get(loop)
+        if client is None:
+            client = httpx.AsyncClient(
+                timeout=httpx.Timeout(settings.address_validation_timeout_seconds),
+                limits=httpx.Limits(max_connections=20, max_keepalive_connections=10),
+            )
+            _clients[loop] = client
+        return client
+
+
+async def close_address_clients() -> None:
+    """Close the pooled provider client for the running event loop (app shutdown)."""
+    loop = asyncio.get_running_loop()
+    with _clients_lock:
+        client = _clients.pop(loop, None)
+    if client is not None:
+        await client.aclose()
+
+
+async def _load_cached_result(key: str) -> Optional[Tuple[Dict[str, Any], float]]:
+    """Read a non-expired row from address_validations; returns (result, seconds left)."""
+    try:
+        async with AsyncSessionLocal() as session:
+            row = (await session.execute(
+                select(AddressValidation).where(AddressValidation.address_key == key)
+            )).scalar_one_or_none()
+    except Exception as e:
+        logger.warning("Address cache lookup failed: %s", e)
+        return None
+    if row is None:
+        return None
+    remaining = (row.expires_at - datetime.now(timezone.utc)).total_seconds()
+    if remaining <= 0:
+        return None
+    return {
+        "validated": row.validated,
+        "normalized_address": json.loads(row.normalized_address) if row.normalized_address else None,
+        "status": row.status,
+        "error": row.error
+    }, remaining
+
+
+async def _store_cached_result(key: str, result: Dict[str, Any], ttl_seconds: float) -> None:
+    """Upsert a provider result into address_validations (best effort)."""
+    values = {
+        "address_key": key,
+        "validated": bool(result.get("validated")),
+        "status": result.get("status") or "unvalidated",
+        "normalized_address": json.dumps(result["normalized_address"]) if result.get("normalized_address") else None,
+        "error": result.get("error"),
+        "expires_at": datetime.now(timezone.utc) + timedelta(seconds=ttl_seconds),
+    }
+    statement = pg_insert(AddressValidation).values(**values)
+    statement = statement.on_conflict_do_update(
+        index_elements=[AddressValidation.address_key],
+        set_={name: statement.excluded[name] for name in values if name != "address_key"}
+    )
+    try:
+        async with AsyncSessionLocal() as session:
+            await session.execute(statement)
+            await session.commit()
+    except Exception as e:
+        logger.warning("Address cache write failed: %s", e)
+
+
+async def _lookup_and_cache(
+    key: str,
+    street: str,
+    city: str,
+    state: Optional[str],
+    postal_code: Optional[str],
+    country: Optional[str]
+) -> Dict[str, Any]:
+    """Persistent cache, then providers; stores definitive answers in both cache layers."""
+    stored = await _load_cached_result(key)
+    if stored is not None:
+        result, remaining = stored
+        address_result_cache.put(key, result, ttl_seconds=remaining)
+        return result
+    
+    result = await _validate_uncached(street, city, state, postal_code, country)
+    if _is_cacheable(result):
+        ttl = address_result_cache.ttl_for(result)
+        address_result_cache.put(key, result, ttl_seconds=ttl)
+        await _store_cached_result(key, result, ttl)
+    return result
+
+
 async def validate_address(
     street: Optional[str] = None,
     city: Optional[str] = None,
@@ -52,12 +249,46 @@ async def validate_address(
             "error": "Missing required fields"
         }
     
+    key = normalize_address_key(street, city, state, postal_code, country)
+    cached = address_result_cache.get(key)
+    if cached is not None:
+        logger.info("Address validation served from cache")
+        return cached
+    
+    # Join an identical lookup that is already running instead of calling the provider again
+    loop = asyncio.get_running_loop()
+    future = _inflight.get(key)
+    if future is None or future.get_loop() is not loop:
+        future = asyncio.ensure_future(_lookup_and_cache(key, street, city, state, postal_code, country))
+        _inflight[key] = future
+        future.add_done_callback(lambda done, key=key: _inflight.pop(key, None) if _inflight.get(key) is done else None)
+    try:
+        result = await asyncio.shield(future)
+    except Exception as e:
+        logger.warning("Address validation failed: %s", e)
+        return {
+            "validated": False,
+            "normalized_address": None,
+            "status": "unvalidated",
+            "error": str(e)
+        }
+    return copy.deepcopy(result)
+
+
+async def _validate_uncached(
+    street: str,
+    city: str,
+    state: Optional[str] = None,
+    postal_code: Optional[str] = None,
+    country: Optional[str] = None
+) -> Dict[str, Any]:
+    """Ask the configured providers, Google Maps first, then SmartyStreets."""
     # Try Google Maps API first if available
     if settings.google_maps_api_key:
         try:
             return await _validate_with_google_maps(street, city, state, postal_code, country)
         except Exception as e:
-            logger.warning(f"Google Maps validation failed: {e}")
+            logger.warning("Google Maps validation failed: %s", e)
             # Fall through to return unvalidated
     
     # Try SmartyStreets API if available
@@ -65,7 +296,7 @@ async def validate_address(
         try:
             return await _validate_with_smartystreets(street, city, state, postal_code, country)
         except Exception as e:
-            logger.warning(f"SmartyStreets validation failed: {e}")
+            logger.warning("SmartyStreets validation failed: %s", e)
             # Fall through to return unvalidated
     
     # No validation service available or all failed
@@ -104,58 +335,68 @@ async def _validate_with_google_maps(
     }
     
     try:
-        async with httpx.AsyncClient(timeout=10.0) as client:
-            response = await client.get(url, params=params)
-            response.raise_for_status()
-            data = response.json()
+        client = get_address_client()
+        response = await client.get(url, params=params)
+        response.raise_for_status()
+        data = response.json()
+        
+        if data.get("status") == "OK" and data.get("results"):
+            # Get the first result (most likely match)
+            result = data["results"][0]
+            address_components = result.get("address_components", [])
+            
+            # Extract normalized address components
+            normalized = {
+                "formatted_address": result.get("formatted_address", ""),
+                "street_number": "",
+                "route": "",
+                "locality": "",
+                "administrative_area_level_1": "",
+                "postal_code": "",
+                "country": ""
+            }
             
-            if data.get("status") == "OK" and data.get("results"):
-                # Get the first result (most likely match)
-                result = data["results"][0]
-                address_components = result.get("address_components", [])
-                
-                # Extract normalized address components
-                normalized = {
-                    "formatted_address": result.get("formatted_address", ""),
-                    "street_number": "",
-                    "route": "",
-                    "locality": "",
-                    "administrative_area_level_1": "",
-                    "postal_code": "",
-                    "country": ""
-                }
-                
-                for component in address_components:
-                    types = component.get("types", [])
-                    if "street_number" in types:
-                        normalized["street_number"] = component.get("long_name", "")
-                    elif "route" in types:
-                        normalized["route"] = component.get("long_name", "")
-                    elif "locality" in types or "sublocality" in types:
-                        normalized["locality"] = component.get("long_name", "")
-                    elif "administrative_area_level_1" in types:
-                        normalized["administrative_area_level_1"] = component.get("short_name", "")
-                    elif "postal_code" in types:
-                        normalized["postal_code"] = component.get("long_name", "")
-                    elif "country" in types:
-                        normalized["country"] = component.get("short_name", "")
-                
-                logger.info(f"Address validated successfully: {normalized['formatted_address']}")
-                return {
-                    "validated": True,
-                    "normalized_address": normalized,
-                    "status": "validated",
-                    "error": None
-                }
-            else:
-                # API returned but address not found
-                logger.info(f"Google Maps API returned status: {data.get('status')}")
-                return {
-                    "validated": False,
-                    "normalized_address": None,
-                    "status": "unvalidated",
-                    "error": f"Address not found: {data.get('status')}"
-                }
+            for component in address_components:
+                types = component.get("types", [])
+                if "street_number" in types:
+                    normalized["street_number"] = component.get("long_name", "")
+                elif "route" in types:
+                    normalized["route"] = component.get("long_name", "")
+                elif "locality" in types or "sublocality" in types:
+                    normalized["locality"] = component.get("long_name", "")
+                elif "administrative_area_level_1" in types:
+                    normalized["administrative_area_level_1"] = component.get("short_name", "")
+                elif "postal_code" in types:
+                    normalized["postal_code"] = component.get("long_name", "")
+                elif "country" in types:
+                    normalized["country"] = component.get("short_name", "")
+            
+            logger.info("Address validated successfully with Google Maps")
+            return {
+                "validated": True,
+                "normalized_address": normalized,
+                "status": "validated",
+                "error": None
+            }
+        elif data.get("status") in ("OK", "ZERO_RESULTS"):
+            # API returned but address not found
+            logger.info("Google Maps API returned status: %s", data.get("status"))
+            return {
+                "validated": False,
+                "normalized_address": None,
+                "status": "unvalidated",
+                "error": "Address not found: ZERO_RESULTS"
+            }
+        else:
+            # Quota, key or server problem (OVER_QUERY_LIMIT, REQUEST_DENIED,
+            # INVALID_REQUEST, UNKNOWN_ERROR): not an answer about the address
+            logger.warning("Google Maps API returned status: %s", data.get("status"))
+            return {
+                "validated": False,
+                "normalized_address": None,
+                "status": "unvalidated",
+                "error": f"Google Maps API error: {data.get('status')}"
+            }
     
     except httpx.TimeoutException:
         logger.warning("Google Maps API timeout")
@@ -166,7 +407,7 @@ async def _validate_with_google_maps(
             "error": "Validation timeout"
         }
     except httpx.HTTPStatusError as e:
-        logger.warning(f"Google Maps API HTTP error: {e}")
+        logger.warning("Google Maps API HTTP error: %s", e)
         return {
             "validated": False,
             "normalized_address": None,
@@ -174,7 +415,7 @@ async def _validate_with_google_maps(
             "error": f"HTTP error: {e.response.status_code}"
         }
     except Exception as e:
-        logger.error(f"Google Maps validation error: {e}", exc_info=True)
+        logger.error("Google Maps validation error: %s", e, exc_info=True)
         return {
             "validated": False,
             "normalized_address": None,
@@ -212,42 +453,42 @@ async def _validate_with_smartystreets(
     }
     
     try:
-        async with httpx.AsyncClient(timeout=10.0) as client:
-            response = await client.get(url, params=params)
-            response.raise_for_status()
-            data = response.json()
+        client = get_address_client()
+        response = await client.get(url, params=params)
+        response.raise_for_status()
+        data = response.json()
+        
+        if data and isinstance(data, list) and len(data) > 0:
+            # Get the first result
+            result = data[0]
+            components = result.get("components", {})
+            metadata = result.get("metadata", {})
+            
+            normalized = {
+                "formatted_address": result.get("delivery_line_1", ""),
+                "street_number": components.get("primary_number", ""),
+                "route": components.get("street_name", ""),
+                "locality": components.get("city_name", ""),
+                "administrative_area_level_1": components.get("state_abbreviation", ""),
+                "postal_code": components.get("zipcode", ""),
+                "country": "US"
+            }
             
-            if data and isinstance(data, list) and len(data) > 0:
-                # Get the first result
-                result = data[0]
-                components = result.get("components", {})
-                metadata = result.get("metadata", {})
-                
-                normalized = {
-                    "formatted_address": result.get("delivery_line_1", ""),
-                    "street_number": components.get("primary_number", ""),
-                    "route": components.get("street_name", ""),
-                    "locality": components.get("city_name", ""),
-                    "administrative_area_level_1": components.get("state_abbreviation", ""),
-                    "postal_code": components.get("zipcode", ""),
-                    "country": "US"
-                }
-                
-                logger.info(f"Address validated successfully with SmartyStreets")
-                return {
-                    "validated": True,
-                    "normalized_address": normalized,
-                    "status": "validated",
-                    "error": None
-                }
-            else:
-                logger.info("SmartyStreets API returned no results")
-                return {
-                    "validated": False,
-                    "normalized_address": None,
-                    "status": "unvalidated",
-                    "error": "Address not found"
-                }
+            logger.info("Address validated successfully with SmartyStreets")
+            return {
+                "validated": True,
+                "normalized_address": normalized,
+                "status": "validated",
+                "error": None
+            }
+        else:
+            logger.info("SmartyStreets API returned no results")
+            return {
+                "validated": False,
+                "normalized_address": None,
+                "status": "unvalidated",
+                "error": "Address not found"
+            }
     
     except httpx.TimeoutException:
         logger.warning("SmartyStreets API timeout")
@@ -258,7 +499,7 @@ async def _validate_with_smartystreets(
             "error": "Validation timeout"
         }
     except httpx.HTTPStatusError as e:
-        logger.warning(f"SmartyStreets API HTTP error: {e}")
+        logger.warning("SmartyStreets API HTTP error: %s", e)
         return {
             "validated": False,
             "normalized_address": None,
@@ -266,7 +507,7 @@ async def _validate_with_smartystreets(
             "error": f"HTTP error: {e.response.status_code}"
         }
     except Exception as e:
-        logger.error(f"SmartyStreets validation error: {e}", exc_info=True)
+        logger.error("SmartyStreets validation error: %s", e, exc_info=True)
         return {
             "validated": False,
             "normalized_address": None,
@@ -274,3 +515,61 @@ async def _validate_with_smartystreets(
             "error": str(e)
         }
 
+
+# Background validation (runs on the job queue, off the request path)
+
+def recipient_address_key(recipient) -> str:
+    """normalize_address_key of a recipient's current address fields."""
+    return normalize_address_key(
+        recipient.street_address, recipient.city, recipient.state_province, recipient.postal_code, recipient.country
+    )
+
+
+def address_job(recipient_id, street, city, state=None, postal_code=None, country=None, clear_on_failure: bool = False) -> dict:
+    """
+    Job spec for enqueue_jobs(..., rearm_finished=True). The key includes the address,
+    so a changed address gets its own job while a pending one isn't queued twice.
+    Changing back to an address validated before re-arms its finished job.
+    """
+    address_key = normalize_address_key(street, city, state, postal_code, country)
+    return {
+        "kind": "validate_address",
+        "job_key": f"validate_address:{recipient_id}:{address_key}",
+        "payload": {
+            "recipient_id": str(recipient_id),
+            "address_key": address_key,
+            "clear_on_failure": clear_on_failure
+        }
+    }
+
+
+@job_handler("validate_address")
+async def validate_recipient_address_job(session, payload: dict) -> None:
+    """Validate a recipient's address and store the result on the recipient."""
+    from app.database.models import Recipient
+    from app.services.user_context import invalidate_user_context
+    
+    recipient = await session.get(Recipient, UUID(payload["recipient_id"]))
+    if recipient is None:
+        logger.info("Skipping address validation: recipient %s no longer exists", payload["recipient_id"])
+        return
+    address = (recipient.street_address, recipient.city, recipient.state_province, recipient.postal_code, recipient.country)
+    if recipient_address_key(recipient) != payload["address_key"]:
+        # Address changed since the job was queued; the newer job handles it
+        logger.info("Skipping stale address validation for recipient %s", recipient.id)
+        return
+    
+    result = await validate_address(*address)
+    providers_configured = settings.enable_address_validation and (settings.google_maps_api_key or settings.smartystreets_api_key)
+    if providers_configured and not _is_cacheable(result) and not payload.get("_final_attempt"):
+        # Provider timeout or error: let the queue retry with backoff
+        raise RuntimeError(f"Address validation incomplete: {result.get('error')}")
+    
+    recipient.address_validation_status = result.get("status", "unvalidated")
+    if result.get("normalized_address"):
+        recipient.validated_address_json = json.dumps(result["normalized_address"])
+    elif payload.get("clear_on_failure"):
+        recipient.validated_address_json = None
+    await session.commit()
+    invalidate_user_context(recipient.user_id)
+    logger.info("Address validation for recipient %s: %s", recipient.id, recipient.address_validation_status)
@@ -0,0 +1,146 @@
+"""
+Cache of verified access tokens for get_current_user.
+
+Maps a SHA-256 hash of the bearer token to a lightweight CurrentUser principal so
+authenticated requests skip the JWT decode and the users lookup. Entries expire no
+later than the token itself (and at most after a configured TTL). Deleting a user
+through the ORM invalidates all of that user's cached tokens; per-user version
+stamps stop a lookup that raced with the delete from caching a stale principal.
+"""
+import hashlib
+import logging
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Dict, Optional, Set, Tuple, Union
+from uuid import UUID
+
+from sqlalchemy import event
+
+from app.config import settings
+from app.database.models import User
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class CurrentUser:
+    """Authenticated user principal (the fields routes need, without an ORM instance)."""
+    id: UUID
+    email: str
+    name: str
+
+
+def hash_token(token: str) -> str:
+    """Cache key for a bearer token (raw tokens are never stored)."""
+    return hashlib.sha256(token.encode("utf-8")).hexdigest()
+
+
+class TokenCache:
+    """
+    Bounded LRU of token hash -> CurrentUser with per-entry expiry.
+
+    Versions come from one counter and are kept for at most max_entries recently
+    invalidated users. A user whose version was dropped falls back to the highest
+    version ever dropped, which is newer than any version read before that user's
+    invalidation.
+    """
+
+    def __init__(self, max_entries: int = 10000, ttl_seconds: float = 300):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[str, Tuple[CurrentUser, float]]" = OrderedDict()
+        self._tokens_by_user: Dict[str, Set[str]] = {}
+        self._versions: "OrderedDict[str, int]" = OrderedDict()
+        self._clock = 0
+        self._evicted_version = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _version(self, user_id: str) -> int:
+        return self._versions.get(user_id, self._evicted_version)
+
+    def version(self, user_id: str) -> int:
+        """Current invalidation version for a user."""
+        with self._lock:
+            return self._version(user_id)
+
+    def get(self, token_key: str) -> Optional[CurrentUser]:
+        """Return the cached principal, or None on miss/expired entry."""
+        with self._lock:
+            entry = self._entries.get(token_key)
+            if entry is None or time.time() >= entry[1]:
+                if entry is not None:
+                    self._remove(token_key)
+                self.misses += 1
+                return None
+            self._entries.move_to_end(token_key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, token_key: str, principal: CurrentUser, version: int, token_exp: Optional[float] = None) -> bool:
+        """
+        Cache a principal until the token expires (capped by the TTL).
+        Returns False when the user was invalidated after `version` was read.
+        """
+        expires_at = time.time() + self.ttl_seconds
+        if token_exp is not None:
+            expires_at = min(expires_at, float(token_exp))
+        user_id = str(principal.id)
+        with self._lock:
+            if version != self._version(user_id):
+                return False
+            self._entries[token_key] = (principal, expires_at)
+            self._entries.move_to_end(token_key)
+            self._tokens_by_user.setdefault(user_id, set()).add(token_key)
+            while len(self._entries) > self.max_entries:
+                oldest_key = next(iter(self._entries))
+                self._remove(oldest_key)
+            return True
+
+    def invalidate_user(self, user_id: str) -> None:
+        """Drop every cached token for a user and bump their version."""
+        with self._lock:
+            self._clock += 1
+            self._versions[user_id] = self._clock
+            self._versions.move_to_end(user_id)
+            while len(self._versions) > self.max_entries:
+                _, evicted = self._versions.popitem(last=False)
+                self._evicted_version = max(self._evicted_version, evicted)
+            for token_key in self._tokens_by_user.pop(user_id, set()):
+                self._entries.pop(token_key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._tokens_by_user.clear()
+
+    def _remove(self, token_key: str) -> None:
+        # Caller holds the lock
+        principal, _ = self._entries.pop(token_key)
+        user_id = str(principal.id)
+        tokens = self._tokens_by_user.get(user_id)
+        if tokens is not None:
+            tokens.discard(token_key)
+            if not tokens:
+                del self._tokens_by_user[user_id]
+
+
+token_cache = TokenCache(
+    max_entries=settings.auth_cache_size,
+    ttl_seconds=settings.auth_cache_ttl_seconds
+)
+
+
+def invalidate_user_tokens(user_id: Union[UUID, str]) -> None:
+    """Invalidate cached tokens after a user is deleted (or must be logged out)."""
+    token_cache.invalidate_user(str(user_id))
+
+
+@event.listens_for(User, "after_delete")
+def _invalidate_deleted_user(mapper, connection, target) -> None:
+    # ORM deletes only; bulk DELETE statements must call invalidate_user_tokens()
+    logger.info("User %s deleted; invalidating cached tokens", target.id)
+    invalidate_user_tokens(target.id)
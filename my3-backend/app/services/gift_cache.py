@@ -0,0 +1,107 @@
+"""
+Result cache for generate_gifts_node.
+
+Gift ideas are cached under a SHA-256 of the normalized recipient context that the
+prompt is built from (name, relationship, age band, interests, constraints, and the
+partner's profile for anniversary gifts), together with the model and system prompt.
+Re-asking for the same person, or refreshing, returns the stored ideas without an
+LLM call. Entries expire after a TTL and the cache is LRU-bounded; a regenerate
+request bypasses the lookup and replaces the stored entry.
+"""
+import copy
+import hashlib
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import List, Optional, Tuple
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+def _normalize_text(value) -> Optional[str]:
+    text = " ".join(str(value).lower().split()) if value else ""
+    return text or None
+
+
+def _normalize_list(values) -> List[str]:
+    """Lowercased, de-duplicated and sorted, so ordering and case don't change the key."""
+    return sorted({text for text in (_normalize_text(v) for v in values or []) if text})
+
+
+def _normalize_profile(info: Optional[dict]) -> Optional[dict]:
+    if not info:
+        return None
+    return {
+        "name": _normalize_text(info.get("name")),
+        "relationship": _normalize_text(info.get("relationship")),
+        "age_band": _normalize_text(info.get("age_band")),
+        "interests": _normalize_list(info.get("interests")),
+        "constraints": _normalize_list(info.get("constraints")),
+    }
+
+
+def gift_cache_key(recipient_info: dict, partner_info: Optional[dict], system_prompt: str, model: Optional[str] = None) -> str:
+    """Stable hash of everything that shapes the gift-generation prompt."""
+    payload = {
+        "model": model or settings.openai_model,
+        "prompt": hashlib.sha256(system_prompt.encode("utf-8")).hexdigest(),
+        "recipient": _normalize_profile(recipient_info),
+        "partner": _normalize_profile(partner_info),
+    }
+    encoded = json.dumps(payload, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+
+class GiftIdeaCache:
+    """LRU cache of generated gift-idea lists with a TTL."""
+
+    def __init__(self, max_entries: int = 2000, ttl_seconds: float = 3600):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[str, Tuple[float, List[dict]]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: str) -> Optional[List[dict]]:
+        """Return a copy of the cached gift ideas, or None on miss/expired entry."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or time.monotonic() - entry[0] > self.ttl_seconds:
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            gift_ideas = entry[1]
+        # Callers enrich the dicts in place (e.g. image URLs); never hand out the stored ones
+        return copy.deepcopy(gift_ideas)
+
+    def put(self, key: str, gift_ideas: List[dict]) -> None:
+        """Store gift ideas, evicting the least recently used entries."""
+        if self.max_entries <= 0 or not gift_ideas:
+            return
+        stored = copy.deepcopy(gift_ideas)
+        with self._lock:
+            self._entries[key] = (time.monotonic(), stored)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+gift_idea_cache = GiftIdeaCache(
+    max_entries=settings.gift_cache_size,
+    ttl_seconds=settings.gift_cache_ttl_seconds
+)
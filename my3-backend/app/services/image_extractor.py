@@ -1,97 +1,238 @@
 """
 Service for extracting product images from URLs.
 Supports Open Graph image extraction and fallback strategies.
+
+Pages are fetched with one pooled httpx client per event loop, with a per-host
+concurrency limit, and only the document head (up to </head>, capped at
+image_head_max_bytes) is downloaded and parsed. Results are kept in a URL -> image
+cache; pages without an image are cached too (for a shorter TTL) so they aren't
+refetched. enrich_gift_images() resolves all gift ideas concurrently under one
+overall deadline.
 """
+import asyncio
 import logging
-from typing import Optional
+import threading
+import time
+import weakref
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
 import httpx
 from bs4 import BeautifulSoup
 from urllib.parse import urljoin, urlparse
 
+from app.config import settings
+
 logger = logging.getLogger(__name__)
 
+USER_AGENT = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
+HEAD_END = b'</head'
+
+
+class ImageURLCache:
+    """LRU cache of page URL -> image URL, with a shorter TTL for pages without one."""
+
+    def __init__(self, max_entries: int = 5000, ttl_seconds: float = 86400, negative_ttl_seconds: float = 3600):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.negative_ttl_seconds = negative_ttl_seconds
+        self._entries: "OrderedDict[str, Tuple[float, Optional[str]]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, url: str) -> Tuple[bool, Optional[str]]:
+        """Return (found, image_url); image_url is None for a cached negative result."""
+        with self._lock:
+            entry = self._entries.get(url)
+            if entry is not None:
+                stored_at, image_url = entry
+                ttl = self.ttl_seconds if image_url else self.negative_ttl_seconds
+                if time.monotonic() - stored_at <= ttl:
+                    self._entries.move_to_end(url)
+                    self.hits += 1
+                    return True, image_url
+                del self._entries[url]
+            self.misses += 1
+            return False, None
+
+    def put(self, url: str, image_url: Optional[str]) -> None:
+        with self._lock:
+            self._entries[url] = (time.monotonic(), image_url)
+            self._entries.move_to_end(url)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+image_url_cache = ImageURLCache(
+    max_entries=settings.image_cache_size,
+    ttl_seconds=settings.image_cache_ttl_seconds,
+    negative_ttl_seconds=settings.image_cache_negative_ttl_seconds
+)
+
+
+class ImageFetcher:
+    """Pooled HTTP client plus per-host semaphores for one event loop."""
+
+    def __init__(self):
+        self.client = httpx.AsyncClient(
+            timeout=httpx.Timeout(settings.image_fetch_timeout_seconds),
+            limits=httpx.Limits(
+                max_connections=settings.image_fetch_max_connections,
+                max_keepalive_connections=settings.image_fetch_max_connections,
+            ),
+            follow_redirects=True,
+            headers={'User-Agent': USER_AGENT},
+        )
+        self._host_limits: Dict[str, asyncio.Semaphore] = {}
+
+    def host_limit(self, host: str) -> asyncio.Semaphore:
+        semaphore = self._host_limits.get(host)
+        if semaphore is None:
+            semaphore = asyncio.Semaphore(settings.image_fetch_per_host)
+            self._host_limits[host] = semaphore
+        return semaphore
+
+    async def fetch_head(self, url: str, max_bytes: int) -> Optional[str]:
+        """Download the page only up to </head> (or max_bytes) and return it as text."""
+        async with self.host_limit(urlparse(url).netloc.lower()):
+            async with self.client.stream('GET', url) as response:
+                response.raise_for_status()
+                content_type = response.headers.get('content-type', '')
+                if content_type and 'html' not in content_type.lower():
+                    return None
+                buffer = bytearray()
+                async for chunk in response.aiter_bytes():
+                    # Re-scan the tail of the previous chunk in case the tag was split
+                    search_from = max(0, len(buffer) - len(HEAD_END))
+                    buffer.extend(chunk)
+                    if buffer.lower().find(HEAD_END, search_from) != -1 or len(buffer) >= max_bytes:
+                        break
+                return bytes(buffer[:max_bytes]).decode(response.encoding or 'utf-8', errors='replace')
+
+    async def aclose(self) -> None:
+        await self.client.aclose()
+
+
+# One fetcher per event loop: pooled connections and semaphores cannot cross loops
+_fetchers: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, ImageFetcher]" = weakref.WeakKeyDictionary()
+_fetchers_lock = threading.Lock()
+
+
+def get_image_fetcher() -> ImageFetcher:
+    """Get the image fetcher for the running event loop."""
+    loop = asyncio.get_running_loop()
+    with _fetchers_lock:
+        fetcher = _fetchers.get(loop)
+        if fetcher is None:
+            fetcher = ImageFetcher()
+            _fetchers[loop] = fetcher
+        return fetcher
+
+
+async def close_image_clients() -> None:
+    """Close pooled image-fetch connections for the running event loop (app shutdown)."""
+    loop = asyncio.get_running_loop()
+    with _fetchers_lock:
+        fetcher = _fetchers.pop(loop, None)
+    if fetcher is not None:
+        await fetcher.aclose()
 
-async def extract_og_image(url: str, timeout: float = 5.0) -> Optional[str]:
+
+def find_image_in_html(html: str, url: str) -> Optional[str]:
+    """Pick the best product image from (partial) page HTML."""
+    soup = BeautifulSoup(html, 'lxml')
+    
+    # Try Open Graph image first
+    og_image = soup.find('meta', property='og:image')
+    if og_image and og_image.get('content'):
+        image_url = og_image.get('content')
+        # Make absolute URL if relative
+        if not urlparse(image_url).netloc:
+            image_url = urljoin(url, image_url)
+        logger.info("Found OG image for %s: %s", url, image_url)
+        return image_url
+    
+    # Try Twitter Card image as fallback
+    twitter_image = soup.find('meta', attrs={'name': 'twitter:image'})
+    if twitter_image and twitter_image.get('content'):
+        image_url = twitter_image.get('content')
+        if not urlparse(image_url).netloc:
+            image_url = urljoin(url, image_url)
+        logger.info("Found Twitter image for %s: %s", url, image_url)
+        return image_url
+    
+    # Try to find a large image in what was read of the page
+    # Look for common product image patterns
+    img_tags = soup.find_all('img', src=True)
+    for img in img_tags:
+        src = img.get('src', '')
+        # Skip small images, icons, logos
+        if any(skip in src.lower() for skip in ['icon', 'logo', 'avatar', 'thumb']):
+            continue
+        # Prefer images with product-related classes/ids
+        classes = img.get('class', [])
+        img_id = img.get('id', '')
+        if any(keyword in str(classes).lower() or keyword in img_id.lower()
+               for keyword in ['product', 'main', 'hero', 'featured']):
+            image_url = src
+            if not urlparse(image_url).netloc:
+                image_url = urljoin(url, image_url)
+            logger.info("Found product image for %s: %s", url, image_url)
+            return image_url
+    
+    return None
+
+
+async def extract_og_image(url: str, timeout: Optional[float] = None) -> Optional[str]:
     """
     Extract Open Graph image from a product URL.
     
     Args:
         url: Product page URL
-        timeout: Request timeout in seconds
-        
+        timeout: Optional overall timeout in seconds (the pooled client's
+            per-request timeout always applies)
+    
     Returns:
         Image URL if found, None otherwise
     """
     if not url:
         return None
     
+    # Validate URL
+    parsed = urlparse(url)
+    if parsed.scheme not in ('http', 'https') or not parsed.netloc:
+        logger.warning("Invalid URL format: %s", url)
+        return None
+    
+    found, cached = image_url_cache.get(url)
+    if found:
+        return cached
+    
     try:
-        # Validate URL
-        parsed = urlparse(url)
-        if not parsed.scheme or not parsed.netloc:
-            logger.warning(f"Invalid URL format: {url}")
-            return None
-        
-        # Fetch the page
-        async with httpx.AsyncClient(timeout=timeout, follow_redirects=True) as client:
-            headers = {
-                'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-            }
-            response = await client.get(url, headers=headers)
-            response.raise_for_status()
-            
-            # Parse HTML
-            soup = BeautifulSoup(response.text, 'lxml')
-            
-            # Try Open Graph image first
-            og_image = soup.find('meta', property='og:image')
-            if og_image and og_image.get('content'):
-                image_url = og_image.get('content')
-                # Make absolute URL if relative
-                if not urlparse(image_url).netloc:
-                    image_url = urljoin(url, image_url)
-                logger.info(f"Found OG image for {url}: {image_url}")
-                return image_url
-            
-            # Try Twitter Card image as fallback
-            twitter_image = soup.find('meta', attrs={'name': 'twitter:image'})
-            if twitter_image and twitter_image.get('content'):
-                image_url = twitter_image.get('content')
-                if not urlparse(image_url).netloc:
-                    image_url = urljoin(url, image_url)
-                logger.info(f"Found Twitter image for {url}: {image_url}")
-                return image_url
-            
-            # Try to find a large image in the page
-            # Look for common product image patterns
-            img_tags = soup.find_all('img', src=True)
-            for img in img_tags:
-                src = img.get('src', '')
-                # Skip small images, icons, logos
-                if any(skip in src.lower() for skip in ['icon', 'logo', 'avatar', 'thumb']):
-                    continue
-                # Prefer images with product-related classes/ids
-                classes = img.get('class', [])
-                img_id = img.get('id', '')
-                if any(keyword in str(classes).lower() or keyword in img_id.lower() 
-                       for keyword in ['product', 'main', 'hero', 'featured']):
-                    image_url = src
-                    if not urlparse(image_url).netloc:
-                        image_url = urljoin(url, image_url)
-                    logger.info(f"Found product image for {url}: {image_url}")
-                    return image_url
-            
-            logger.warning(f"No image found for {url}")
-            return None
-            
-    except httpx.TimeoutException:
-        logger.warning(f"Timeout fetching image from {url}")
+        fetch = get_image_fetcher().fetch_head(url, settings.image_head_max_bytes)
+        html = await (asyncio.wait_for(fetch, timeout) if timeout else fetch)
+        image_url = find_image_in_html(html, url) if html else None
+        if not image_url:
+            logger.warning("No image found for %s", url)
+        image_url_cache.put(url, image_url)
+        return image_url
+    
+    except (httpx.TimeoutException, asyncio.TimeoutError):
+        # Not cached: a slow page may answer next time
+        logger.warning("Timeout fetching image from %s", url)
         return None
     except httpx.HTTPError as e:
-        logger.warning(f"HTTP error fetching image from {url}: {e}")
+        logger.warning("HTTP error fetching image from %s: %s", url, e)
+        # Remember pages that don't exist or refuse us; retry transient failures
+        if isinstance(e, httpx.HTTPStatusError) and e.response.status_code < 500:
+            image_url_cache.put(url, None)
         return None
     except Exception as e:
-        logger.error(f"Error extracting image from {url}: {e}", exc_info=True)
+        logger.error("Error extracting image from %s: %s", url, e, exc_info=True)
         return None
 
 
@@ -107,13 +248,13 @@ async def get_product_image(url: Optional[str], image_url: Optional[str] = None)
     Args:
         url: Product page URL
         image_url: Direct image URL (from LLM)
-        
+    
     Returns:
         Image URL if found, None otherwise
     """
     # First priority: Use LLM-provided image URL
     if image_url:
-        logger.info(f"Using LLM-provided image URL: {image_url}")
+        logger.info("Using LLM-provided image URL: %s", image_url)
         return image_url
     
     # Second priority: Extract from product URL
@@ -122,3 +263,33 @@ async def get_product_image(url: Optional[str], image_url: Optional[str] = None)
     
     return None
 
+
+async def enrich_gift_images(gift_ideas: List[dict], deadline: Optional[float] = None) -> List[dict]:
+    """
+    Fill in image_url for gift ideas that have a product url but no image.
+    Each distinct URL is fetched once, all concurrently; whatever hasn't resolved by
+    the deadline is cancelled and left without an image. Mutates and returns gift_ideas.
+    """
+    deadline = settings.image_enrichment_deadline_seconds if deadline is None else deadline
+    pending_urls = {
+        idea['url'] for idea in gift_ideas
+        if idea.get('url') and not idea.get('image_url')
+    }
+    if not pending_urls:
+        return gift_ideas
+    
+    tasks = {url: asyncio.ensure_future(extract_og_image(url)) for url in pending_urls}
+    done, not_done = await asyncio.wait(tasks.values(), timeout=deadline)
+    for task in not_done:
+        task.cancel()
+    if not_done:
+        logger.info("Image enrichment deadline (%ss) hit; %d of %d pages skipped", deadline, len(not_done), len(tasks))
+    
+    resolved = {
+        url: task.result() for url, task in tasks.items()
+        if task in done and not task.cancelled() and task.exception() is None
+    }
+    for idea in gift_ideas:
+        if not idea.get('image_url') and resolved.get(idea.get('url')):
+            idea['image_url'] = resolved[idea['url']]
+    return gift_ideas
@@ -0,0 +1,252 @@
+"""
+Database-backed background job queue with in-process workers.
+
+Jobs are rows in background_jobs, enqueued inside the caller's transaction so they
+commit (or roll back) together with the data they refer to. Each job has an
+idempotency key: enqueueing the same key twice is a no-op, unless the caller asks
+for a finished job to be re-armed. Workers started with the app claim due jobs
+with SELECT ... FOR UPDATE SKIP LOCKED (safe with several workers/processes), run
+the registered handler in their own session, and retry failures with exponential
+backoff until max_attempts. Jobs left "running" by a crashed worker are reclaimed
+once their lease expires.
+"""
+import asyncio
+import json
+import logging
+import random
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import Awaitable, Callable, Dict, List, Optional
+
+from sqlalchemy import and_, insert, or_, select, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.config import settings
+from app.database.connection import AsyncSessionLocal
+from app.database.models import BackgroundJob
+
+logger = logging.getLogger(__name__)
+
+# handler(session, payload); payload["_final_attempt"] is True on the last retry
+JobHandler = Callable[[AsyncSession, dict], Awaitable[None]]
+
+_handlers: Dict[str, JobHandler] = {}
+
+
+def job_handler(kind: str):
+    """Register an async handler(session, payload) for a job kind."""
+    def decorator(func: JobHandler) -> JobHandler:
+        _handlers[kind] = func
+        return func
+    return decorator
+
+
+def _now() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def backoff_seconds(attempts: int, base: Optional[float] = None, cap: Optional[float] = None) -> float:
+    """Exponential backoff with jitter for the given number of attempts so far."""
+    base = settings.job_retry_base_seconds if base is None else base
+    cap = settings.job_retry_max_seconds if cap is None else cap
+    delay = min(cap, base * (2 ** max(0, attempts - 1)))
+    return delay * random.uniform(0.8, 1.2)
+
+
+async def enqueue_job(
+    db: AsyncSession,
+    kind: str,
+    payload: dict,
+    job_key: Optional[str] = None,
+    max_attempts: Optional[int] = None
+) -> None:
+    """
+    Add a job in the caller's transaction (committed with it). A job whose key
+    already exists is left untouched, so retried requests don't duplicate work.
+    """
+    await enqueue_jobs(db, [{"kind": kind, "payload": payload, "job_key": job_key, "max_attempts": max_attempts}])
+
+
+async def enqueue_jobs(db: AsyncSession, jobs: List[dict], rearm_finished: bool = False) -> None:
+    """
+    Add several jobs with one multi-row INSERT ... ON CONFLICT DO NOTHING. With
+    rearm_finished, a key whose job already finished (done or failed) is reset to
+    pending with the new payload instead; pending and running jobs are left alone.
+    """
+    if not jobs:
+        return
+    now = _now()
+    rows = [
+        {
+            "id": uuid.uuid4(),
+            "kind": job["kind"],
+            "job_key": job.get("job_key") or f"{job['kind']}:{uuid.uuid4()}",
+            "payload": json.dumps(job["payload"]),
+            "status": "pending",
+            "attempts": 0,
+            "max_attempts": job.get("max_attempts") or settings.job_max_attempts,
+            "run_after": now,
+        }
+        for job in jobs
+    ]
+    dialect = db.bind.dialect.name if db.bind is not None else "postgresql"
+    if dialect in ("postgresql", "sqlite"):
+        statement = (pg_insert if dialect == "postgresql" else sqlite_insert)(BackgroundJob)
+        if rearm_finished:
+            statement = statement.on_conflict_do_update(
+                index_elements=["job_key"],
+                set_={
+                    "payload": statement.excluded.payload,
+                    "status": "pending",
+                    "attempts": 0,
+                    "max_attempts": statement.excluded.max_attempts,
+                    "run_after": statement.excluded.run_after,
+                    "locked_at": None,
+                    "last_error": None,
+                },
+                where=BackgroundJob.status.in_(("done", "failed"))
+            )
+        else:
+            statement = statement.on_conflict_do_nothing(index_elements=["job_key"])
+    else:
+        statement = insert(BackgroundJob)
+    await db.execute(statement, rows)
+
+
+class JobRunner:
+    """Pool of worker tasks draining background_jobs in this process."""
+
+    def __init__(
+        self,
+        session_factory: async_sessionmaker = AsyncSessionLocal,
+        workers: int = 2,
+        poll_interval: float = 5.0,
+        lease_seconds: float = 300.0
+    ):
+        self.session_factory = session_factory
+        self.workers = workers
+        self.poll_interval = poll_interval
+        self.lease_seconds = lease_seconds
+        self._tasks: List[asyncio.Task] = []
+        self._wakeup: Optional[asyncio.Event] = None
+        self._stopping = False
+        self.completed = 0
+        self.retried = 0
+        self.failed = 0
+
+    def start(self) -> None:
+        """Start the worker tasks on the running event loop."""
+        if self._tasks:
+            return
+        self._stopping = False
+        self._wakeup = asyncio.Event()
+        self._tasks = [asyncio.create_task(self._worker(i)) for i in range(self.workers)]
+        logger.info("Started %s background job workers", self.workers)
+
+    async def stop(self) -> None:
+        """Stop the workers; a job interrupted mid-run is reclaimed after its lease."""
+        self._stopping = True
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def notify(self) -> None:
+        """Wake idle workers after new jobs were committed (instead of waiting for the poll)."""
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    async def _worker(self, number: int) -> None:
+        while not self._stopping:
+            try:
+                ran = await self.run_once()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error("Background job worker %s error: %s", number, e, exc_info=True)
+                ran = False
+            if not ran:
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=self.poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+
+    async def _claim(self) -> Optional[dict]:
+        """Atomically mark one due job as running and return it."""
+        now = _now()
+        due = (
+            select(BackgroundJob.id)
+            .where(or_(
+                and_(BackgroundJob.status == "pending", BackgroundJob.run_after <= now),
+                and_(BackgroundJob.status == "running", BackgroundJob.locked_at < now - timedelta(seconds=self.lease_seconds)),
+            ))
+            .order_by(BackgroundJob.run_after)
+            .limit(1)
+            .with_for_update(skip_locked=True)
+            .scalar_subquery()
+        )
+        async with self.session_factory() as session:
+            row = (await session.execute(
+                update(BackgroundJob)
+                .where(BackgroundJob.id == due)
+                .values(status="running", locked_at=now, attempts=BackgroundJob.attempts + 1)
+                .returning(BackgroundJob.id, BackgroundJob.kind, BackgroundJob.payload, BackgroundJob.attempts, BackgroundJob.max_attempts)
+                .execution_options(synchronize_session=False)
+            )).first()
+            await session.commit()
+        return dict(row._mapping) if row else None
+
+    async def run_once(self) -> bool:
+        """Claim and run one due job. Returns False when there was nothing to do."""
+        job = await self._claim()
+        if job is None:
+            return False
+
+        handler = _handlers.get(job["kind"])
+        error = None
+        if handler is None:
+            error = f"No handler registered for job kind '{job['kind']}'"
+        else:
+            try:
+                payload = json.loads(job["payload"])
+                # Handlers can tell their last try apart (e.g. to record a final status)
+                payload["_final_attempt"] = job["attempts"] >= job["max_attempts"]
+                async with self.session_factory() as session:
+                    await handler(session, payload)
+            except Exception as e:
+                error = f"{type(e).__name__}: {e}"
+
+        values = {"locked_at": None, "last_error": error}
+        if error is None:
+            values["status"] = "done"
+            self.completed += 1
+        elif handler is None or job["attempts"] >= job["max_attempts"]:
+            values["status"] = "failed"
+            self.failed += 1
+            logger.error("Job %s (%s) failed permanently: %s", job["id"], job["kind"], error)
+        else:
+            delay = backoff_seconds(job["attempts"])
+            values["status"] = "pending"
+            values["run_after"] = _now() + timedelta(seconds=delay)
+            self.retried += 1
+            logger.warning("Job %s (%s) attempt %s failed, retrying in %.0fs: %s", job["id"], job["kind"], job["attempts"], delay, error)
+
+        async with self.session_factory() as session:
+            await session.execute(
+                update(BackgroundJob)
+                .where(BackgroundJob.id == job["id"])
+                .values(**values)
+                .execution_options(synchronize_session=False)
+            )
+            await session.commit()
+        return True
+
+
+job_runner = JobRunner(
+    workers=settings.job_workers,
+    poll_interval=settings.job_poll_interval_seconds,
+    lease_seconds=settings.job_lease_seconds
+)
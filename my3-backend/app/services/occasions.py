@@ -0,0 +1,66 @@
+"""
+Upcoming-occasion queries over the indexed next_occurrence column.
+
+Yearly occasions keep a concrete next_occurrence. When it has passed, it is moved to
+the following year by roll_forward_occasions(), which runs before every upcoming read
+and normally finds nothing. Upcoming queries are then a single
+(user_id, next_occurrence) index range scan, and birthdays no longer drop out after
+their first year.
+"""
+import logging
+from datetime import date, timedelta
+from typing import List, Optional, Tuple, Union
+from uuid import UUID
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.database.models import Occasion, OccasionStatus, Recipient
+from app.utils.occasion_dates import YEARLY, next_occurrence
+
+logger = logging.getLogger(__name__)
+
+
+async def roll_forward_occasions(db: AsyncSession, user_id: Union[UUID, str], today: Optional[date] = None) -> int:
+    """
+    Move the user's passed yearly occasions to their next date and reset their status
+    for the new year. Flushes but does not commit. Returns the number of occasions moved.
+    """
+    today = today or date.today()
+    result = await db.execute(
+        select(Occasion).where(
+            Occasion.user_id == user_id,
+            Occasion.next_occurrence < today,
+            Occasion.recurrence == YEARLY
+        )
+    )
+    occasions = result.scalars().all()
+    for occasion in occasions:
+        occasion.next_occurrence = next_occurrence(occasion.month, occasion.day, occasion.recurrence, occasion.date, today)
+        occasion.status = OccasionStatus.IDEA_NEEDED
+    if occasions:
+        await db.flush()
+        logger.info("Rolled %d recurring occasions forward for user %s", len(occasions), user_id)
+    return len(occasions)
+
+
+async def get_upcoming_occasions(
+    db: AsyncSession,
+    user_id: Union[UUID, str],
+    days: int,
+    today: Optional[date] = None
+) -> List[Tuple[Occasion, str]]:
+    """(occasion, recipient name) pairs due within the next `days` days, soonest first."""
+    today = today or date.today()
+    result = await db.execute(
+        select(Occasion, Recipient.name)
+        .join(Recipient, Recipient.id == Occasion.recipient_id)
+        .where(
+            Occasion.user_id == user_id,
+            Occasion.next_occurrence >= today,
+            Occasion.next_occurrence <= today + timedelta(days=days),
+            Occasion.status != OccasionStatus.DONE
+        )
+        .order_by(Occasion.next_occurrence)
+    )
+    return [(occasion, recipient_name) for occasion, recipient_name in result.all()]
@@ -0,0 +1,51 @@
+"""
+Duplicate recipients, found through the indexed natural_key column.
+
+recipients.natural_key ("name|relationship", lowercased and trimmed) is a generated
+column, so the database keeps it current on every write. Duplicate groups are a
+GROUP BY ... HAVING count(*) > 1 over the (user_id, natural_key) index instead of a
+scan of the whole network on every chat turn. The chat path reads the id groups from
+the cached user context (app/services/user_context.py).
+"""
+import logging
+from typing import List, Union
+from uuid import UUID
+
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.database.models import Recipient
+
+logger = logging.getLogger(__name__)
+
+
+async def find_duplicate_recipients(db: AsyncSession, user_id: Union[UUID, str]) -> List[List[Recipient]]:
+    """
+    Groups of the user's recipients sharing a natural key, newest first within a group.
+    Users without duplicates cost one index-only aggregate.
+    """
+    duplicate_keys = (
+        select(Recipient.natural_key)
+        .where(Recipient.user_id == user_id)
+        .group_by(Recipient.natural_key)
+        .having(func.count() > 1)
+    )
+    result = await db.execute(
+        select(Recipient)
+        .where(Recipient.user_id == user_id, Recipient.natural_key.in_(duplicate_keys))
+        .order_by(Recipient.natural_key, Recipient.created_at.desc())
+    )
+
+    groups: List[List[Recipient]] = []
+    current_key = None
+    for recipient in result.scalars().all():
+        if recipient.natural_key != current_key:
+            groups.append([])
+            current_key = recipient.natural_key
+        groups[-1].append(recipient)
+    return groups
+
+
+async def find_duplicate_id_groups(db: AsyncSession, user_id: Union[UUID, str]) -> List[List[str]]:
+    """Duplicate groups as lists of recipient id strings (the shape kept in AgentState)."""
+    return [[str(r.id) for r in group] for group in await find_duplicate_recipients(db, user_id)]
@@ -0,0 +1,224 @@
+"""
+Per-user context snapshots for the chat hot path.
+
+Loads a user's recipients (with relationships) and occasions in the shape the
+LangGraph workflow expects, and caches the result in-process with LRU eviction.
+Every user has a data-version stamp that is bumped by invalidate_user_context()
+whenever their network is written, so a snapshot loaded before a write can never
+be stored after it. A TTL bounds staleness for writes made on other workers.
+"""
+import logging
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import List, Optional, Union
+from uuid import UUID
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import settings
+from app.database.models import Recipient, Occasion, RecipientRelationship
+from app.services.recipient_duplicates import find_duplicate_id_groups
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class UserContextSnapshot:
+    """Read-only view of a user's network as passed into AgentState."""
+    version: int
+    user_recipients: List[dict]
+    user_occasions: List[dict]
+    duplicate_groups: List[List[str]] = field(default_factory=list)  # Recipient ids sharing a natural key
+    loaded_at: float = field(default_factory=time.monotonic)
+
+
+class UserContextCache:
+    """
+    LRU cache of UserContextSnapshot keyed by user id, with version stamps.
+
+    Versions come from one counter and live in the LRU entries, so the cache holds
+    at most max_users users. An evicted user falls back to the highest version ever
+    evicted, which is newer than any snapshot loaded before that user's last write.
+    """
+
+    def __init__(self, max_users: int = 1000, ttl_seconds: float = 300):
+        self.max_users = max_users
+        self.ttl_seconds = ttl_seconds
+        # user id -> [version, snapshot or None]
+        self._entries: "OrderedDict[str, list]" = OrderedDict()
+        self._clock = 0
+        self._evicted_version = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _version(self, user_id: str) -> int:
+        entry = self._entries.get(user_id)
+        return entry[0] if entry is not None else self._evicted_version
+
+    def _evict(self, user_id: str) -> None:
+        entry = self._entries.pop(user_id, None)
+        if entry is not None:
+            self._evicted_version = max(self._evicted_version, entry[0])
+
+    def _trim(self) -> None:
+        while len(self._entries) > self.max_users:
+            self._evict(next(iter(self._entries)))
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
+
+    def version(self, user_id: str) -> int:
+        """Current data version for a user."""
+        with self._lock:
+            return self._version(user_id)
+
+    def get(self, user_id: str) -> Optional[UserContextSnapshot]:
+        """Return a fresh snapshot for the user, or None on miss/stale entry."""
+        with self._lock:
+            entry = self._entries.get(user_id)
+            snapshot = entry[1] if entry is not None else None
+            if snapshot is None or time.monotonic() - snapshot.loaded_at > self.ttl_seconds:
+                if snapshot is not None:
+                    self._evict(user_id)
+                self.misses += 1
+                return None
+            self._entries.move_to_end(user_id)
+            self.hits += 1
+            return snapshot
+
+    def put(self, user_id: str, snapshot: UserContextSnapshot) -> bool:
+        """
+        Store a snapshot if it was loaded at the current data version.
+        Returns False when a write happened while the snapshot was loading.
+        """
+        with self._lock:
+            if snapshot.version != self._version(user_id):
+                return False
+            self._entries[user_id] = [snapshot.version, snapshot]
+            self._entries.move_to_end(user_id)
+            self._trim()
+            return True
+
+    def invalidate(self, user_id: str) -> None:
+        """Bump the user's data version and drop any cached snapshot."""
+        with self._lock:
+            self._clock += 1
+            self._entries[user_id] = [self._clock, None]
+            self._entries.move_to_end(user_id)
+            self._trim()
+
+    def clear(self) -> None:
+        """Drop all cached snapshots; loads already in flight are not stored."""
+        with self._lock:
+            self._evicted_version = max([self._evicted_version] + [entry[0] for entry in self._entries.values()])
+            self._entries.clear()
+
+
+user_context_cache = UserContextCache(
+    max_users=settings.user_context_cache_size,
+    ttl_seconds=settings.user_context_cache_ttl_seconds
+)
+
+
+async def load_user_context(db: AsyncSession, user_id: Union[UUID, str]) -> tuple:
+    """Load recipients (with relationships) and occasions for a user from the database."""
+    recipients_result = await db.execute(
+        select(Recipient).where(Recipient.user_id == user_id)
+    )
+    recipients = recipients_result.scalars().all()
+
+    # Load relationships
+    relationships_result = await db.execute(
+        select(RecipientRelationship).where(RecipientRelationship.user_id == user_id)
+    )
+    relationships = relationships_result.scalars().all()
+
+    # Build relationship map
+    relationships_map = {}
+    for rel in relationships:
+        from_id = str(rel.from_recipient_id)
+        if from_id not in relationships_map:
+            relationships_map[from_id] = []
+        relationships_map[from_id].append({
+            "to_recipient_id": str(rel.to_recipient_id),
+            "relationship_type": rel.relationship_type,
+            "is_bidirectional": rel.is_bidirectional
+        })
+
+    user_recipients = [
+        {
+            "id": str(r.id),
+            "name": r.name,
+            "relationship": r.relationship_type,
+            "age_band": r.age_band,
+            "interests": r.interests or [],
+            "constraints": r.constraints or [],
+            "notes": r.notes,
+            "street_address": r.street_address,
+            "city": r.city,
+            "state_province": r.state_province,
+            "postal_code": r.postal_code,
+            "country": r.country,
+            "address_validation_status": r.address_validation_status,
+            "is_core_contact": r.is_core_contact,
+            "network_level": r.network_level,
+            "relationships": relationships_map.get(str(r.id), [])
+        }
+        for r in recipients
+    ]
+
+    occasions_result = await db.execute(
+        select(Occasion).where(Occasion.user_id == user_id)
+    )
+    occasions = occasions_result.scalars().all()
+    user_occasions = [
+        {
+            "id": str(o.id),
+            "recipient_id": str(o.recipient_id),
+            "name": o.name,
+            "occasion_type": o.occasion_type,
+            "date": str(o.date) if o.date else None,
+            "recurrence": o.recurrence,
+            "next_occurrence": str(o.next_occurrence) if o.next_occurrence else None,
+            "budget_range": o.budget_range,
+            "status": o.status.value if o.status else None
+        }
+        for o in occasions
+    ]
+
+    return user_recipients, user_occasions
+
+
+async def get_user_context(db: AsyncSession, user_id: Union[UUID, str]) -> UserContextSnapshot:
+    """
+    Get the user's context snapshot, loading it from the database on a cache miss.
+    Snapshots are shared between requests and must be treated as read-only.
+    """
+    key = str(user_id)
+    snapshot = user_context_cache.get(key)
+    if snapshot is not None:
+        return snapshot
+
+    version = user_context_cache.version(key)
+    user_recipients, user_occasions = await load_user_context(db, user_id)
+    # Computed once per write (snapshots are invalidated on writes), not on every chat turn
+    duplicate_groups = await find_duplicate_id_groups(db, user_id) if len(user_recipients) > 1 else []
+    snapshot = UserContextSnapshot(
+        version=version,
+        user_recipients=user_recipients,
+        user_occasions=user_occasions,
+        duplicate_groups=duplicate_groups
+    )
+    if not user_context_cache.put(key, snapshot):
+        logger.debug("User context for %s changed while loading; not caching", key)
+    return snapshot
+
+
+def invalidate_user_context(user_id: Union[UUID, str]) -> None:
+    """Invalidate cached context after any write to the user's network."""
+    user_context_cache.invalidate(str(user_id))
@@ -1,12 +1,204 @@
+import asyncio
+import threading
+import time
+import weakref
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Any, Dict, Optional, Tuple, Type
+from uuid import UUID
+
+import httpx
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.outputs import LLMResult
 from langchain_openai import ChatOpenAI
+from pydantic import BaseModel
 from app.config import settings
+from app.utils.llm_cassette import RECORD, REPLAY, CassetteChatModel, get_cassette
+
+
+@dataclass
+class LLMUsage:
+    """LLM time and tokens spent while it is the active accumulator."""
+    calls: int = 0
+    seconds: float = 0.0
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+
+
+# Accumulator for the graph node currently running (None outside instrumented nodes)
+_llm_usage: ContextVar[Optional[LLMUsage]] = ContextVar("llm_usage", default=None)
+
+
+def _token_usage(response: LLMResult) -> Tuple[int, int]:
+    """(prompt, completion) tokens reported for one LLM call, 0 when unreported."""
+    prompt_tokens = completion_tokens = 0
+    for generations in response.generations:
+        for generation in generations:
+            usage = getattr(getattr(generation, "message", None), "usage_metadata", None)
+            if usage:
+                prompt_tokens += usage.get("input_tokens", 0)
+                completion_tokens += usage.get("output_tokens", 0)
+    if not (prompt_tokens or completion_tokens):
+        usage = (response.llm_output or {}).get("token_usage") or {}
+        prompt_tokens = usage.get("prompt_tokens") or 0
+        completion_tokens = usage.get("completion_tokens") or 0
+    return prompt_tokens, completion_tokens
+
+
+class LLMUsageHandler(BaseCallbackHandler):
+    """
+    Charges the duration and token usage of every LLM call to the active LLMUsage.
+    Runs inline on the event loop, in the context of the node making the call.
+    """
+    run_inline = True
+
+    def __init__(self):
+        self._starts: Dict[UUID, float] = {}
+
+    def on_llm_start(self, serialized, prompts, *, run_id: UUID, **kwargs: Any) -> None:
+        self._starts[run_id] = time.perf_counter()
+
+    def on_chat_model_start(self, serialized, messages, *, run_id: UUID, **kwargs: Any) -> None:
+        self._starts[run_id] = time.perf_counter()
+
+    def on_llm_end(self, response: LLMResult, *, run_id: UUID, **kwargs: Any) -> None:
+        start = self._starts.pop(run_id, None)
+        usage = _llm_usage.get()
+        if usage is None:
+            return
+        prompt_tokens, completion_tokens = _token_usage(response)
+        usage.calls += 1
+        usage.seconds += time.perf_counter() - start if start is not None else 0.0
+        usage.prompt_tokens += prompt_tokens
+        usage.completion_tokens += completion_tokens
+
+    def on_llm_error(self, error: BaseException, *, run_id: UUID, **kwargs: Any) -> None:
+        start = self._starts.pop(run_id, None)
+        usage = _llm_usage.get()
+        if usage is not None and start is not None:
+            usage.calls += 1
+            usage.seconds += time.perf_counter() - start
+
+
+llm_usage_handler = LLMUsageHandler()
+
+
+class LLMRegistry:
+    """
+    Reusable ChatOpenAI clients sharing one pooled keep-alive HTTP connection pool.
+    Clients are keyed by (model, temperature); structured runnables additionally by schema.
+    With LLM_MODE=record or replay the clients are cassette-backed (app/utils/llm_cassette.py).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._clients: Dict[Tuple[str, float], BaseChatModel] = {}
+        self._structured: Dict[Tuple[str, float, Type[BaseModel]], Any] = {}
+        limits = httpx.Limits(
+            max_connections=settings.llm_max_connections,
+            max_keepalive_connections=settings.llm_max_keepalive_connections,
+            keepalive_expiry=settings.llm_keepalive_expiry_seconds,
+        )
+        timeout = httpx.Timeout(settings.llm_timeout_seconds)
+        self.http_client = httpx.Client(limits=limits, timeout=timeout)
+        self.http_async_client = httpx.AsyncClient(limits=limits, timeout=timeout)
+
+    def _openai(self, model: str, temperature: float, callbacks: Optional[list] = None) -> ChatOpenAI:
+        return ChatOpenAI(
+            model=model,
+            temperature=temperature,
+            api_key=settings.openai_api_key,
+            base_url=settings.openai_base_url,
+            http_client=self.http_client,
+            http_async_client=self.http_async_client,
+            callbacks=callbacks,
+        )
+
+    def get_llm(self, temperature: float, model: Optional[str] = None) -> BaseChatModel:
+        model = model or settings.openai_model
+        key = (model, float(temperature))
+        llm = self._clients.get(key)
+        if llm is None:
+            with self._lock:
+                llm = self._clients.get(key)
+                if llm is None:
+                    if settings.llm_mode in (RECORD, REPLAY):
+                        llm = CassetteChatModel(
+                            model_name=model,
+                            temperature=temperature,
+                            mode=settings.llm_mode,
+                            cassette=get_cassette(settings.llm_cassette_path),
+                            live=self._openai(model, temperature) if settings.llm_mode == RECORD else None,
+                            latency_seconds=settings.llm_replay_latency_ms / 1000,
+                            callbacks=[llm_usage_handler],
+                        )
+                    else:
+                        llm = self._openai(model, temperature, callbacks=[llm_usage_handler])
+                    self._clients[key] = llm
+        return llm
+
+    def get_structured_llm(self, schema: Type[BaseModel], temperature: float, model: Optional[str] = None):
+        model = model or settings.openai_model
+        key = (model, float(temperature), schema)
+        runnable = self._structured.get(key)
+        if runnable is None:
+            llm = self.get_llm(temperature, model)
+            with self._lock:
+                runnable = self._structured.get(key)
+                if runnable is None:
+                    runnable = llm.with_structured_output(schema)
+                    self._structured[key] = runnable
+        return runnable
+
+    async def aclose(self) -> None:
+        self.http_client.close()
+        await self.http_async_client.aclose()
+
+
+# One registry per event loop: pooled async connections cannot cross loops
+# (in production each worker runs a single loop, so this is process-wide).
+_registries: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, LLMRegistry]" = weakref.WeakKeyDictionary()
+_default_registry: Optional[LLMRegistry] = None
+_registries_lock = threading.Lock()
+
+
+def get_llm_registry() -> LLMRegistry:
+    """Get the LLM registry for the running event loop."""
+    global _default_registry
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        loop = None
+    with _registries_lock:
+        if loop is None:
+            if _default_registry is None:
+                _default_registry = LLMRegistry()
+            return _default_registry
+        registry = _registries.get(loop)
+        if registry is None:
+            registry = LLMRegistry()
+            _registries[loop] = registry
+        return registry
+
+
+def get_llm(temperature: float = 0.7, model: Optional[str] = None):
+    """Get configured OpenAI LLM instance (shared, pooled client)."""
+    return get_llm_registry().get_llm(temperature, model)
+
 
+def get_structured_llm(schema: Type[BaseModel], temperature: float = 0.7, model: Optional[str] = None):
+    """Get a reusable LLM runnable pre-bound to a structured output schema."""
+    return get_llm_registry().get_structured_llm(schema, temperature, model)
 
-def get_llm(temperature: float = 0.7):
-    """Get configured OpenAI LLM instance."""
-    return ChatOpenAI(
-        model="gpt-4",
-        temperature=temperature,
-        api_key=settings.openai_api_key
-    )
 
+async def close_llm_clients() -> None:
+    """Close pooled HTTP connections for the running event loop (app shutdown)."""
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        return
+    with _registries_lock:
+        registry = _registries.pop(loop, None)
+    if registry is not None:
+        await registry.aclose()
@@ -0,0 +1,166 @@
+"""
+Record/replay of LLM calls ("cassettes") for deterministic tests and benchmarks.
+
+With LLM_MODE=record, get_llm() and get_structured_llm() return a CassetteChatModel
+that forwards each call to OpenAI and stores the reply in a JSON cassette. With
+LLM_MODE=replay, the same calls are answered from the cassette after an optional
+simulated latency (LLM_REPLAY_LATENCY_MS), with no network. Structured calls store
+the parsed output (schema.model_dump) rather than the raw tool call, so replays
+validate against the current schema.
+
+Calls are keyed by model, temperature, output schema and the exact prompt messages,
+so a prompt change is a cassette miss (re-record). Prompts that embed the current
+date or other volatile data only replay within the same recording.
+"""
+import asyncio
+import hashlib
+import json
+import logging
+import threading
+from pathlib import Path
+from typing import Any, AsyncIterator, Dict, List, Optional, Type
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+from langchain_core.runnables import RunnableLambda
+from pydantic import BaseModel, ConfigDict
+
+logger = logging.getLogger(__name__)
+
+RECORD = "record"
+REPLAY = "replay"
+
+
+class CassetteMissError(LookupError):
+    """A replayed call has no recorded entry."""
+
+
+def cassette_key(model: str, temperature: float, schema: Optional[str], messages: List[BaseMessage]) -> str:
+    """Stable key for one LLM call."""
+    payload = json.dumps(
+        [model, float(temperature), schema, [[m.type, m.content] for m in messages]],
+        sort_keys=True,
+        default=str
+    )
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+class Cassette:
+    """JSON file of recorded LLM replies, keyed by cassette_key()."""
+
+    def __init__(self, path: str):
+        self.path = Path(path)
+        self._lock = threading.Lock()
+        self._entries: Dict[str, Dict[str, Any]] = {}
+        if self.path.exists():
+            self._entries = json.loads(self.path.read_text())
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        return self._entries.get(key)
+
+    def put(self, key: str, entry: Dict[str, Any]) -> None:
+        """Store an entry and rewrite the file (recording is a development-time path)."""
+        with self._lock:
+            self._entries[key] = entry
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self.path.write_text(json.dumps(self._entries, indent=1, sort_keys=True))
+
+
+_cassettes: Dict[str, Cassette] = {}
+_cassettes_lock = threading.Lock()
+
+
+def get_cassette(path: str) -> Cassette:
+    """Shared Cassette per file path."""
+    with _cassettes_lock:
+        cassette = _cassettes.get(path)
+        if cassette is None:
+            cassette = _cassettes[path] = Cassette(path)
+        return cassette
+
+
+class CassetteChatModel(BaseChatModel):
+    """
+    Chat model answering from a cassette (replay) or from `live` while recording.
+    Replies keep the recorded usage_metadata, so token accounting works on replay.
+    """
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
+    model_name: str
+    temperature: float
+    mode: str = REPLAY
+    cassette: Cassette
+    live: Optional[Any] = None  # Chat model called while recording
+    latency_seconds: float = 0.0
+
+    @property
+    def _llm_type(self) -> str:
+        return "cassette"
+
+    def with_structured_output(self, schema: Type[BaseModel], **kwargs: Any):
+        """Replies for structured calls are recorded as the parsed output's JSON."""
+        return self.bind(output_schema=schema) | RunnableLambda(
+            lambda message: schema.model_validate_json(message.content)
+        )
+
+    async def _reply(self, messages: List[BaseMessage], schema: Optional[Type[BaseModel]]) -> AIMessage:
+        key = cassette_key(self.model_name, self.temperature, schema.__name__ if schema else None, messages)
+        if self.mode == RECORD:
+            entry = await self._record(messages, schema)
+            self.cassette.put(key, entry)
+        else:
+            entry = self.cassette.get(key)
+            if entry is None:
+                raise CassetteMissError(
+                    f"No recorded LLM reply in {self.cassette.path} for {schema.__name__ if schema else 'chat'} "
+                    f"call ({messages[-1].content[:80]!r}...); re-record with LLM_MODE=record"
+                )
+            if self.latency_seconds:
+                await asyncio.sleep(self.latency_seconds)
+        return AIMessage(content=entry["content"], usage_metadata=entry.get("usage"))
+
+    async def _record(self, messages: List[BaseMessage], schema: Optional[Type[BaseModel]]) -> Dict[str, Any]:
+        if self.live is None:
+            raise RuntimeError("CassetteChatModel needs a live model to record")
+        if schema is None:
+            message = await self.live.ainvoke(messages)
+            content = message.content
+        else:
+            result = await self.live.with_structured_output(schema, include_raw=True).ainvoke(messages)
+            if result.get("parsed") is None:
+                raise result.get("parsing_error") or ValueError(f"No {schema.__name__} in LLM reply")
+            message = result["raw"]
+            content = result["parsed"].model_dump_json()
+        logger.info("Recorded LLM reply for %s call", schema.__name__ if schema else "chat")
+        return {
+            "schema": schema.__name__ if schema else None,
+            "prompt": messages[-1].content[:200],
+            "content": content,
+            "usage": getattr(message, "usage_metadata", None),
+        }
+
+    async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs: Any) -> ChatResult:
+        message = await self._reply(messages, kwargs.get("output_schema"))
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    async def _astream(self, messages, stop=None, run_manager=None, **kwargs: Any) -> AsyncIterator[ChatGenerationChunk]:
+        """Replay the reply word by word so token streaming can be exercised offline."""
+        message = await self._reply(messages, kwargs.get("output_schema"))
+        words = message.content.split(" ")
+        for i, word in enumerate(words):
+            last = i == len(words) - 1
+            text = word if last else word + " "
+            chunk = ChatGenerationChunk(message=AIMessageChunk(
+                content=text,
+                usage_metadata=message.usage_metadata if last else None
+            ))
+            if run_manager:
+                await run_manager.on_llm_new_token(text, chunk=chunk)
+            yield chunk
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs: Any) -> ChatResult:
+        raise NotImplementedError("CassetteChatModel is async-only")
@@ -0,0 +1,200 @@
+"""
+Non-blocking structured logging.
+
+Every logger keeps using logging.getLogger(__name__). The root logger has a
+single handler, which puts the unformatted LogRecord on a bounded queue. A
+QueueListener thread then does the formatting (structlog's ProcessorFormatter),
+PII redaction and the writes to stderr. On the request path, logging a line costs
+a level check, a sampling check and a put_nowait. When the queue is full the
+record is dropped and counted rather than blocking the event loop.
+
+Log with %-style arguments (logger.info("... %s", value)). Then the message is only
+built if the record survives the level check and sampling, and the building
+happens on the listener thread. Arguments should be immutable values (str, int,
+UUID), since they are read after the call returns.
+
+Sampling keeps 1 in N INFO and DEBUG records for the loggers listed in
+LOG_SAMPLE_RATES. Warnings and errors always pass.
+"""
+import atexit
+import itertools
+import logging
+import queue
+import re
+from collections import defaultdict
+from logging.handlers import QueueHandler, QueueListener
+from typing import Any, Dict, Optional
+
+import structlog
+
+from app.config import settings
+
+EMAIL_PATTERN = re.compile(r"[\w.+-]+@[\w-]+(?:\.[\w-]+)+")
+BEARER_PATTERN = re.compile(r"\bBearer\s+[\w.~+/=-]+", re.IGNORECASE)
+JWT_PATTERN = re.compile(r"\beyJ[\w-]+\.[\w-]+\.[\w-]+")
+PHONE_PATTERN = re.compile(r"(?:\+\d{1,3}[\s.-]?)?\(?\b\d{3}\)?[\s.-]?\d{3}[\s.-]?\d{4}\b")
+STREET_PATTERN = re.compile(
+    r"\b\d{1,5}\s+(?:[A-Z][a-z]+\s+){1,3}(?:St|Street|Ave|Avenue|Rd|Road|Blvd|Boulevard|Ln|Lane|Dr|Drive|Way|Ct|Court|Pl|Place)\b\.?"
+)
+REDACTIONS = (
+    (BEARER_PATTERN, "Bearer <token>"),
+    (JWT_PATTERN, "<token>"),
+    (EMAIL_PATTERN, "<email>"),
+    (STREET_PATTERN, "<address>"),
+    (PHONE_PATTERN, "<phone>"),
+)
+
+
+def redact(text: str) -> str:
+    """Mask emails, tokens, phone numbers and street addresses in a log string."""
+    for pattern, replacement in REDACTIONS:
+        text = pattern.sub(replacement, text)
+    return text
+
+
+def redact_pii(logger, method_name: str, event_dict: Dict[str, Any]) -> Dict[str, Any]:
+    """structlog processor applying redact() to every string value."""
+    for key, value in event_dict.items():
+        if isinstance(value, str) and not key.startswith("_"):
+            event_dict[key] = redact(value)
+    return event_dict
+
+
+_TIME_FORMATTER = logging.Formatter()
+
+
+def add_record_timestamp(logger, method_name: str, event_dict: Dict[str, Any]) -> Dict[str, Any]:
+    """Timestamp from the LogRecord (when the line was logged, not when it was written)."""
+    record = event_dict.get("_record")
+    if record is not None:
+        event_dict["timestamp"] = _TIME_FORMATTER.formatTime(record)
+    return event_dict
+
+
+class SamplingFilter(logging.Filter):
+    """Keeps 1 in N INFO-and-below records per sampled logger; warnings and errors always pass."""
+
+    def __init__(self, rates: Dict[str, float]):
+        super().__init__()
+        self.rates = rates
+        self.sampled = 0
+        self._every: Dict[str, Optional[int]] = {}
+        self._counters = defaultdict(itertools.count)
+
+    def _every_for(self, name: str) -> Optional[int]:
+        every = self._every.get(name, False)
+        if every is False:
+            # Most specific configured logger prefix wins
+            prefix = max((p for p in self.rates if name == p or name.startswith(p + ".")), key=len, default=None)
+            rate = self.rates.get(prefix) if prefix else None
+            every = None if rate is None or rate >= 1 else (0 if rate <= 0 else max(1, round(1 / rate)))
+            self._every[name] = every
+        return every
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.WARNING:
+            return True
+        every = self._every_for(record.name)
+        if every is None:
+            return True
+        if every == 0 or next(self._counters[record.name]) % every:
+            self.sampled += 1
+            return False
+        return True
+
+
+class NonBlockingQueueHandler(QueueHandler):
+    """Enqueues records unformatted; drops and counts them when the queue is full."""
+
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Formatting is left to the listener thread (the stdlib version formats here)
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+def parse_sample_rates(value: str) -> Dict[str, float]:
+    """'app.graph.nodes=0.2,app.api.routes.chat=0.5' -> {logger: rate}."""
+    rates = {}
+    for item in value.split(","):
+        name, _, rate = item.strip().partition("=")
+        if name and rate:
+            rates[name.strip()] = float(rate)
+    return rates
+
+
+def build_formatter(json_output: bool, redact_output: bool) -> structlog.stdlib.ProcessorFormatter:
+    processors = [
+        structlog.stdlib.add_log_level,
+        structlog.stdlib.add_logger_name,
+        add_record_timestamp,
+    ]
+    if redact_output:
+        processors.append(redact_pii)
+    processors.append(structlog.stdlib.ProcessorFormatter.remove_processors_meta)
+    if json_output:
+        processors += [structlog.processors.format_exc_info, structlog.processors.JSONRenderer()]
+    else:
+        processors.append(structlog.dev.ConsoleRenderer(colors=False))
+    return structlog.stdlib.ProcessorFormatter(processors=processors)
+
+
+_handler: Optional[NonBlockingQueueHandler] = None
+_sampler: Optional[SamplingFilter] = None
+_listener: Optional[QueueListener] = None
+
+
+def configure_logging() -> None:
+    """Install the queue handler on the root logger and start the writer thread (idempotent)."""
+    global _handler, _sampler, _listener
+    if _listener is not None:
+        return
+
+    output = logging.StreamHandler()
+    output.setFormatter(build_formatter(settings.log_json, settings.log_redact_pii))
+
+    log_queue: queue.Queue = queue.Queue(maxsize=settings.log_queue_size)
+    _sampler = SamplingFilter(parse_sample_rates(settings.log_sample_rates))
+    _handler = NonBlockingQueueHandler(log_queue)
+    _handler.addFilter(_sampler)
+
+    root = logging.getLogger()
+    root.setLevel(settings.log_level.upper())
+    root.addHandler(_handler)
+
+    # structlog.get_logger() output takes the same path, rendered on the listener thread
+    structlog.configure(
+        processors=[structlog.stdlib.filter_by_level, structlog.stdlib.ProcessorFormatter.wrap_for_formatter],
+        logger_factory=structlog.stdlib.LoggerFactory(),
+        wrapper_class=structlog.stdlib.BoundLogger,
+        cache_logger_on_first_use=True,
+    )
+
+    _listener = QueueListener(log_queue, output, respect_handler_level=True)
+    _listener.start()
+    atexit.register(stop_logging)
+
+
+def stop_logging() -> None:
+    """Flush queued records, stop the writer thread and detach the queue handler."""
+    global _listener
+    if _listener is not None:
+        logging.getLogger().removeHandler(_handler)
+        _listener.stop()
+        _listener = None
+
+
+def logging_stats() -> Dict[str, int]:
+    """Records dropped because the queue was full, and records sampled away."""
+    return {
+        "dropped": _handler.dropped if _handler else 0,
+        "sampled": _sampler.sampled if _sampler else 0,
+    }
@@ -0,0 +1,134 @@
+"""
+Occasion date resolution shared by the action executor, the occasions API and
+the daily roll-forward of recurring occasions.
+
+Occasions are stored as month/day plus a recurrence ("yearly" for birthdays,
+anniversaries and fixed-date holidays, None for one-off events) and a concrete
+next_occurrence that upcoming queries range-scan. Yearly occasions on Feb 29 fall
+on Feb 28 in non-leap years.
+"""
+import logging
+import re
+from datetime import date, datetime
+from typing import Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+MONTHS = {
+    "january": 1, "february": 2, "march": 3, "april": 4, "may": 5, "june": 6,
+    "july": 7, "august": 8, "september": 9, "october": 10, "november": 11, "december": 12
+}
+
+YEARLY = "yearly"
+# Occasion types/names that come back every year on the same date
+RECURRING_KEYWORDS = ("birthday", "anniversary", "christmas", "valentine", "new year")
+
+
+def parse_month_day(date_str: Optional[str]) -> Optional[Tuple[int, int]]:
+    """Month and day from natural language ("April 16", "June 30th"), or None."""
+    if not date_str:
+        return None
+    date_str_lower = date_str.lower()
+    for month_name, month_num in MONTHS.items():
+        if month_name in date_str_lower:
+            day_match = re.search(r'(\d+)', date_str)
+            if not day_match:
+                return None
+            day = int(day_match.group(1))
+            # Validate against a leap year so Feb 29 is accepted
+            try:
+                date(2000, month_num, day)
+            except ValueError:
+                logger.warning("Invalid date: %s/%s", month_num, day)
+                return None
+            return month_num, day
+    return None
+
+
+def parse_occasion_date(date_str: Optional[str], today: Optional[date] = None) -> Optional[date]:
+    """
+    Parse an ISO date or a natural language month/day ("April 16", "June 30th").
+    Month/day dates resolve to their next occurrence (this year, or next year if passed).
+    """
+    if not date_str:
+        return None
+    try:
+        return datetime.fromisoformat(date_str.replace("Z", "+00:00")).date()
+    except ValueError:
+        pass
+
+    today = today or date.today()
+    month_day = parse_month_day(date_str)
+    if month_day is None:
+        logger.warning("Could not parse occasion date '%s'", date_str)
+        return None
+    month, day = month_day
+    for year in (today.year, today.year + 1):
+        try:
+            candidate = date(year, month, day)
+        except ValueError:
+            # Invalid for this year (e.g. Feb 29); try next year
+            continue
+        if candidate >= today or year > today.year:
+            return candidate
+    logger.warning("Invalid date: %s/%s", month, day)
+    return None
+
+
+def is_recurring(name: Optional[str], occasion_type: Optional[str] = None) -> bool:
+    """Whether an occasion repeats every year, judged by its type and name."""
+    text = f"{occasion_type or ''} {name or ''}".lower()
+    return any(keyword in text for keyword in RECURRING_KEYWORDS)
+
+
+def yearly_date(year: int, month: int, day: int) -> date:
+    """The month/day in a given year (Feb 29 becomes Feb 28 outside leap years)."""
+    try:
+        return date(year, month, day)
+    except ValueError:
+        return date(year, month, 28)
+
+
+def next_occurrence(
+    month: Optional[int],
+    day: Optional[int],
+    recurrence: Optional[str],
+    occasion_date: Optional[date],
+    today: Optional[date] = None
+) -> Optional[date]:
+    """
+    Next date on or after today for yearly occasions (the stored date itself while it
+    is still ahead); the stored date for one-off ones.
+    """
+    today = today or date.today()
+    if recurrence != YEARLY or month is None or day is None or (occasion_date and occasion_date >= today):
+        return occasion_date
+    candidate = yearly_date(today.year, month, day)
+    if candidate < today:
+        candidate = yearly_date(today.year + 1, month, day)
+    return candidate
+
+
+def occasion_schedule(
+    date_str: Optional[str],
+    name: Optional[str],
+    occasion_type: Optional[str] = None,
+    today: Optional[date] = None
+) -> dict:
+    """
+    Column values for a new occasion: date, month, day, recurrence, next_occurrence.
+    A birth year in an ISO date is kept in date; recurrence uses only month/day.
+    """
+    today = today or date.today()
+    occasion_date = parse_occasion_date(date_str, today)
+    if occasion_date is None:
+        return {"date": None, "month": None, "day": None, "recurrence": None, "next_occurrence": None}
+    month, day = parse_month_day(date_str) or (occasion_date.month, occasion_date.day)
+    recurrence = YEARLY if is_recurring(name, occasion_type) else None
+    return {
+        "date": occasion_date,
+        "month": month,
+        "day": day,
+        "recurrence": recurrence,
+        "next_occurrence": next_occurrence(month, day, recurrence, occasion_date, today),
+    }
@@ -0,0 +1,72 @@
+"""
+Benchmark for casual-chat prompt context size.
+
+Builds synthetic networks of 10, 100, 1k and 5k recipients (two occasions each) and
+reports the context tokens compose_response_node previously sent (everyone) against
+build_chat_context() under the configured budget, plus the selection time, for a
+few typical questions.
+
+Usage (from my3-backend/):
+    python -m benchmarks.chat_context
+    python -m benchmarks.chat_context --sizes 100 10000 --budget 800
+"""
+import argparse
+import random
+import time
+
+from app.graph.chat_context import build_chat_context
+from app.graph.network_directory import NetworkDirectory
+from benchmarks.name_index import make_recipients
+
+INTERESTS = ["cricket", "painting", "gardening", "chess", "cooking", "hiking", "jazz", "yoga", "photography", "travel"]
+QUESTIONS = [
+    "what does {name} like?",
+    "who is {name}'s wife?",
+    "any birthdays coming up this month?",
+    "gift ideas for my mom",
+]
+
+
+def make_network(count: int, seed: int = 11):
+    """Recipients with interests, notes and a spouse link, plus two occasions each."""
+    rng = random.Random(seed)
+    recipients = make_recipients(count, seed)
+    occasions = []
+    for i, recipient in enumerate(recipients):
+        recipient["interests"] = rng.sample(INTERESTS, 2)
+        recipient["notes"] = "Prefers experiences over things."
+        recipient["relationships"] = []
+        if i % 2 and i > 0:
+            recipient["relationships"].append({"to_recipient_id": recipients[i - 1]["id"], "relationship_type": "wife"})
+        for name in ("Birthday", "Anniversary"):
+            occasions.append({
+                "id": f"{recipient['id']}-{name}",
+                "recipient_id": recipient["id"],
+                "name": name,
+                "date": f"19{rng.randint(50, 99)}-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}",
+            })
+    return recipients, occasions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark casual-chat context selection")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 100, 1000, 5000])
+    parser.add_argument("--budget", type=int, default=1500, help="Token budget (chat_context_token_budget)")
+    args = parser.parse_args()
+
+    print(f"{'recipients':>10} {'question':<38} {'before':>8} {'after':>7} {'people':>9} {'ms':>7}")
+    for size in args.sizes:
+        recipients, occasions = make_network(size)
+        directory = NetworkDirectory(recipients, occasions)
+        name = recipients[size // 2]["name"]
+        for question in QUESTIONS:
+            message = question.format(name=name)
+            start = time.perf_counter()
+            context = build_chat_context(message, directory, args.budget)
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            people = f"{len(context.selected_recipient_ids)}/{size}"
+            print(f"{size:>10} {message[:38]:<38} {context.tokens_before:>8} {context.tokens_after:>7} {people:>9} {elapsed_ms:>7.1f}")
+
+
+if __name__ == "__main__":
+    main()
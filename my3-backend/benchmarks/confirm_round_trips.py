@@ -0,0 +1,115 @@
+"""
+Benchmark for database round trips per chat confirmation (confirm_action).
+
+Creates a throwaway user with two recipients, then repeatedly confirms a plan with
+a new recipient plus occasion, two secondary contacts and a relationship through
+execute_action_plan(), counting every statement and transaction boundary sent to
+the database. The user (and everything it owns) is deleted afterwards.
+
+Requires a migrated PostgreSQL database at DATABASE_URL.
+
+Usage (from my3-backend/):
+    python -m benchmarks.confirm_round_trips
+    python -m benchmarks.confirm_round_trips --iterations 50
+"""
+import argparse
+import asyncio
+import statistics
+import time
+import uuid
+from collections import Counter
+
+from sqlalchemy import delete, event
+
+from app.database.connection import AsyncSessionLocal, engine
+from app.database.models import Recipient, User
+from app.services.action_executor import execute_action_plan
+
+
+class RoundTripCounter:
+    """Counts statements and transaction boundaries on the engine."""
+
+    def __init__(self):
+        self.counts = Counter()
+
+    def install(self, sync_engine):
+        event.listen(sync_engine, "before_cursor_execute", self._on_execute)
+        for name in ("begin", "commit", "rollback"):
+            event.listen(sync_engine, name, self._boundary(name))
+
+    def _on_execute(self, conn, cursor, statement, parameters, context, executemany):
+        self.counts[statement.split(None, 1)[0].upper()] += 1
+
+    def _boundary(self, name):
+        def listener(conn):
+            self.counts[name.upper()] += 1
+        return listener
+
+    def reset(self):
+        self.counts.clear()
+
+    @property
+    def total(self) -> int:
+        return sum(self.counts.values())
+
+
+def build_actions(primary: Recipient, other: Recipient, suffix: str):
+    return [
+        {"type": "create_recipient", "data": {"name": f"Priya {suffix}", "relationship": "friend", "interests": ["yoga"]},
+         "occasion_data": {"name": "Birthday", "occasion_type": "birthday", "date": "April 16"}},
+        {"type": "create_secondary_contact", "primary_recipient_id": str(primary.id), "is_bidirectional": True,
+         "secondary_contact": {"name": f"Archana {suffix}", "relationship_type": "wife"}},
+        {"type": "create_secondary_contact", "primary_recipient_id": str(primary.id),
+         "secondary_contact": {"name": f"Dev {suffix}", "relationship_type": "son"}},
+        {"type": "create_relationship", "from_recipient_id": str(primary.id), "to_recipient_id": str(other.id),
+         "relationship_type": "brother"},
+    ]
+
+
+async def run(iterations: int):
+    counter = RoundTripCounter()
+    counter.install(engine.sync_engine)
+
+    async with AsyncSessionLocal() as db:
+        user = User(email=f"bench-{uuid.uuid4().hex[:8]}@example.com", name="Benchmark", hashed_password="x")
+        db.add(user)
+        await db.flush()
+        primary = Recipient(user_id=user.id, name="Ritika", relationship_type="sister")
+        other = Recipient(user_id=user.id, name="Anil", relationship_type="friend")
+        db.add_all([primary, other])
+        await db.commit()
+
+    trips, latencies, breakdown = [], [], Counter()
+    try:
+        for i in range(iterations):
+            counter.reset()
+            start = time.perf_counter()
+            async with AsyncSessionLocal() as db:
+                await execute_action_plan(db, user.id, build_actions(primary, other, str(i)))
+                await db.commit()
+            latencies.append((time.perf_counter() - start) * 1000)
+            trips.append(counter.total)
+            breakdown.update(counter.counts)
+    finally:
+        async with AsyncSessionLocal() as db:
+            await db.execute(delete(User).where(User.id == user.id))
+            await db.commit()
+        await engine.dispose()
+
+    print(f"Confirmations: {iterations} (recipient + occasion, 2 secondary contacts, 1 relationship)")
+    print(f"Round trips per confirmation: mean {statistics.mean(trips):.1f}, max {max(trips)}")
+    print(f"Latency: p50 {statistics.median(latencies):.1f} ms, max {max(latencies):.1f} ms")
+    print("Per confirmation by kind:")
+    for kind, count in sorted(breakdown.items()):
+        print(f"  {kind:<10}{count / iterations:>6.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Count database round trips per confirm_action")
+    parser.add_argument("--iterations", type=int, default=20)
+    args = parser.parse_args()
+    asyncio.run(run(args.iterations))
+
+
+if __name__ == "__main__":
+    main()
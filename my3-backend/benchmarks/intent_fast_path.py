@@ -0,0 +1,101 @@
+"""
+Benchmark for the local fast-path intent classifier used by router_node.
+
+Runs every message in the labeled corpus through classify_intent_locally() and
+reports how many turns would still need an LLM call, the accuracy of the turns
+decided locally, and per-message classification latency.
+
+Usage (from my3-backend/):
+    python -m benchmarks.intent_fast_path
+    python -m benchmarks.intent_fast_path --threshold 0.9
+"""
+import argparse
+import json
+import time
+from collections import Counter, defaultdict
+from pathlib import Path
+
+from app.graph.intent_classifier import classify_intent_locally
+
+CORPUS_PATH = Path(__file__).parent / "data" / "intent_corpus.jsonl"
+
+
+def load_corpus(path: Path = CORPUS_PATH):
+    """
+    Load labeled messages: {"message", "intent", "known_names"}, plus "local": false
+    for messages the fast path must leave to the LLM.
+    """
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def evaluate(corpus, threshold: float):
+    """Classify the corpus and collect fast-path statistics."""
+    stats = {
+        "total": len(corpus),
+        "local": 0,
+        "local_correct": 0,
+        "llm_calls": 0,
+        "per_intent": defaultdict(Counter),
+        "errors": [],
+        "elapsed": 0.0,
+    }
+    for item in corpus:
+        start = time.perf_counter()
+        result = classify_intent_locally(item["message"], item.get("known_names", []))
+        stats["elapsed"] += time.perf_counter() - start
+
+        expected = item["intent"]
+        stats["per_intent"][expected]["total"] += 1
+        if result and result.confidence >= threshold:
+            stats["local"] += 1
+            stats["per_intent"][expected]["local"] += 1
+            if item.get("local", True) is False:
+                stats["errors"].append((item["message"], f"{expected} via the LLM", result.intent, result.rule))
+            elif result.intent == expected:
+                stats["local_correct"] += 1
+                stats["per_intent"][expected]["correct"] += 1
+            else:
+                stats["errors"].append((item["message"], expected, result.intent, result.rule))
+        else:
+            stats["llm_calls"] += 1
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the local intent fast path")
+    parser.add_argument("--threshold", type=float, default=0.85, help="Confidence needed to skip the LLM")
+    parser.add_argument("--corpus", type=Path, default=CORPUS_PATH)
+    parser.add_argument("--repeat", type=int, default=200, help="Timing repetitions over the corpus")
+    args = parser.parse_args()
+
+    corpus = load_corpus(args.corpus)
+    stats = evaluate(corpus, args.threshold)
+
+    # Re-run for stable latency numbers
+    start = time.perf_counter()
+    for _ in range(args.repeat):
+        for item in corpus:
+            classify_intent_locally(item["message"], item.get("known_names", []))
+    per_message_us = (time.perf_counter() - start) / (args.repeat * len(corpus)) * 1e6
+
+    total = stats["total"]
+    local = stats["local"]
+    print(f"Corpus: {args.corpus} ({total} messages), threshold {args.threshold}")
+    print(f"Decided locally:   {local}/{total} ({local / total:.1%})")
+    print(f"LLM calls needed:  {stats['llm_calls']}/{total} ({stats['llm_calls'] / total:.1%})")
+    if local:
+        print(f"Fast-path accuracy: {stats['local_correct']}/{local} ({stats['local_correct'] / local:.1%})")
+    print(f"Local latency:     {per_message_us:.1f} µs/message")
+    print()
+    print(f"{'intent':<15}{'total':>7}{'local':>7}{'correct':>9}")
+    for intent, counts in sorted(stats["per_intent"].items()):
+        print(f"{intent:<15}{counts['total']:>7}{counts['local']:>7}{counts['correct']:>9}")
+    if stats["errors"]:
+        print("\nMisclassified on the fast path:")
+        for message, expected, actual, rule in stats["errors"]:
+            print(f"  '{message}': expected {expected}, got {actual} (rule: {rule})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,157 @@
+"""
+HTTP load generator for /api/chat and /api/chat/confirm.
+
+Registers (or logs in) N synthetic users, then has each one run chat sequences
+against a running server: a gift search, adding a recipient, and casual chat. A
+confirmation is sent whenever a reply asks for one. Reports throughput, latency
+percentiles and error rates per endpoint.
+
+Run the backend against the OpenAI stub and a throwaway database, so no API
+credits are spent and the synthetic users and recipients can be discarded:
+    python -m benchmarks.openai_stub --port 8001 --latency-ms 800
+    OPENAI_BASE_URL=http://127.0.0.1:8001/v1 uvicorn app.main:app --port 8000 --workers 2
+
+Usage (from my3-backend/):
+    python -m benchmarks.load_chat --users 20 --sequences 5
+    python -m benchmarks.load_chat --base-url http://127.0.0.1:8000 --users 50 --stream
+"""
+import argparse
+import asyncio
+import json
+import statistics
+import time
+import uuid
+from collections import defaultdict
+from typing import Dict, List, Optional
+
+import httpx
+
+SEQUENCES = [
+    ["Gift ideas for my mom who loves gardening", "Something under $50 please"],
+    ["Add my friend Priya, her birthday is April 16 and she loves yoga", "Thanks!"],
+    ["hey, how are you doing today?", "What occasions do I have coming up?"],
+]
+PASSWORD = "load-test-password"
+
+
+class Recorder:
+    """Latency samples and failures per endpoint."""
+
+    def __init__(self):
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+        self.errors: Dict[str, Dict[str, int]] = defaultdict(lambda: defaultdict(int))
+
+    async def request(self, client: httpx.AsyncClient, label: str, method: str, url: str, **kwargs) -> Optional[httpx.Response]:
+        start = time.perf_counter()
+        try:
+            # The body is read in full, so streamed replies are timed to their final event
+            response = await client.request(method, url, **kwargs)
+        except httpx.HTTPError as e:
+            self.errors[label][type(e).__name__] += 1
+            return None
+        finally:
+            self.latencies[label].append((time.perf_counter() - start) * 1000)
+        if response.status_code >= 400:
+            self.errors[label][str(response.status_code)] += 1
+            return None
+        return response
+
+
+def percentile(samples: List[float], pct: int) -> float:
+    if len(samples) < 2:
+        return samples[0] if samples else 0.0
+    return statistics.quantiles(samples, n=100, method="inclusive")[pct - 1]
+
+
+def _final_event(body: str) -> Optional[dict]:
+    """The ChatResponse payload carried by the stream's final event."""
+    event = None
+    for line in body.splitlines():
+        if line.startswith("event: "):
+            event = line[7:]
+        elif line.startswith("data: ") and event == "final":
+            return json.loads(line[6:])
+    return None
+
+
+async def login(client: httpx.AsyncClient, recorder: Recorder, run_id: str, index: int) -> Optional[str]:
+    email = f"load-{run_id}-{index}@example.com"
+    payload = {"email": email, "password": PASSWORD}
+    response = await recorder.request(client, "POST /api/auth/register", "POST", "/api/auth/register", json={**payload, "name": f"Load {index}"})
+    if response is None:
+        response = await recorder.request(client, "POST /api/auth/login", "POST", "/api/auth/login", json=payload)
+    return response.json()["access_token"] if response is not None else None
+
+
+async def chat(client: httpx.AsyncClient, recorder: Recorder, headers: dict, message: str, conversation_id: Optional[str], stream: bool) -> Optional[dict]:
+    payload = {"message": message, "conversation_id": conversation_id}
+    if stream:
+        response = await recorder.request(client, "POST /api/chat/stream", "POST", "/api/chat/stream", json=payload, headers=headers)
+        return _final_event(response.text) if response is not None else None
+    response = await recorder.request(client, "POST /api/chat", "POST", "/api/chat", json=payload, headers=headers)
+    return response.json() if response is not None else None
+
+
+async def run_user(client: httpx.AsyncClient, recorder: Recorder, run_id: str, index: int, sequences: int, stream: bool, think_ms: float):
+    token = await login(client, recorder, run_id, index)
+    if token is None:
+        return
+    headers = {"Authorization": f"Bearer {token}"}
+    for number in range(sequences):
+        conversation_id = None
+        for message in SEQUENCES[(index + number) % len(SEQUENCES)]:
+            reply = await chat(client, recorder, headers, message, conversation_id, stream)
+            if reply is None:
+                break
+            conversation_id = reply["conversation_id"]
+            if reply.get("requires_confirmation"):
+                await recorder.request(
+                    client, "POST /api/chat/confirm", "POST", "/api/chat/confirm",
+                    json={"conversation_id": conversation_id, "confirmed": True}, headers=headers
+                )
+            if think_ms:
+                await asyncio.sleep(think_ms / 1000)
+
+
+async def run(base_url: str, users: int, sequences: int, stream: bool, think_ms: float, timeout: float):
+    recorder = Recorder()
+    run_id = uuid.uuid4().hex[:8]
+    limits = httpx.Limits(max_connections=users, max_keepalive_connections=users)
+    async with httpx.AsyncClient(base_url=base_url, timeout=timeout, limits=limits) as client:
+        start = time.perf_counter()
+        await asyncio.gather(*(
+            run_user(client, recorder, run_id, index, sequences, stream, think_ms) for index in range(users)
+        ))
+        elapsed = time.perf_counter() - start
+
+    total = sum(len(samples) for samples in recorder.latencies.values())
+    failed = sum(sum(errors.values()) for errors in recorder.errors.values())
+    print(f"Users: {users}, sequences per user: {sequences}, elapsed {elapsed:.1f}s")
+    print(f"Requests: {total} ({total / elapsed:.1f} req/s), errors {failed} ({failed / max(total, 1):.1%})")
+    print()
+    print(f"{'endpoint':<32}{'count':>7}{'req/s':>8}{'err %':>7}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}")
+    for label, samples in sorted(recorder.latencies.items()):
+        errors = sum(recorder.errors[label].values())
+        print(
+            f"{label:<32}{len(samples):>7}{len(samples) / elapsed:>8.1f}{errors / len(samples):>7.1%}"
+            f"{percentile(samples, 50):>9.0f}{percentile(samples, 95):>9.0f}{percentile(samples, 99):>9.0f}"
+        )
+    for label, errors in sorted(recorder.errors.items()):
+        if errors:
+            print(f"  {label} errors: {dict(errors)}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test /api/chat and /api/chat/confirm")
+    parser.add_argument("--base-url", default="http://127.0.0.1:8000")
+    parser.add_argument("--users", type=int, default=10, help="Concurrent synthetic users")
+    parser.add_argument("--sequences", type=int, default=3, help="Chat sequences per user")
+    parser.add_argument("--stream", action="store_true", help="Use /api/chat/stream instead of /api/chat")
+    parser.add_argument("--think-ms", type=float, default=0.0, help="Pause between a user's messages")
+    parser.add_argument("--timeout", type=float, default=120.0)
+    args = parser.parse_args()
+    asyncio.run(run(args.base_url, args.users, args.sequences, args.stream, args.think_ms, args.timeout))
+
+
+if __name__ == "__main__":
+    main()
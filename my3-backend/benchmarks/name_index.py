@@ -0,0 +1,108 @@
+"""
+Benchmark for recipient name matching in check_recipient_node.
+
+Compares the old linear exact + SequenceMatcher passes over user_recipients with the
+prebuilt RecipientNameIndex (normalized-name dict, trigram top-k fuzzy search,
+relationship dict) at 10, 1k and 10k recipients, for exact hits, misspelled names
+and misses.
+
+Usage (from my3-backend/):
+    python -m benchmarks.name_index
+    python -m benchmarks.name_index --sizes 10 1000 10000 100000
+"""
+import argparse
+import random
+import time
+from difflib import SequenceMatcher
+
+from app.graph.name_index import RecipientNameIndex, normalize_name
+
+FIRST_NAMES = [
+    "Ritika", "Anil", "Priya", "Ravi", "Archana", "Dev", "Meera", "Arjun", "Kavya", "Rohan",
+    "Sara", "John", "Emily", "Michael", "Sophia", "David", "Olivia", "James", "Ava", "Daniel",
+]
+LAST_NAMES = [
+    "Sharma", "Patel", "Iyer", "Reddy", "Nair", "Gupta", "Smith", "Johnson", "Brown", "Garcia",
+    "Miller", "Davis", "Wilson", "Moore", "Taylor", "Anderson", "Thomas", "Lee", "Martin", "Clark",
+]
+RELATIONSHIPS = ["mom", "dad", "wife", "husband", "friend", "sister", "brother", "colleague", "son", "daughter"]
+
+
+def make_recipients(count: int, seed: int = 7):
+    """Synthetic recipients with realistic, partly overlapping names."""
+    rng = random.Random(seed)
+    return [
+        {
+            "id": str(i),
+            "name": f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)} {i}",
+            "relationship": rng.choice(RELATIONSHIPS),
+        }
+        for i in range(count)
+    ]
+
+
+def typo(name: str) -> str:
+    """Drop one character from the first word (a typical misspelling)."""
+    return name[:2] + name[3:]
+
+
+def linear_match(recipients, person_name):
+    """The previous check_recipient_node algorithm: exact pass, then fuzzy pass."""
+    person_name_normalized = normalize_name(person_name)
+    for recipient in recipients:
+        if normalize_name(recipient.get("name", "")) == person_name_normalized:
+            return recipient
+    for recipient in recipients:
+        recipient_name = recipient.get("name", "")
+        if recipient_name:
+            ratio = SequenceMatcher(None, person_name_normalized, normalize_name(recipient_name)).ratio()
+            if ratio >= 0.85:
+                return recipient
+    return None
+
+
+def indexed_match(index: RecipientNameIndex, person_name):
+    return index.exact(person_name) or index.fuzzy(person_name, threshold=0.85)
+
+
+def timed(fn, queries, repeat: int) -> float:
+    """Mean microseconds per query."""
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for query in queries:
+            fn(query)
+    return (time.perf_counter() - start) / (repeat * len(queries)) * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark recipient name matching")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 1000, 10000])
+    parser.add_argument("--queries", type=int, default=20, help="Queries per kind")
+    args = parser.parse_args()
+
+    print(f"{'recipients':>10} {'kind':<8} {'linear µs':>12} {'indexed µs':>12} {'speedup':>9}")
+    for size in args.sizes:
+        recipients = make_recipients(size)
+        start = time.perf_counter()
+        index = RecipientNameIndex(recipients)
+        build_ms = (time.perf_counter() - start) * 1000
+
+        rng = random.Random(size)
+        sample = [rng.choice(recipients)["name"] for _ in range(args.queries)]
+        kinds = {
+            "exact": sample,
+            "typo": [typo(name) for name in sample],
+            "miss": [f"Unknown Person {i}" for i in range(args.queries)],
+        }
+        # Keep the slow linear path to roughly a second per measurement
+        repeat = max(1, 20000 // size)
+        for kind, queries in kinds.items():
+            linear_us = timed(lambda q: linear_match(recipients, q), queries, repeat)
+            indexed_us = timed(lambda q: indexed_match(index, q), queries, repeat * 10)
+            print(f"{size:>10} {kind:<8} {linear_us:>12.1f} {indexed_us:>12.1f} {linear_us / indexed_us:>8.0f}x")
+        relationship_us = timed(index.by_relationship, RELATIONSHIPS, repeat * 10)
+        print(f"{size:>10} index build {build_ms:.1f} ms, relationship lookup {relationship_us:.1f} µs")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,264 @@
+"""
+OpenAI-compatible stub server for load tests without API credits.
+
+Serves POST /v1/chat/completions the way ChatOpenAI calls it: plain replies,
+structured output through tools (function calling) or response_format
+(json_schema), and SSE streaming (including the final usage chunk). Structured
+replies are generated from the request's JSON schema, with simple keyword rules
+for intent and the person being discussed, so the workflow takes realistic paths.
+
+Latency is drawn from a log-normal distribution (median and sigma), and a share of
+requests can fail with 500s or 429s (with retry-after-ms, which the OpenAI client
+honours). GET /stats reports what was served.
+
+Usage (from my3-backend/):
+    python -m benchmarks.openai_stub --port 8001 --latency-ms 800 --latency-sigma 0.5
+    python -m benchmarks.openai_stub --error-rate 0.01 --rate-limit-rate 0.05
+
+Point the backend at it with OPENAI_BASE_URL=http://127.0.0.1:8001/v1.
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import random
+import re
+import time
+from collections import Counter
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+RELATIONSHIPS = ("mom", "dad", "mother", "father", "sister", "brother", "wife", "husband", "friend", "son", "daughter", "boss")
+INTENT_KEYWORDS = (
+    ("gift_search", ("gift", "present", "ideas", "buy")),
+    ("add_recipient", ("add", "remember", "birthday is", "anniversary is")),
+    ("update_info", ("update", "change", "moved", "new address")),
+)
+CHAT_REPLY = "Happy to help! Tell me a little more about who you are shopping for and what they enjoy."
+
+
+@dataclass
+class StubConfig:
+    latency_ms: float = 500.0  # Median
+    latency_sigma: float = 0.4  # Log-normal spread (0 = fixed latency)
+    error_rate: float = 0.0  # Share of requests answered with a 500
+    rate_limit_rate: float = 0.0  # Share of requests answered with a 429
+    stream_chunk_ms: float = 15.0  # Delay between streamed chunks
+    seed: Optional[int] = None
+
+
+def _message_text(message: Dict[str, Any]) -> str:
+    content = message.get("content") or ""
+    if isinstance(content, list):
+        return " ".join(part.get("text", "") for part in content if isinstance(part, dict))
+    return content
+
+
+def _last_user_text(messages: List[Dict[str, Any]]) -> str:
+    for message in reversed(messages):
+        if message.get("role") == "user":
+            return _message_text(message)
+    return ""
+
+
+def classify_intent(text: str) -> str:
+    lowered = text.lower()
+    for intent, keywords in INTENT_KEYWORDS:
+        if any(keyword in lowered for keyword in keywords):
+            return intent
+    return "casual_chat"
+
+
+def _person_fields(text: str) -> Dict[str, Any]:
+    lowered = text.lower()
+    relationship = next((word for word in RELATIONSHIPS if re.search(rf"\b{word}\b", lowered)), None)
+    name = re.search(r"\b(?:named|called|friend|is)\s+([A-Z][a-z]+)", text)
+    interests = re.search(r"\b(?:loves|likes|enjoys|into)\s+([a-z ]+)", lowered)
+    return {
+        "name": name.group(1) if name else None,
+        "relationship": relationship,
+        "interests": [interest.strip() for interest in re.split(r",| and ", interests.group(1)) if interest.strip()][:3] if interests else [],
+    }
+
+
+def fake_value(schema: Dict[str, Any], defs: Dict[str, Any], field: str, text: str) -> Any:
+    """A value matching `schema`, with keyword-derived values for known workflow fields."""
+    if field == "intent":
+        return classify_intent(text)
+    if field in ("name", "relationship", "interests"):
+        return _person_fields(text)[field]
+    if "$ref" in schema:
+        return fake_value(defs[schema["$ref"].split("/")[-1]], defs, field, text)
+    if "anyOf" in schema:
+        # Optional fields stay empty, as they mostly would for a short chat message
+        return None
+
+    kind = schema.get("type")
+    if kind == "object":
+        return {
+            name: fake_value(prop, defs, name, text)
+            for name, prop in schema.get("properties", {}).items()
+        }
+    if kind == "array":
+        items = [fake_value(schema.get("items", {}), defs, field, text) for _ in range(5 if field == "gift_ideas" else 0)]
+        for number, item in enumerate(items, 1):
+            if isinstance(item, dict) and "title" in item:
+                item["title"] = f"{item['title']} {number}"
+        return items
+    if kind in ("number", "integer"):
+        return 0.9 if field == "confidence" else 1
+    if kind == "boolean":
+        return False
+    if "enum" in schema:
+        return schema["enum"][0]
+    if field in ("url", "image_url"):
+        return None
+    if field == "price":
+        return "$40"
+    return f"Stub {field.replace('_', ' ')}"
+
+
+def _structured_target(body: Dict[str, Any]):
+    """(tool name or None, JSON schema) when the request asks for structured output."""
+    for tool in body.get("tools") or []:
+        function = tool.get("function", {})
+        return function.get("name"), function.get("parameters", {})
+    response_format = body.get("response_format") or {}
+    if response_format.get("type") == "json_schema":
+        return None, response_format["json_schema"].get("schema", {})
+    return None, None
+
+
+def _tokens(text: str) -> int:
+    return max(1, len(text) // 4)
+
+
+def create_stub_app(config: StubConfig) -> FastAPI:
+    app = FastAPI(title="OpenAI stub")
+    rng = random.Random(config.seed)
+    ids = itertools.count(1)
+    stats = Counter()
+
+    def latency_seconds() -> float:
+        if config.latency_sigma <= 0:
+            return config.latency_ms / 1000
+        return rng.lognormvariate(0, config.latency_sigma) * config.latency_ms / 1000
+
+    @app.get("/stats")
+    async def get_stats():
+        return dict(stats)
+
+    @app.get("/v1/models")
+    async def models():
+        return {"object": "list", "data": [{"id": "gpt-4", "object": "model", "owned_by": "stub"}]}
+
+    @app.post("/v1/chat/completions")
+    async def chat_completions(request: Request):
+        body = await request.json()
+        stats["requests"] += 1
+        await asyncio.sleep(latency_seconds())
+
+        roll = rng.random()
+        if roll < config.rate_limit_rate:
+            stats["rate_limited"] += 1
+            return JSONResponse(
+                {"error": {"message": "Rate limit reached (stub)", "type": "requests", "code": "rate_limit_exceeded"}},
+                status_code=429,
+                headers={"retry-after-ms": "200"}
+            )
+        if roll < config.rate_limit_rate + config.error_rate:
+            stats["errors"] += 1
+            return JSONResponse({"error": {"message": "Stub server error", "type": "server_error"}}, status_code=500)
+
+        messages = body.get("messages", [])
+        text = _last_user_text(messages)
+        tool_name, schema = _structured_target(body)
+        content = None
+        tool_calls = None
+        if schema is not None:
+            arguments = json.dumps(fake_value(schema, schema.get("$defs", {}), "", text))
+            if tool_name:
+                tool_calls = [{"id": f"call_{next(ids)}", "type": "function", "function": {"name": tool_name, "arguments": arguments}}]
+            else:
+                content = arguments
+            stats["structured"] += 1
+        else:
+            content = CHAT_REPLY
+            stats["chat"] += 1
+
+        prompt_tokens = sum(_tokens(_message_text(message)) for message in messages)
+        completion_tokens = _tokens(content or tool_calls[0]["function"]["arguments"])
+        usage = {"prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens, "total_tokens": prompt_tokens + completion_tokens}
+        completion_id = f"chatcmpl-stub-{next(ids)}"
+        created = int(time.time())
+        model = body.get("model", "gpt-4")
+        finish_reason = "tool_calls" if tool_calls else "stop"
+
+        if not body.get("stream"):
+            message = {"role": "assistant", "content": content}
+            if tool_calls:
+                message["tool_calls"] = tool_calls
+            return {
+                "id": completion_id, "object": "chat.completion", "created": created, "model": model,
+                "choices": [{"index": 0, "message": message, "finish_reason": finish_reason}],
+                "usage": usage,
+            }
+
+        stats["streamed"] += 1
+        include_usage = (body.get("stream_options") or {}).get("include_usage", False)
+
+        def chunk(delta: Dict[str, Any], finish: Optional[str] = None, **extra) -> str:
+            payload = {
+                "id": completion_id, "object": "chat.completion.chunk", "created": created, "model": model,
+                "choices": [{"index": 0, "delta": delta, "finish_reason": finish}], **extra,
+            }
+            return f"data: {json.dumps(payload)}\n\n"
+
+        async def events():
+            yield chunk({"role": "assistant", "content": ""})
+            if tool_calls:
+                yield chunk({"tool_calls": [{"index": 0, **tool_calls[0]}]})
+            else:
+                for word in re.findall(r"\S+\s*", content):
+                    await asyncio.sleep(config.stream_chunk_ms / 1000)
+                    yield chunk({"content": word})
+            yield chunk({}, finish_reason)
+            if include_usage:
+                payload = {"id": completion_id, "object": "chat.completion.chunk", "created": created, "model": model, "choices": [], "usage": usage}
+                yield f"data: {json.dumps(payload)}\n\n"
+            yield "data: [DONE]\n\n"
+
+        return StreamingResponse(events(), media_type="text/event-stream")
+
+    return app
+
+
+def main():
+    parser = argparse.ArgumentParser(description="OpenAI-compatible stub server for load tests")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8001)
+    parser.add_argument("--latency-ms", type=float, default=500.0, help="Median response latency")
+    parser.add_argument("--latency-sigma", type=float, default=0.4, help="Log-normal sigma (0 = fixed)")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Share of requests answered with 500")
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0, help="Share of requests answered with 429")
+    parser.add_argument("--stream-chunk-ms", type=float, default=15.0)
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+
+    config = StubConfig(
+        latency_ms=args.latency_ms,
+        latency_sigma=args.latency_sigma,
+        error_rate=args.error_rate,
+        rate_limit_rate=args.rate_limit_rate,
+        stream_chunk_ms=args.stream_chunk_ms,
+        seed=args.seed,
+    )
+    uvicorn.run(create_stub_app(config), host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
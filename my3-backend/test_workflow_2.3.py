@@ -1,6 +1,10 @@
 """
 Test script for Task 2.3: LangGraph Workflow
 Tests the workflow compilation, routing, and basic functionality.
+
+Run offline against the stub cassette (canned benchmarks/openai_stub.py replies,
+so this checks plumbing only, not model answers):
+    LLM_MODE=replay LLM_CASSETTE_PATH=tests/cassettes/stub_llm.json CHECKPOINTER_BACKEND=memory python test_workflow_2.3.py
 """
 
 import asyncio
@@ -251,7 +255,7 @@ async def main():
     print_header("TASK 2.3 WORKFLOW TESTING")
     print("Testing LangGraph workflow implementation...")
     print("\n[NOTE] Some tests require OpenAI API key to be set in .env")
-    print("[NOTE] Tests will make actual API calls to OpenAI\n")
+    print("[NOTE] Tests will make actual API calls to OpenAI (unless LLM_MODE=replay)\n")
     
     results = {
         "Compilation": await test_workflow_compilation(),
@@ -264,9 +268,13 @@ async def main():
     from app.config import settings
     
     has_openai_key = bool(getattr(settings, 'openai_api_key', None))
+    replaying = settings.llm_mode == "replay"
     
-    if has_openai_key:
-        print_info("OpenAI API key detected. Running API-dependent tests...")
+    if has_openai_key or replaying:
+        if replaying:
+            print_info(f"LLM_MODE=replay. Answering API-dependent tests from {settings.llm_cassette_path}...")
+        else:
+            print_info("OpenAI API key detected. Running API-dependent tests...")
         results["Gift Search"] = await test_gift_search_flow()
         results["Casual Chat"] = await test_casual_chat_flow()
         results["Add Recipient"] = await test_add_recipient_flow()
@@ -0,0 +1,101 @@
+"""
+Fixtures for graph benchmarks on replayed LLM calls.
+
+The `replay` fixture records a cassette for TURNS through a scripted stand-in for
+OpenAI (fixed, schema-valid replies), then switches get_llm() to LLM_MODE=replay.
+Benchmarks therefore exercise the real cassette path and measure graph, state and
+checkpoint overhead without network. Set LLM_REPLAY_LATENCY_MS to add simulated
+model latency.
+"""
+
+import asyncio
+import uuid
+
+import pytest
+from langchain_core.messages import AIMessage, HumanMessage
+from langgraph.checkpoint.memory import MemorySaver
+
+from app.config import settings
+from app.graph.workflow import create_my3_workflow
+from app.services.gift_cache import gift_idea_cache
+from app.utils.llm import LLMRegistry
+
+USAGE = {"input_tokens": 500, "output_tokens": 100, "total_tokens": 600}
+
+TURNS = {
+    "casual_chat": "hey, how are you doing today?",
+    "gift_search": "Gift ideas for my mom who loves gardening",
+}
+
+
+def _is_gift_request(messages) -> bool:
+    return "gift" in str(messages[-1].content).lower()
+
+
+def _scripted_output(schema, messages):
+    """Schema-valid reply for each structured call made by the workflow."""
+    gift = _is_gift_request(messages)
+    fields = {
+        "intent": "gift_search" if gift else "casual_chat",
+        "confidence": 0.95,
+        "relationship": "mom",
+        "interests": ["gardening"],
+        "gift_ideas": [
+            {
+                "title": f"Gardening gift {i}",
+                "description": "A thoughtful gift for someone who loves gardening.",
+                "personalized_reason": "She spends her weekends in the garden.\nThis makes that time better.",
+                "price": "$40",
+                "category": "garden",
+            }
+            for i in range(5)
+        ],
+    }
+    return schema(**{name: value for name, value in fields.items() if name in schema.model_fields})
+
+
+class ScriptedOpenAI:
+    """Stands in for ChatOpenAI while the benchmark cassette is recorded."""
+
+    async def ainvoke(self, messages):
+        return AIMessage(content="Happy to help! Tell me who you are shopping for.", usage_metadata=USAGE)
+
+    def with_structured_output(self, schema, include_raw=False):
+        class Structured:
+            async def ainvoke(self, messages):
+                raw = AIMessage(content="", usage_metadata=USAGE)
+                return {"raw": raw, "parsed": _scripted_output(schema, messages), "parsing_error": None}
+
+        return Structured()
+
+
+def turn_state(message: str) -> dict:
+    return {"messages": [HumanMessage(content=message)], "user_recipients": [], "user_occasions": []}
+
+
+def new_thread() -> dict:
+    """A fresh thread per run, so every run sends the recorded prompts."""
+    return {"configurable": {"thread_id": f"bench-{uuid.uuid4()}"}}
+
+
+@pytest.fixture
+def replay(tmp_path, monkeypatch):
+    """Event loop whose get_llm() answers TURNS from a freshly recorded cassette."""
+    monkeypatch.setattr(settings, "llm_cassette_path", str(tmp_path / "llm.json"))
+    monkeypatch.setattr(LLMRegistry, "_openai", lambda self, model, temperature, callbacks=None: ScriptedOpenAI())
+    # Gift ideas must come from the (replayed) LLM on every run, not the result cache
+    monkeypatch.setattr(gift_idea_cache, "max_entries", 0)
+    gift_idea_cache.clear()
+
+    # LLM registries are per event loop: record on one loop, replay on another
+    monkeypatch.setattr(settings, "llm_mode", "record")
+    record_loop = asyncio.new_event_loop()
+    graph = create_my3_workflow(checkpointer=MemorySaver())
+    for message in TURNS.values():
+        record_loop.run_until_complete(graph.ainvoke(turn_state(message), new_thread()))
+    record_loop.close()
+
+    monkeypatch.setattr(settings, "llm_mode", "replay")
+    loop = asyncio.new_event_loop()
+    yield loop
+    loop.close()
@@ -0,0 +1,76 @@
+"""
+pytest-benchmark suite for workflow overhead on replayed LLM calls.
+
+Run with `pytest tests/benchmarks --benchmark-only`; compare runs with
+`--benchmark-autosave` / `--benchmark-compare` to catch graph or state regressions.
+"""
+
+import pytest
+
+pytest.importorskip("pytest_benchmark")
+
+from langgraph.checkpoint.memory import MemorySaver
+
+from app.graph import nodes
+from app.graph.history import summarize_history_node
+from app.graph.instrumentation import trace_turn
+from app.graph.workflow import create_my3_workflow
+
+from .conftest import TURNS, new_thread, turn_state
+
+NODE_FUNCTIONS = {
+    "router": nodes.router_node,
+    "extract_person": nodes.extract_person_node,
+    "check_recipient": nodes.check_recipient_node,
+    "process_relationships": nodes.process_relationships_node,
+    "generate_gifts": nodes.generate_gifts_node,
+    "enrich_images": nodes.enrich_images_node,
+    "compose_response": nodes.compose_response_node,
+    "summarize_history": summarize_history_node,
+}
+
+
+def _node_inputs(loop, graph, message):
+    """The state each node of one turn was handed, read back from the checkpoints."""
+    config = new_thread()
+    loop.run_until_complete(graph.ainvoke(turn_state(message), config))
+
+    async def collect():
+        return {
+            snapshot.next[0]: snapshot.values
+            async for snapshot in graph.aget_state_history(config)
+            if len(snapshot.next) == 1
+        }
+
+    return loop.run_until_complete(collect())
+
+
+@pytest.mark.parametrize("intent", list(TURNS))
+def test_end_to_end_turn(benchmark, replay, intent):
+    """One full my3_graph.ainvoke turn with replayed LLM calls."""
+    graph = create_my3_workflow(checkpointer=MemorySaver())
+    message = TURNS[intent]
+
+    def run():
+        with trace_turn(True) as trace:
+            result = replay.run_until_complete(graph.ainvoke(turn_state(message), new_thread()))
+        return result, trace
+
+    result, trace = benchmark(run)
+    assert result["current_intent"] == intent
+    benchmark.extra_info["nodes"] = [entry["node"] for entry in trace]
+    benchmark.extra_info["prompt_tokens"] = sum(entry["prompt_tokens"] for entry in trace)
+
+
+@pytest.mark.parametrize("node", list(NODE_FUNCTIONS))
+def test_node(benchmark, replay, node):
+    """A single node run on the state it receives in a gift-search turn."""
+    graph = create_my3_workflow(checkpointer=MemorySaver())
+    inputs = _node_inputs(replay, graph, TURNS["gift_search"])
+    if node not in inputs:
+        pytest.skip(f"{node} does not run in a gift-search turn")
+    state = inputs[node]
+
+    update = benchmark(lambda: replay.run_until_complete(NODE_FUNCTIONS[node](state)))
+    assert isinstance(update, dict)
+    assert not update.get("error")
@@ -0,0 +1,14 @@
+"""
+Shared pytest configuration.
+"""
+import os
+
+# Graph tests run without a database: keep checkpoints in memory unless overridden
+os.environ.setdefault("CHECKPOINTER_BACKEND", "memory")
+# Background job workers poll the database; tests drive JobRunner directly
+os.environ.setdefault("JOB_RUNNER_ENABLED", "false")
+# Never call OpenAI from tests: answer LLM calls from canned benchmarks/openai_stub.py
+# replies. The stub cassette only exercises graph plumbing, not model behaviour
+# (see README "Development")
+os.environ.setdefault("LLM_MODE", "replay")
+os.environ.setdefault("LLM_CASSETTE_PATH", "tests/cassettes/stub_llm.json")
@@ -0,0 +1,2 @@
+# Test database module
+
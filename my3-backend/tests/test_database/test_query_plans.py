@@ -0,0 +1,130 @@
+"""
+EXPLAIN-based checks that hot queries use indexes instead of sequential scans.
+
+Seeds a realistic multi-user dataset inside a transaction (rolled back afterwards),
+runs ANALYZE, and inspects the planner's JSON output for each query shape used on
+the chat and recipients paths. Requires a migrated PostgreSQL database at
+DATABASE_URL; skipped when none is reachable.
+"""
+
+import json
+
+import pytest
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from app.database.connection import database_url
+
+SEED_SQL = [
+    """
+    INSERT INTO users (id, email, name, hashed_password)
+    SELECT gen_random_uuid(), 'plan-' || g || '@example.com', 'Plan ' || g, 'x'
+    FROM generate_series(1, 200) g
+    """,
+    """
+    INSERT INTO recipients (id, user_id, name, relationship_type, is_core_contact, network_level, created_at)
+    SELECT gen_random_uuid(), u.id, 'Person ' || g, 'friend', true, 1, now() - (g || ' minutes')::interval
+    FROM users u CROSS JOIN generate_series(1, 50) g
+    WHERE u.email LIKE 'plan-%'
+    """,
+    """
+    INSERT INTO occasions (id, user_id, recipient_id, name, occasion_type, date, month, day, recurrence, next_occurrence, status)
+    SELECT gen_random_uuid(), r.user_id, r.id, 'Birthday', 'birthday', current_date + (g * 30),
+           EXTRACT(MONTH FROM current_date + (g * 30))::int, EXTRACT(DAY FROM current_date + (g * 30))::int,
+           'yearly', current_date + (g * 30), 'IDEA_NEEDED'
+    FROM recipients r CROSS JOIN generate_series(1, 2) g
+    """,
+    """
+    INSERT INTO gift_ideas (id, occasion_id, title)
+    SELECT gen_random_uuid(), o.id, 'Gift ' || g
+    FROM occasions o CROSS JOIN generate_series(1, 2) g
+    """,
+    """
+    INSERT INTO conversations (id, user_id)
+    SELECT gen_random_uuid(), u.id
+    FROM users u CROSS JOIN generate_series(1, 10) g
+    WHERE u.email LIKE 'plan-%'
+    """,
+    """
+    INSERT INTO messages (id, conversation_id, role, content)
+    SELECT gen_random_uuid(), c.id, 'user', 'hello ' || g
+    FROM conversations c CROSS JOIN generate_series(1, 10) g
+    """,
+    """
+    INSERT INTO recipient_relationships (id, user_id, from_recipient_id, to_recipient_id, relationship_type, is_bidirectional)
+    SELECT gen_random_uuid(), r.user_id, r.id, r.id, 'self', false
+    FROM recipients r
+    """,
+]
+
+# Query shapes from app/services/user_context.py, app/services/action_executor.py and app/api/routes
+HOT_QUERIES = {
+    "recipients by user": "SELECT * FROM recipients WHERE user_id = :user_id ORDER BY created_at DESC",
+    "recipients by lower(name)": "SELECT * FROM recipients WHERE user_id = :user_id AND lower(name) IN ('person 1', 'person 2')",
+    "occasions by user": "SELECT * FROM occasions WHERE user_id = :user_id",
+    "occasions by recipient": "SELECT * FROM occasions WHERE recipient_id = :recipient_id ORDER BY date DESC",
+    "gift ideas by occasion": "SELECT * FROM gift_ideas WHERE occasion_id = :occasion_id ORDER BY created_at DESC",
+    "conversation by user": "SELECT * FROM conversations WHERE id = :conversation_id AND user_id = :user_id",
+    "conversations by user": "SELECT * FROM conversations WHERE user_id = :user_id ORDER BY created_at DESC",
+    "messages by conversation": "SELECT * FROM messages WHERE conversation_id = :conversation_id ORDER BY created_at",
+    "relationships by user": "SELECT * FROM recipient_relationships WHERE user_id = :user_id",
+    "duplicate natural keys": "SELECT natural_key FROM recipients WHERE user_id = :user_id GROUP BY natural_key HAVING count(*) > 1",
+    "upcoming occasions": "SELECT * FROM occasions WHERE user_id = :user_id AND next_occurrence BETWEEN current_date AND current_date + 30 ORDER BY next_occurrence",
+    "passed recurring occasions": "SELECT * FROM occasions WHERE user_id = :user_id AND next_occurrence < current_date AND recurrence = 'yearly'",
+    "relationships from recipient": "SELECT * FROM recipient_relationships WHERE user_id = :user_id AND from_recipient_id = :recipient_id",
+}
+
+
+def _seq_scans(plan: dict) -> list:
+    """Relations read with a sequential scan anywhere in the plan tree."""
+    found = []
+    if plan.get("Node Type") == "Seq Scan":
+        found.append(plan.get("Relation Name"))
+    for child in plan.get("Plans", []):
+        found.extend(_seq_scans(child))
+    return found
+
+
+@pytest.mark.asyncio
+async def test_hot_queries_avoid_sequential_scans():
+    """Every hot query is served from an index on a seeded dataset."""
+    engine = create_async_engine(database_url)
+    try:
+        conn = await engine.connect()
+    except Exception as e:
+        await engine.dispose()
+        pytest.skip(f"PostgreSQL not available: {e}")
+
+    transaction = await conn.begin()
+    try:
+        for statement in SEED_SQL:
+            await conn.execute(text(statement))
+        for table in ("users", "recipients", "occasions", "gift_ideas", "conversations", "messages", "recipient_relationships"):
+            await conn.execute(text(f"ANALYZE {table}"))
+
+        row = (await conn.execute(text(
+            """
+            SELECT r.user_id, r.id AS recipient_id, o.id AS occasion_id, c.id AS conversation_id
+            FROM recipients r
+            JOIN occasions o ON o.recipient_id = r.id
+            JOIN conversations c ON c.user_id = r.user_id
+            JOIN users u ON u.id = r.user_id
+            WHERE u.email LIKE 'plan-%'
+            LIMIT 1
+            """
+        ))).one()
+        params = dict(row._mapping)
+
+        failures = {}
+        for label, query in HOT_QUERIES.items():
+            result = await conn.execute(text(f"EXPLAIN (FORMAT JSON) {query}"), params)
+            plan = result.scalar()
+            plan = json.loads(plan) if isinstance(plan, str) else plan
+            scans = _seq_scans(plan[0]["Plan"])
+            if scans:
+                failures[label] = scans
+        assert failures == {}, f"Sequential scans on hot queries: {failures}"
+    finally:
+        await transaction.rollback()
+        await conn.close()
+        await engine.dispose()
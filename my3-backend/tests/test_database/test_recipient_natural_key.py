@@ -0,0 +1,85 @@
+"""
+Behavioural checks for the recipients.natural_key generated column.
+
+Inserts recipients whose names and relationships differ only in case, surrounding
+whitespace, or NULL vs empty relationship inside a transaction (rolled back
+afterwards), then checks the keys PostgreSQL computes and the duplicate groups
+find_duplicate_recipients builds from them. Requires a migrated PostgreSQL
+database at DATABASE_URL; skipped when none is reachable.
+"""
+
+import uuid
+
+import pytest
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+
+from app.database.connection import database_url
+from app.services.recipient_duplicates import find_duplicate_recipients
+
+# (name, relationship_type) -> expected natural_key
+RECIPIENTS = [
+    ("Meera", "Sister", "meera|sister"),
+    ("  meera ", "sister ", "meera|sister"),
+    ("MEERA", "SISTER", "meera|sister"),
+    ("Ravi", None, "ravi|"),
+    ("ravi", "", "ravi|"),
+    (" Ravi", "  ", "ravi|"),
+    ("Ravi", "friend", "ravi|friend"),
+    ("Meera Rao", "sister", "meera rao|sister"),
+]
+
+
+@pytest.fixture
+async def seeded():
+    """Connection with one user and RECIPIENTS inserted in an open transaction."""
+    engine = create_async_engine(database_url)
+    try:
+        conn = await engine.connect()
+    except Exception as e:
+        await engine.dispose()
+        pytest.skip(f"PostgreSQL not available: {e}")
+
+    transaction = await conn.begin()
+    user_id = uuid.uuid4()
+    try:
+        await conn.execute(
+            text("INSERT INTO users (id, email, name, hashed_password) VALUES (:id, :email, 'Key Test', 'x')"),
+            {"id": user_id, "email": f"natural-key-{user_id}@example.com"}
+        )
+        for name, relationship, _ in RECIPIENTS:
+            await conn.execute(
+                text(
+                    "INSERT INTO recipients (id, user_id, name, relationship_type, is_core_contact, network_level) "
+                    "VALUES (:id, :user_id, :name, :relationship, true, 1)"
+                ),
+                {"id": uuid.uuid4(), "user_id": user_id, "name": name, "relationship": relationship}
+            )
+        yield conn, user_id
+    finally:
+        await transaction.rollback()
+        await conn.close()
+        await engine.dispose()
+
+
+@pytest.mark.asyncio
+async def test_natural_key_ignores_case_whitespace_and_empty_relationship(seeded):
+    """The generated key lowercases and trims both parts and treats NULL and '' relationships alike."""
+    conn, user_id = seeded
+    rows = (await conn.execute(
+        text("SELECT name, relationship_type, natural_key FROM recipients WHERE user_id = :user_id"),
+        {"user_id": user_id}
+    )).all()
+
+    keys = {(row.name, row.relationship_type): row.natural_key for row in rows}
+    assert keys == {(name, relationship): key for name, relationship, key in RECIPIENTS}
+
+
+@pytest.mark.asyncio
+async def test_duplicate_groups_follow_natural_key(seeded):
+    """find_duplicate_recipients groups the variants and leaves distinct people alone."""
+    conn, user_id = seeded
+    async with AsyncSession(bind=conn) as session:
+        groups = await find_duplicate_recipients(session, user_id)
+
+    assert sorted((group[0].natural_key, len(group)) for group in groups) == [("meera|sister", 3), ("ravi|", 3)]
@@ -0,0 +1,95 @@
+"""
+Pytest tests for relevance-filtered casual-chat context selection.
+"""
+
+from datetime import date
+
+from langchain_core.messages import AIMessage, HumanMessage
+
+from app.graph import nodes
+from app.graph.chat_context import build_chat_context, score_recipients
+from app.graph.network_directory import NetworkDirectory
+
+RECIPIENTS = [
+    {"id": "r1", "name": "Ravi Kumar", "relationship": "friend", "interests": ["cricket"], "relationships": []},
+    {"id": "r2", "name": "Archana", "relationship": "friend", "interests": ["painting"], "relationships": [
+        {"to_recipient_id": "r1", "relationship_type": "wife"}
+    ]},
+    {"id": "r3", "name": "Meera", "relationship": "mom", "interests": ["gardening"], "relationships": []},
+    {"id": "r4", "name": "Dev", "relationship": "colleague", "interests": ["chess"], "relationships": []},
+]
+OCCASIONS = [
+    {"id": "o1", "recipient_id": "r1", "name": "Birthday", "date": "1990-11-02"},
+    {"id": "o2", "recipient_id": "r4", "name": "Birthday", "date": "1988-10-20"},
+]
+TODAY = date(2026, 10, 17)
+
+
+def _filler(count):
+    return [
+        {"id": f"f{i}", "name": f"Person {i}", "relationship": "friend", "interests": ["music", "travel"],
+         "notes": "Met at a conference years ago and keeps in touch.", "relationships": []}
+        for i in range(count)
+    ]
+
+
+def test_unlimited_budget_keeps_everyone_in_order():
+    """A budget of 0 reproduces the previous full listing."""
+    context = build_chat_context("hi", NetworkDirectory(RECIPIENTS, OCCASIONS), 0)
+    assert context.selected_recipient_ids == ["r1", "r2", "r3", "r4"]
+    assert context.recipients_context.splitlines()[1] == (
+        "- Archana (friend) - Interests: painting - Relationships: Ravi Kumar (wife)"
+    )
+    assert "- Ravi Kumar's Birthday is on 1990-11-02" in context.occasions_context
+    assert context.tokens_before == context.tokens_after
+
+
+def test_scores_names_relationships_interests_and_dates():
+    """Mentions, relationship words, interests and upcoming dates raise relevance."""
+    directory = NetworkDirectory(RECIPIENTS, OCCASIONS)
+    assert max(score_recipients("what does ravi like?", directory, TODAY).items(), key=lambda kv: kv[1])[0] == "r1"
+    assert "r2" in score_recipients("who is Ravi's wife?", directory, TODAY)
+    assert set(score_recipients("what about my mother", directory, TODAY)) == {"r3"}
+    assert set(score_recipients("anyone into gardening", directory, TODAY)) == {"r3"}
+    birthdays = score_recipients("any birthdays coming up?", directory, TODAY)
+    assert birthdays["r4"] > birthdays["r1"]
+
+
+def test_budget_keeps_relevant_people_and_reports_savings():
+    """A large network is cut to the budget with the mentioned person and their occasions kept."""
+    directory = NetworkDirectory(_filler(500) + RECIPIENTS, OCCASIONS)
+    context = build_chat_context("when is Dev's birthday?", directory, 200, today=TODAY)
+
+    assert context.selected_recipient_ids[0] == "r4"
+    assert context.total_recipients == 504
+    assert len(context.selected_recipient_ids) < 50
+    assert "- Dev's Birthday is on 1988-10-20" in context.occasions_context
+    assert context.tokens_after <= 200
+    assert context.tokens_before > 10 * context.tokens_after
+
+
+async def test_compose_response_ranks_against_the_user_message(monkeypatch):
+    """compose_response_node scores the network against the latest message, not an empty string."""
+    prompts = []
+
+    class CapturingLLM:
+        async def ainvoke(self, messages):
+            prompts.append(messages)
+            return AIMessage(content="Dev's birthday is October 20.")
+
+    monkeypatch.setattr(nodes, "get_llm", lambda **kwargs: CapturingLLM())
+    monkeypatch.setattr(nodes.settings, "chat_context_token_budget", 200)
+    recipients = _filler(500) + RECIPIENTS
+
+    update = await nodes.compose_response_node({
+        "current_intent": "casual_chat",
+        "messages": [HumanMessage(content="when is Dev's birthday?")],
+        "user_recipients": recipients,
+        "user_occasions": OCCASIONS,
+    })
+
+    assert update["ai_response"] == "Dev's birthday is October 20."
+    system_prompt = prompts[0][0].content
+    assert "- Dev (colleague) - Interests: chess" in system_prompt
+    assert "- Dev's Birthday is on 1988-10-20" in system_prompt
+    assert "out of 504 in the network" in system_prompt
@@ -0,0 +1,92 @@
+"""
+Pytest tests for the SQLAlchemy-backed LangGraph checkpointer.
+
+Uses the embedded SQLite backend so no PostgreSQL server is required.
+"""
+
+import operator
+from typing import Annotated, List, TypedDict
+
+import pytest
+from langgraph.graph import StateGraph, END
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from app.database.models import GraphCheckpoint
+from app.graph.checkpointer import SQLAlchemyCheckpointSaver
+
+
+class CounterState(TypedDict):
+    steps: Annotated[List[str], operator.add]
+
+
+def _build_graph(checkpointer):
+    """Two-node graph that appends to a list on every run."""
+    async def first(state: CounterState):
+        return {"steps": ["first"]}
+
+    async def second(state: CounterState):
+        return {"steps": ["second"]}
+
+    graph = StateGraph(CounterState)
+    graph.add_node("first", first)
+    graph.add_node("second", second)
+    graph.set_entry_point("first")
+    graph.add_edge("first", "second")
+    graph.add_edge("second", END)
+    return graph.compile(checkpointer=checkpointer)
+
+
+@pytest.fixture
+def sqlite_engine(tmp_path):
+    """Fresh SQLite database per test."""
+    return create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'checkpoints.db'}")
+
+
+@pytest.mark.asyncio
+async def test_state_survives_new_saver_instance(sqlite_engine):
+    """State written by one saver is visible to another (e.g. after restart or from another worker)."""
+    config = {"configurable": {"thread_id": "conversation-1"}}
+    graph = _build_graph(SQLAlchemyCheckpointSaver(sqlite_engine, create_tables=True))
+    await graph.ainvoke({"steps": []}, config)
+
+    restarted = _build_graph(SQLAlchemyCheckpointSaver(sqlite_engine, create_tables=True))
+    state = await restarted.aget_state(config)
+    assert state.values["steps"] == ["first", "second"]
+
+    result = await restarted.ainvoke({"steps": ["again"]}, config)
+    assert result["steps"] == ["first", "second", "again", "first", "second"]
+
+
+@pytest.mark.asyncio
+async def test_old_checkpoints_are_compacted(sqlite_engine):
+    """Only the latest N checkpoints are retained per thread."""
+    saver = SQLAlchemyCheckpointSaver(sqlite_engine, keep_latest=2, create_tables=True)
+    graph = _build_graph(saver)
+    config = {"configurable": {"thread_id": "conversation-2"}}
+
+    for _ in range(3):
+        await graph.ainvoke({"steps": []}, config)
+
+    async with sqlite_engine.connect() as conn:
+        count = (await conn.execute(
+            select(func.count()).select_from(GraphCheckpoint.__table__)
+            .where(GraphCheckpoint.__table__.c.thread_id == "conversation-2")
+        )).scalar()
+    assert count == 2
+
+    history = [c async for c in graph.aget_state_history(config)]
+    assert len(history) == 2
+    assert history[0].values["steps"] == ["first", "second"] * 3
+
+
+@pytest.mark.asyncio
+async def test_delete_thread(sqlite_engine):
+    """Deleting a thread removes all its state."""
+    saver = SQLAlchemyCheckpointSaver(sqlite_engine, create_tables=True)
+    graph = _build_graph(saver)
+    config = {"configurable": {"thread_id": "conversation-3"}}
+    await graph.ainvoke({"steps": []}, config)
+
+    await saver.adelete_thread("conversation-3")
+    assert await saver.aget_tuple(config) is None
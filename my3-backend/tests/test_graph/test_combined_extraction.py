@@ -0,0 +1,85 @@
+"""
+Pytest tests for the single-call intent + person extraction mode.
+"""
+
+import pytest
+from langchain_core.messages import HumanMessage
+
+from app.graph import nodes
+from app.graph.workflow import create_my3_workflow
+
+
+class FakeStructuredLLM:
+    """Records calls and returns a canned IntentAndPersonInfo."""
+
+    def __init__(self, result):
+        self.result = result
+        self.calls = 0
+
+    async def ainvoke(self, messages):
+        self.calls += 1
+        return self.result
+
+
+@pytest.mark.asyncio
+async def test_one_call_returns_intent_and_person(monkeypatch):
+    """A single LLM call fills both current_intent and detected_person."""
+    fake = FakeStructuredLLM(nodes.IntentAndPersonInfo(
+        intent="add_recipient",
+        confidence=0.9,
+        name="Ritika",
+        relationship="My Mother",
+        interests=["old hindi music"],
+    ))
+    monkeypatch.setattr(nodes, "get_structured_llm", lambda schema, **kwargs: fake)
+
+    result = await nodes.classify_and_extract_node({
+        "messages": [HumanMessage(content="Ritika is my mother, she loves old hindi music")],
+        "user_recipients": [],
+    })
+
+    assert fake.calls == 1
+    assert result["current_intent"] == "add_recipient"
+    assert result["detected_person"]["name"] == "Ritika"
+    assert result["detected_person"]["relationship"] == "mom"
+
+
+@pytest.mark.asyncio
+async def test_local_gift_intent_wins_over_llm(monkeypatch):
+    """Confident local gift matches keep their intent; the call is only used for extraction."""
+    fake = FakeStructuredLLM(nodes.IntentAndPersonInfo(
+        intent="casual_chat", confidence=0.6, relationship="mom", interests=["gardening"]
+    ))
+    monkeypatch.setattr(nodes, "get_structured_llm", lambda schema, **kwargs: fake)
+
+    result = await nodes.classify_and_extract_node({
+        "messages": [HumanMessage(content="Gift ideas for my mom who loves gardening")],
+        "user_recipients": [],
+    })
+
+    assert result["current_intent"] == "gift_search"
+    assert result["detected_person"]["interests"] == ["gardening"]
+
+
+@pytest.mark.asyncio
+async def test_small_talk_skips_llm(monkeypatch):
+    """Confident casual_chat needs no extraction, so no LLM call is made."""
+    def fail(*args, **kwargs):
+        raise AssertionError("LLM should not be called")
+
+    monkeypatch.setattr(nodes, "get_structured_llm", fail)
+    result = await nodes.classify_and_extract_node({
+        "messages": [HumanMessage(content="hello there")],
+        "user_recipients": [],
+    })
+    assert result == {"current_intent": "casual_chat", "detected_person": None}
+
+
+def test_workflow_entry_node_follows_mode():
+    """The combined mode replaces router + extract_person with one entry node."""
+    combined = create_my3_workflow(combined_extraction=True).get_graph().nodes
+    separate = create_my3_workflow(combined_extraction=False).get_graph().nodes
+
+    assert "classify_and_extract" in combined
+    assert "router" not in combined and "extract_person" not in combined
+    assert "router" in separate and "extract_person" in separate
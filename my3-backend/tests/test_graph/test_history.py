@@ -0,0 +1,89 @@
+"""
+Pytest tests for rolling conversation summarization.
+"""
+
+import itertools
+
+from langchain_core.language_models.fake_chat_models import GenericFakeChatModel
+from langchain_core.messages import AIMessage, HumanMessage
+from langgraph.checkpoint.memory import MemorySaver
+from langgraph.graph.message import add_messages
+
+from app.graph import history, nodes
+from app.graph.history import build_conversation_text, split_history, summarize_history_node
+from app.graph.workflow import create_my3_workflow
+
+
+def _turns(count):
+    messages = []
+    for i in range(count):
+        messages.append(HumanMessage(content=f"question {i}", id=f"h{i}"))
+        messages.append(AIMessage(content=f"answer {i}", id=f"a{i}"))
+    return messages
+
+
+def _limits(monkeypatch, max_messages=6, keep=4):
+    monkeypatch.setattr(history.settings, "history_max_messages", max_messages)
+    monkeypatch.setattr(history.settings, "history_max_tokens", 0)
+    monkeypatch.setattr(history.settings, "history_keep_messages", keep)
+
+
+def test_kept_window_starts_at_a_user_message():
+    """Folding never separates a reply from the question it answers."""
+    messages = _turns(5)
+    assert split_history(messages, 4) == 6
+    assert split_history(messages, 3) == 6
+    assert split_history(messages, 20) == 0
+
+
+async def test_old_messages_fold_into_summary(monkeypatch):
+    """Past the limit, old messages become the summary and are removed from state."""
+    _limits(monkeypatch)
+    fake_llm = GenericFakeChatModel(messages=iter([AIMessage(content="User asked questions 0-2.")]))
+    monkeypatch.setattr(history, "get_llm", lambda **kwargs: fake_llm)
+
+    messages = _turns(5)
+    update = await summarize_history_node({"messages": messages, "conversation_summary": None})
+
+    assert update["conversation_summary"] == "User asked questions 0-2."
+    remaining = add_messages(messages, update["messages"])
+    assert [m.id for m in remaining] == ["h3", "a3", "h4", "a4"]
+
+    text = build_conversation_text({"messages": remaining, "conversation_summary": update["conversation_summary"]})
+    assert text.startswith("Earlier in this conversation: User asked questions 0-2.")
+    assert await summarize_history_node({"messages": remaining}) == {}
+
+
+async def test_summary_falls_back_when_llm_fails(monkeypatch):
+    """Without the LLM the raw messages are still folded into a bounded summary."""
+    _limits(monkeypatch)
+
+    def broken_llm(**kwargs):
+        raise RuntimeError("no api key")
+
+    monkeypatch.setattr(history, "get_llm", broken_llm)
+    update = await summarize_history_node({"messages": _turns(5), "conversation_summary": "Earlier."})
+    assert update["conversation_summary"].startswith("Earlier. User said: question 0")
+    assert len(update["messages"]) == 6
+
+
+async def test_checkpointed_history_stays_bounded(monkeypatch):
+    """Over many turns the stored history stays within the window."""
+    _limits(monkeypatch)
+    replies = GenericFakeChatModel(messages=(AIMessage(content=f"reply {i}") for i in itertools.count()))
+    summaries = GenericFakeChatModel(messages=(AIMessage(content=f"summary {i}") for i in itertools.count()))
+    monkeypatch.setattr(nodes, "get_llm", lambda **kwargs: replies)
+    monkeypatch.setattr(history, "get_llm", lambda **kwargs: summaries)
+
+    graph = create_my3_workflow(checkpointer=MemorySaver())
+    config = {"configurable": {"thread_id": "history-test"}}
+    for i in range(12):
+        await graph.ainvoke(
+            {"messages": [HumanMessage(content="hello")], "user_recipients": [], "user_occasions": []},
+            config
+        )
+        values = (await graph.aget_state(config)).values
+        assert len(values["messages"]) <= 6
+
+    assert values["conversation_summary"].startswith("summary")
+    assert values["messages"][-1].content == "reply 11"
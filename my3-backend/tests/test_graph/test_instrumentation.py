@@ -0,0 +1,75 @@
+"""
+Pytest tests for per-node latency and token accounting.
+"""
+
+import itertools
+
+from langchain_core.language_models.fake_chat_models import GenericFakeChatModel
+from langchain_core.messages import AIMessage, HumanMessage
+from langgraph.checkpoint.memory import MemorySaver
+
+from app.graph import history, nodes
+from app.graph.instrumentation import NODE_DURATION, NODE_PROMPT_TOKENS, instrument_node, trace_turn
+from app.graph.workflow import create_my3_workflow
+from app.utils.llm import llm_usage_handler
+
+
+def _fake_llm(content, prompt_tokens, completion_tokens):
+    usage = {"input_tokens": prompt_tokens, "output_tokens": completion_tokens, "total_tokens": prompt_tokens + completion_tokens}
+    return GenericFakeChatModel(
+        messages=(AIMessage(content=content, usage_metadata=usage) for _ in itertools.count()),
+        callbacks=[llm_usage_handler]
+    )
+
+
+async def test_llm_usage_is_charged_to_the_running_node():
+    """Tokens and LLM time of calls made inside a node end up in its trace entry."""
+    llm = _fake_llm("hi", 120, 30)
+
+    async def two_calls(state):
+        await llm.ainvoke("first")
+        await llm.ainvoke("second")
+        return {"ai_response": "done"}
+
+    node = instrument_node("demo", two_calls)
+    before = NODE_PROMPT_TOKENS.count("demo")
+    with trace_turn(True) as trace:
+        assert await node({"messages": []}) == {"ai_response": "done"}
+    await llm.ainvoke("outside any node")
+
+    assert len(trace) == 1
+    entry = trace[0]
+    assert entry["node"] == "demo"
+    assert entry["llm_calls"] == 2
+    assert (entry["prompt_tokens"], entry["completion_tokens"]) == (240, 60)
+    assert entry["state_bytes"] > 0
+    assert NODE_PROMPT_TOKENS.count("demo") == before + 1
+
+
+async def test_tracing_is_off_by_default():
+    """Outside trace_turn nodes are still exported but nothing is collected."""
+    async def noop(state):
+        return {}
+
+    with trace_turn(False) as trace:
+        await instrument_node("noop", noop)({})
+    assert trace is None
+    assert NODE_DURATION.count("noop") >= 1
+
+
+async def test_every_workflow_node_is_instrumented(monkeypatch):
+    """A casual turn traces router, compose_response and summarize_history in order."""
+    monkeypatch.setattr(nodes, "get_llm", lambda **kwargs: _fake_llm("hello there", 50, 5))
+    monkeypatch.setattr(history, "get_llm", lambda **kwargs: _fake_llm("summary", 10, 2))
+
+    graph = create_my3_workflow(checkpointer=MemorySaver())
+    with trace_turn(True) as trace:
+        await graph.ainvoke(
+            {"messages": [HumanMessage(content="hello")], "user_recipients": [], "user_occasions": []},
+            {"configurable": {"thread_id": "instrumentation-test"}}
+        )
+
+    assert [entry["node"] for entry in trace] == ["router", "compose_response", "summarize_history"]
+    compose = trace[1]
+    assert compose["llm_calls"] >= 1
+    assert compose["prompt_tokens"] >= 50
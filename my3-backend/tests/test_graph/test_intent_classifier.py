@@ -0,0 +1,60 @@
+"""
+Pytest tests for the local fast-path intent classifier.
+"""
+
+import pytest
+from langchain_core.messages import HumanMessage
+
+from app.config import settings
+from app.graph import nodes
+from app.graph.intent_classifier import classify_intent_locally
+from benchmarks.intent_fast_path import evaluate, load_corpus
+
+
+def test_corpus_fast_path_is_accurate():
+    """Every message decided locally matches its label, and "local": false messages reach the LLM."""
+    corpus = load_corpus()
+    stats = evaluate(corpus, settings.intent_fast_path_threshold)
+    assert stats["errors"] == []
+    eligible = [item for item in corpus if item.get("local", True)]
+    assert stats["local"] / len(eligible) >= 0.75
+
+
+def test_ambiguous_phrasings_fall_through():
+    """Messages that only look like a rule match are left to the LLM."""
+    assert classify_intent_locally("Add hiking to Ritika's interests", ["Ritika"]) is None
+    assert classify_intent_locally("What time do I need to get to the airport?") is None
+    assert classify_intent_locally("Ritika is coming over this weekend", ["Ritika"]) is None
+    assert classify_intent_locally("ok") is None
+    assert classify_intent_locally("What should I get for dinner?") is None
+    assert classify_intent_locally("Thanks for the gift ideas!") is None
+    assert classify_intent_locally("Change of plans, find something else") is None
+    assert classify_intent_locally("Hello, how are you?").rule == "greeting"
+
+
+def test_gift_requests_never_need_llm():
+    """'Gift ideas for X' style turns are all decided locally."""
+    corpus = [item for item in load_corpus() if item["intent"] == "gift_search"]
+    stats = evaluate(corpus, settings.intent_fast_path_threshold)
+    assert stats["local"] >= len(corpus) - 2
+
+
+def test_known_name_makes_fact_an_update():
+    """Facts about an existing recipient are update_info; unknown names fall back to the LLM."""
+    result = classify_intent_locally("Ritika likes Old Hindi Music", ["Ritika"])
+    assert result.intent == "update_info"
+    assert classify_intent_locally("Ritika likes Old Hindi Music", []) is None
+
+
+@pytest.mark.asyncio
+async def test_router_skips_llm_on_fast_path(monkeypatch):
+    """router_node returns without touching the LLM for confident local matches."""
+    def fail(*args, **kwargs):
+        raise AssertionError("LLM should not be called")
+
+    monkeypatch.setattr(nodes, "get_structured_llm", fail)
+    result = await nodes.router_node({
+        "messages": [HumanMessage(content="Gift ideas for my mom who loves gardening")],
+        "user_recipients": [],
+    })
+    assert result == {"current_intent": "gift_search"}
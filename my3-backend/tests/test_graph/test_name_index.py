@@ -0,0 +1,49 @@
+"""
+Pytest tests for the per-user recipient name index.
+"""
+
+import pytest
+
+from app.graph import nodes
+from app.graph.name_index import RecipientNameIndex, get_name_index
+from benchmarks.name_index import linear_match, make_recipients, typo
+
+
+def test_exact_and_relationship_lookups():
+    """Exact lookups ignore case/whitespace; relationships return every match."""
+    recipients = [
+        {"id": "1", "name": "Ritika  Sharma", "relationship": "Friend"},
+        {"id": "2", "name": "Anil", "relationship": "friend"},
+    ]
+    index = RecipientNameIndex(recipients)
+    assert index.exact(" ritika sharma ")["id"] == "1"
+    assert index.exact("Ravi") is None
+    assert [r["id"] for r in index.by_relationship("FRIEND")] == ["1", "2"]
+
+
+def test_fuzzy_matches_linear_scan():
+    """Index results agree with the old linear exact+fuzzy passes."""
+    recipients = make_recipients(1000)
+    index = RecipientNameIndex(recipients)
+    queries = [r["name"] for r in recipients[::97]] + [typo(r["name"]) for r in recipients[::89]] + ["Nobody Here"]
+    for query in queries:
+        expected = linear_match(recipients, query)
+        actual = index.exact(query) or index.fuzzy(query, threshold=0.85)
+        assert (actual or {}).get("id") == (expected or {}).get("id"), query
+
+
+def test_index_is_reused_for_the_same_list():
+    """The cached snapshot list maps to one prebuilt index."""
+    recipients = make_recipients(10)
+    assert get_name_index(recipients) is get_name_index(recipients)
+    assert get_name_index(list(recipients)) is not get_name_index(recipients)
+
+
+@pytest.mark.asyncio
+async def test_check_recipient_node_uses_index():
+    """check_recipient_node matches a misspelled name through the index."""
+    result = await nodes.check_recipient_node({
+        "detected_person": {"name": "Ritka", "relationship": None},
+        "user_recipients": [{"id": "1", "name": "Ritika", "relationship": "friend"}],
+    })
+    assert result["matched_recipient_id"] == "1"
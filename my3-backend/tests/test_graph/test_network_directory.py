@@ -0,0 +1,75 @@
+"""
+Pytest tests for the ID-keyed network directory used by the graph nodes.
+"""
+
+from langgraph.checkpoint.serde.jsonplus import JsonPlusSerializer
+
+from app.graph import nodes
+from app.graph.network_directory import NetworkDirectory, build_network_directory
+
+RECIPIENTS = [
+    {"id": "r1", "name": "Ravi", "relationship": "friend", "relationships": []},
+    {"id": "r2", "name": "Archana", "relationship": "Friend", "relationships": [
+        {"to_recipient_id": "r1", "relationship_type": "wife", "is_bidirectional": False}
+    ]},
+    {"id": "r3", "name": "Meera", "relationship": "sister", "relationships": []},
+]
+OCCASIONS = [
+    {"id": "o1", "recipient_id": "r1", "name": "Birthday", "date": "2026-03-01"},
+    {"id": "o2", "recipient_id": "r3", "name": "Birthday", "date": "2026-05-01"},
+    {"id": "o3", "recipient_id": "r1", "name": "Anniversary", "date": "2026-07-01"},
+]
+
+
+def test_directory_lookups():
+    """Ids, names, relationship types, occasions and reverse links resolve directly."""
+    directory = NetworkDirectory(RECIPIENTS, OCCASIONS, build_network_directory(RECIPIENTS, OCCASIONS))
+    assert directory.recipient("r2")["name"] == "Archana"
+    assert directory.recipient("missing") is None
+    assert directory.recipient_name("missing", "Unknown") == "Unknown"
+    assert directory.find_by_name(" meera ")["id"] == "r3"
+    assert [r["id"] for r in directory.by_relationship("FRIEND")] == ["r1", "r2"]
+    assert [o["id"] for o in directory.occasions_for("r1")] == ["o1", "o3"]
+    assert [r["id"] for r in directory.related_from("r1")] == ["r2"]
+
+
+def test_partner_follows_reverse_links():
+    """A spouse link stored only on the partner is still found."""
+    directory = NetworkDirectory(RECIPIENTS, OCCASIONS)
+    assert directory.partner("r2")["id"] == "r1"
+    assert directory.partner("r1")["id"] == "r2"
+    assert directory.partner("r3") is None
+
+
+def test_directory_is_checkpoint_serializable_and_rebuilt_when_stale():
+    """The state maps round-trip through the checkpoint serializer; mismatched maps are rebuilt."""
+    serde = JsonPlusSerializer()
+    maps = serde.loads_typed(serde.dumps_typed(build_network_directory(RECIPIENTS, OCCASIONS)))
+    assert NetworkDirectory(RECIPIENTS, OCCASIONS, maps).recipient("r3")["name"] == "Meera"
+
+    stale = build_network_directory(RECIPIENTS[:1], [])
+    directory = NetworkDirectory.from_state({
+        "user_recipients": RECIPIENTS,
+        "user_occasions": OCCASIONS,
+        "network_directory": stale,
+    })
+    assert directory.recipient("r3")["name"] == "Meera"
+
+
+async def test_process_relationships_uses_directory():
+    """Secondary contacts that already exist become create_relationship actions."""
+    result = await nodes.process_relationships_node({
+        "detected_person": {"name": "Ravi", "secondary_contacts": [
+            {"name": "archana", "relationship_to_primary": "wife"},
+            {"name": "Dev", "relationship_to_primary": "son"},
+        ]},
+        "matched_recipient_id": "r1",
+        "user_recipients": RECIPIENTS,
+        "user_occasions": OCCASIONS,
+        "network_directory": build_network_directory(RECIPIENTS, OCCASIONS),
+        "pending_actions": [],
+    })
+    actions = result["pending_actions"]
+    assert actions[0]["type"] == "create_relationship"
+    assert actions[0]["to_recipient_id"] == "r2"
+    assert actions[1]["type"] == "create_secondary_contact"
@@ -0,0 +1,51 @@
+"""
+Pytest tests for the server-sent-event workflow stream.
+"""
+
+import json
+
+import pytest
+from langchain_core.language_models.fake_chat_models import GenericFakeChatModel
+from langchain_core.messages import AIMessage, HumanMessage
+from langgraph.checkpoint.memory import MemorySaver
+
+from app.graph import nodes
+from app.graph.streaming import format_sse, stream_workflow_events
+from app.graph.workflow import create_my3_workflow
+
+
+@pytest.mark.asyncio
+async def test_stream_emits_node_progress_and_tokens(monkeypatch):
+    """Node events arrive in order and compose_response tokens are streamed."""
+    fake_llm = GenericFakeChatModel(messages=iter([AIMessage(content="Hi there, how can I help?")]))
+    monkeypatch.setattr(nodes, "get_llm", lambda **kwargs: fake_llm)
+
+    graph = create_my3_workflow(checkpointer=MemorySaver())
+    config = {"configurable": {"thread_id": "stream-test"}}
+    state = {
+        "messages": [HumanMessage(content="hello")],
+        "user_recipients": [],
+        "user_occasions": [],
+    }
+
+    events = [item async for item in stream_workflow_events(graph, state, config)]
+
+    node_events = [data for event, data in events if event == "node"]
+    assert node_events[0] == {"node": "router", "status": "started"}
+    assert {"node": "compose_response", "status": "completed"} in node_events
+
+    tokens = [data["content"] for event, data in events if event == "token"]
+    assert len(tokens) > 1
+    assert "".join(tokens) == "Hi there, how can I help?"
+
+    # The final state is available from the checkpointer for the last event
+    snapshot = await graph.aget_state(config)
+    assert snapshot.values["ai_response"] == "Hi there, how can I help?"
+
+
+def test_format_sse():
+    """Events are framed as 'event:' + JSON 'data:' lines."""
+    frame = format_sse("token", {"content": "Hi"})
+    assert frame.startswith("event: token\n")
+    assert frame.endswith("\n\n")
+    assert json.loads(frame.split("data: ", 1)[1]) == {"content": "Hi"}
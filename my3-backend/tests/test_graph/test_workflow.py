@@ -1,11 +1,18 @@
 """
-Pytest tests for LangGraph workflow.
+Pytest tests for LangGraph workflow plumbing.
 
-Tests the complete workflow including:
+Runs the complete workflow for:
 - Gift search flow
 - Add recipient flow
 - Existing recipient flow
 - Casual chat flow
+
+By default LLM calls replay canned benchmarks/openai_stub.py replies
+(tests/cassettes/stub_llm.json), so these tests check routing, state hand-off and
+structured-output parsing only. Intents come from the local fast path or the
+stub's keyword match, not from the model; they are not evidence of classification
+or gift quality. Record tests/cassettes/llm.json with a real OPENAI_API_KEY to
+check model behaviour (see README "Development").
 """
 
 import pytest
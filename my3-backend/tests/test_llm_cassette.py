@@ -0,0 +1,90 @@
+"""
+Pytest tests for LLM record/replay cassettes.
+"""
+
+import pytest
+from langchain_core.messages import AIMessage, HumanMessage, SystemMessage
+from pydantic import BaseModel
+
+from app.utils.llm import LLMUsage, _llm_usage, llm_usage_handler
+from app.utils.llm_cassette import Cassette, CassetteChatModel, CassetteMissError
+
+USAGE = {"input_tokens": 40, "output_tokens": 8, "total_tokens": 48}
+PROMPT = [SystemMessage(content="Classify."), HumanMessage(content="gift for mom")]
+
+
+class Intent(BaseModel):
+    intent: str
+    confidence: float
+
+
+class ScriptedLLM:
+    """Stands in for ChatOpenAI while recording."""
+
+    def __init__(self):
+        self.calls = 0
+
+    async def ainvoke(self, messages):
+        self.calls += 1
+        return AIMessage(content="Hello there, friend", usage_metadata=USAGE)
+
+    def with_structured_output(self, schema, include_raw=False):
+        llm = self
+
+        class Structured:
+            async def ainvoke(self, messages):
+                llm.calls += 1
+                raw = AIMessage(content="", usage_metadata=USAGE)
+                return {"raw": raw, "parsed": schema(intent="gift_search", confidence=0.9), "parsing_error": None}
+
+        return Structured()
+
+
+def _model(cassette, mode, live=None):
+    return CassetteChatModel(
+        model_name="gpt-4", temperature=0.3, mode=mode, cassette=cassette, live=live,
+        callbacks=[llm_usage_handler]
+    )
+
+
+async def test_recorded_replies_replay_without_the_live_model(tmp_path):
+    """Chat and structured replies round-trip through the cassette file."""
+    path = str(tmp_path / "llm.json")
+    live = ScriptedLLM()
+    recorder = _model(Cassette(path), "record", live)
+    assert (await recorder.ainvoke(PROMPT)).content == "Hello there, friend"
+    assert await recorder.with_structured_output(Intent).ainvoke(PROMPT) == Intent(intent="gift_search", confidence=0.9)
+    assert live.calls == 2
+
+    player = _model(Cassette(path), "replay")
+    usage = LLMUsage()
+    token = _llm_usage.set(usage)
+    try:
+        message = await player.ainvoke(PROMPT)
+        intent = await player.with_structured_output(Intent).ainvoke(PROMPT)
+    finally:
+        _llm_usage.reset(token)
+
+    assert message.content == "Hello there, friend"
+    assert intent.intent == "gift_search"
+    assert (usage.calls, usage.prompt_tokens, usage.completion_tokens) == (2, 80, 16)
+
+
+async def test_replay_streams_the_recorded_reply(tmp_path):
+    """Streaming replays the reply in chunks, carrying usage on the last one."""
+    cassette = Cassette(str(tmp_path / "llm.json"))
+    await _model(cassette, "record", ScriptedLLM()).ainvoke(PROMPT)
+
+    chunks = [chunk async for chunk in _model(cassette, "replay").astream(PROMPT)]
+    assert "".join(chunk.content for chunk in chunks) == "Hello there, friend"
+    assert len([chunk for chunk in chunks if chunk.content]) == 3
+    assert sum(chunk.usage_metadata["input_tokens"] for chunk in chunks if chunk.usage_metadata) == 40
+
+
+async def test_unrecorded_prompt_is_a_miss(tmp_path):
+    """A changed prompt fails loudly instead of reaching the network."""
+    cassette = Cassette(str(tmp_path / "llm.json"))
+    await _model(cassette, "record", ScriptedLLM()).ainvoke(PROMPT)
+
+    with pytest.raises(CassetteMissError):
+        await _model(cassette, "replay").ainvoke([HumanMessage(content="something else")])
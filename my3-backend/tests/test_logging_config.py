@@ -0,0 +1,77 @@
+"""
+Pytest tests for queue-based logging: redaction, sampling and the non-blocking handler.
+"""
+
+import logging
+import queue
+
+from langchain_core.messages import HumanMessage
+
+from app.graph import nodes
+from app.utils.logging_config import NonBlockingQueueHandler, SamplingFilter, build_formatter, parse_sample_rates, redact
+
+
+def _record(name="app.graph.nodes", level=logging.INFO, msg="line %s", args=("x",)):
+    return logging.LogRecord(name, level, __file__, 1, msg, args, None)
+
+
+def test_pii_is_redacted():
+    """Emails, tokens, phone numbers and street addresses are masked; dates and ids are not."""
+    text = redact(
+        "jane.doe@example.com sent Bearer eyJhbGciOi.eyJzdWIi.c2lnbmF0dXJl from 415-555-1234, "
+        "ships to 42 Oak Avenue on 2026-10-17 (conversation 7f3e2a10)"
+    )
+    assert text == "<email> sent Bearer <token> from <phone>, ships to <address> on 2026-10-17 (conversation 7f3e2a10)"
+
+
+def test_sampling_keeps_one_in_n_verbose_lines():
+    """Sampled loggers keep every Nth INFO record; warnings and other loggers always pass."""
+    sampler = SamplingFilter(parse_sample_rates("app.graph=0.25, app.api.routes.chat=0"))
+    kept = [sampler.filter(_record()) for _ in range(8)]
+    assert kept.count(True) == 2
+    assert sampler.filter(_record(level=logging.WARNING))
+    assert not sampler.filter(_record(name="app.api.routes.chat"))
+    assert sampler.filter(_record(name="app.services.user_context"))
+    assert sampler.sampled == 7
+
+
+def test_handler_drops_instead_of_blocking():
+    """A full queue drops records rather than waiting, and records are enqueued unformatted."""
+    handler = NonBlockingQueueHandler(queue.Queue(maxsize=1))
+    first = _record()
+    handler.handle(first)
+    handler.handle(_record())
+
+    assert handler.dropped == 1
+    queued = handler.queue.get_nowait()
+    assert queued is first
+    assert (queued.msg, queued.args) == ("line %s", ("x",))
+
+
+def test_formatter_renders_json_with_redaction():
+    """The listener-side formatter builds the message and redacts it."""
+    formatter = build_formatter(json_output=True, redact_output=True)
+    output = formatter.format(_record(msg="login for %s", args=("sam@example.com",)))
+    assert '"event": "login for <email>"' in output
+    assert '"logger": "app.graph.nodes"' in output
+
+
+async def test_node_logs_carry_no_message_or_person_values(monkeypatch, caplog):
+    """Graph nodes log intents, counts and field names, never the message or extracted values."""
+    class FakeStructuredLLM:
+        async def ainvoke(self, messages):
+            return nodes.IntentAndPersonInfo(
+                intent="add_recipient", confidence=0.9, name="Ritika", relationship="mom", interests=["old hindi music"]
+            )
+
+    monkeypatch.setattr(nodes, "get_structured_llm", lambda schema, **kwargs: FakeStructuredLLM())
+    state = {"messages": [HumanMessage(content="Ritika is my mother, she loves old hindi music")], "user_recipients": []}
+
+    with caplog.at_level(logging.DEBUG, logger="app.graph.nodes"):
+        update = await nodes.classify_and_extract_node(state)
+        await nodes.extract_person_node(state)
+        await nodes.compose_response_node({**state, **update, "recipient_exists": False})
+
+    logged = "\n".join(record.getMessage() for record in caplog.records)
+    assert "person fields: name,relationship,interests" in logged
+    assert "Ritika" not in logged and "hindi" not in logged
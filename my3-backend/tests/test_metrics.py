@@ -0,0 +1,68 @@
+"""
+Pytest tests for the Prometheus metrics endpoint and request/DB instrumentation.
+"""
+
+from fastapi.testclient import TestClient
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from app.main import app
+from app.utils import metrics
+from app.utils.metrics import MetricsRegistry, instrument_engine
+
+client = TestClient(app)
+
+
+def test_histogram_renders_cumulative_buckets():
+    """Buckets are cumulative with a +Inf bucket, _sum and _count per label set."""
+    registry = MetricsRegistry()
+    histogram = registry.histogram("demo_seconds", "Demo", ("route",), buckets=(0.1, 1.0))
+    histogram.observe(0.05, "/a")
+    histogram.observe(0.5, "/a")
+    histogram.observe(5, "/a")
+    registry.counter("demo_total", "Demo", ("kind",)).inc("x", amount=3)
+
+    output = registry.render()
+    assert 'demo_seconds_bucket{route="/a",le="0.1"} 1' in output
+    assert 'demo_seconds_bucket{route="/a",le="1"} 2' in output
+    assert 'demo_seconds_bucket{route="/a",le="+Inf"} 3' in output
+    assert 'demo_seconds_count{route="/a"} 3' in output
+    assert 'demo_total{kind="x"} 3' in output
+    assert "# TYPE demo_seconds histogram" in output
+
+
+def test_requests_are_recorded_by_route_template():
+    """Latency is labelled by route template and status; component counters are exported."""
+    before = metrics.REQUEST_DURATION.count("GET", "/", "200")
+    client.get("/")
+    client.get("/no/such/path")
+    assert metrics.REQUEST_DURATION.count("GET", "/", "200") == before + 1
+
+    response = client.get("/api/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+    body = response.text
+    assert 'http_request_duration_seconds_count{method="GET",route="/",status="200"}' in body
+    assert 'route="unmatched",status="404"' in body
+    assert 'http_requests_in_flight{method="GET"}' in body
+    assert 'cache_hits_total{cache="user_context"}' in body
+    assert 'background_jobs_total{outcome="retried"}' in body
+    assert "password_hasher_completed_total" in body
+
+
+async def test_queries_are_charged_to_the_current_request():
+    """Cursor events add query time and count to the request's DB accumulator."""
+    engine = create_async_engine("sqlite+aiosqlite:///:memory:")
+    instrument_engine(engine.sync_engine)
+    db = [0.0, 0]
+    token = metrics._request_db.set(db)
+    try:
+        async with engine.connect() as conn:
+            await conn.execute(text("SELECT 1"))
+            await conn.execute(text("SELECT 2"))
+    finally:
+        metrics._request_db.reset(token)
+        await engine.dispose()
+
+    assert db[1] == 2
+    assert db[0] > 0
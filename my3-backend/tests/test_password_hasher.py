@@ -0,0 +1,70 @@
+"""
+Pytest tests for off-loop password hashing.
+"""
+
+import asyncio
+import threading
+
+import pytest
+from passlib.context import CryptContext
+
+from app.utils.auth import PasswordHasher, PasswordHasherBusyError
+
+
+def make_hasher(rounds: int, **kwargs) -> PasswordHasher:
+    context = CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=rounds)
+    return PasswordHasher(context=context, **kwargs)
+
+
+@pytest.mark.asyncio
+async def test_hash_and_verify_run_off_loop():
+    """Hashing happens on the pool thread, not the event loop thread."""
+    hasher = make_hasher(4)
+    loop_thread = threading.get_ident()
+    threads = []
+    original_hash = hasher.context.hash
+
+    def recording_hash(password):
+        threads.append(threading.get_ident())
+        return original_hash(password)
+
+    hasher.context.hash = recording_hash
+    hashed = await hasher.hash("correct horse")
+
+    assert threads and threads[0] != loop_thread
+    assert await hasher.verify_and_update("correct horse", hashed) == (True, None)
+    assert (await hasher.verify_and_update("wrong", hashed))[0] is False
+    assert hasher.stats()["completed"] == 3
+    hasher.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_outdated_cost_is_rehashed_on_login():
+    """A hash made with fewer rounds than configured is upgraded after a valid login."""
+    old_hash = await make_hasher(4).hash("correct horse")
+    hasher = make_hasher(5)
+
+    valid, new_hash = await hasher.verify_and_update("correct horse", old_hash)
+
+    assert valid
+    assert new_hash.startswith("$2b$05$")
+    assert hasher.stats()["rehashed"] == 1
+    hasher.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_queue_limit_rejects_bursts():
+    """Operations beyond max_queue are rejected instead of queued."""
+    hasher = make_hasher(4, max_workers=1, max_queue=1)
+    release = threading.Event()
+    hasher.context.hash = lambda password: release.wait(5) and "hashed"
+
+    first = asyncio.ensure_future(hasher.hash("one"))
+    await asyncio.sleep(0.05)
+    with pytest.raises(PasswordHasherBusyError):
+        await hasher.hash("two")
+
+    release.set()
+    assert await first == "hashed"
+    assert hasher.stats()["rejected"] == 1
+    hasher.shutdown()
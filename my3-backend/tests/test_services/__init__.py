@@ -0,0 +1,2 @@
+# Test services module
+
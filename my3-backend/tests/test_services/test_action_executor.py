@@ -0,0 +1,169 @@
+"""
+Pytest tests for the batched confirm_action executor.
+"""
+
+import uuid
+from datetime import date
+from types import SimpleNamespace
+
+import pytest
+
+from app.database.models import Occasion, Recipient, RecipientRelationship
+from app.services.action_executor import execute_action_plan, plan_actions
+from app.utils.occasion_dates import parse_occasion_date
+
+USER_ID = uuid.uuid4()
+
+
+class RecordingSession:
+    """Stands in for AsyncSession; records every statement sent to the database."""
+
+    bind = None
+
+    def __init__(self, existing):
+        self.existing = existing
+        self.statements = []
+
+    async def execute(self, statement, params=None):
+        self.statements.append(statement)
+        if statement.is_select and statement.column_descriptions[0]["entity"] is Recipient:
+            return SimpleNamespace(scalars=lambda: SimpleNamespace(all=lambda: self.existing))
+        return SimpleNamespace(all=lambda: [])
+
+    async def scalars(self, statement, params):
+        self.statements.append(statement)
+        model = {"recipients": Recipient, "occasions": Occasion}.get(statement.table.name)
+        rows = [model(**p) for p in params] if model else [p["id"] for p in params]
+        return SimpleNamespace(all=lambda: rows)
+
+    async def flush(self):
+        self.statements.append("flush")
+
+    async def commit(self):
+        pass
+
+    def expunge(self, instance):
+        pass
+
+
+def _recipient(name):
+    return Recipient(id=uuid.uuid4(), user_id=USER_ID, name=name, interests=[], constraints=[])
+
+
+@pytest.mark.asyncio
+async def test_confirmation_is_a_handful_of_statements():
+    """Recipient + occasion + two secondary contacts + two relationships in 5 statements."""
+    ritika, anil = _recipient("Ritika"), _recipient("Anil")
+    actions = [
+        {"type": "create_recipient", "data": {"name": "Priya", "relationship": "friend"},
+         "occasion_data": {"name": "Birthday", "date": "2030-04-16"}},
+        {"type": "create_secondary_contact", "primary_recipient_id": str(ritika.id),
+         "secondary_contact": {"name": "Archana", "relationship_type": "wife"}},
+        {"type": "create_secondary_contact", "primary_recipient_id": str(ritika.id),
+         "secondary_contact": {"name": "Dev", "relationship_type": "son"}},
+        {"type": "create_relationship", "from_recipient_id": str(ritika.id),
+         "to_recipient_id": str(anil.id), "relationship_type": "brother"},
+    ]
+    db = RecordingSession([ritika, anil])
+
+    result = await execute_action_plan(db, USER_ID, actions)
+
+    # recipients lookup, relationship pairs lookup, then one INSERT per table
+    assert len(db.statements) == 5
+    assert len(result.created_recipient_ids) == 3
+    assert len(result.created_occasion_ids) == 1
+    assert len(result.created_relationship_ids) == 3
+    assert result.recipient["name"] == "Priya"
+    assert result.occasion["date"] == "2030-04-16"
+
+
+@pytest.mark.asyncio
+async def test_addresses_are_queued_not_validated_inline(monkeypatch):
+    """A new address marks the recipient pending and queues one validation job in the same transaction."""
+    async def fail_validate(*args, **kwargs):
+        raise AssertionError("validate_address must not run on the confirm path")
+
+    monkeypatch.setattr("app.services.address_validator.validate_address", fail_validate)
+    actions = [{"type": "create_recipient", "data": {
+        "name": "Priya", "street_address": "1 Main St", "city": "Springfield", "state_province": "IL"
+    }}]
+    db = RecordingSession([])
+
+    result = await execute_action_plan(db, USER_ID, actions)
+
+    assert result.queued_jobs == 1
+    assert result.recipient["address_validation_status"] == "pending"
+    assert [getattr(s, "table", None) is not None and s.table.name for s in db.statements][-1] == "background_jobs"
+
+
+def test_duplicate_create_merges_into_existing():
+    """create_recipient for an existing name becomes an update, not an insert."""
+    ritika = _recipient("Ritika")
+    plan = plan_actions(
+        [{"type": "create_recipient", "data": {"name": "ritika", "interests": ["music"], "notes": "Loves tea"}}],
+        USER_ID,
+        [ritika]
+    )
+    assert plan.new_recipients == []
+    assert plan.recipient_updates[ritika.id] == {"interests": ["music"], "notes": "Loves tea"}
+    assert plan.summary_recipient_id == ritika.id
+
+
+def test_bidirectional_relationship_adds_reverse_row():
+    """Spouse relationships produce both directions."""
+    ritika, anil = _recipient("Ritika"), _recipient("Anil")
+    plan = plan_actions(
+        [{"type": "create_relationship", "from_recipient_id": str(ritika.id), "to_recipient_id": str(anil.id),
+          "relationship_type": "wife", "is_bidirectional": True}],
+        USER_ID,
+        [ritika, anil]
+    )
+    assert [(r["from_recipient_id"], r["relationship_type"]) for r in plan.new_relationships] == [
+        (ritika.id, "wife"), (anil.id, "husband")
+    ]
+
+
+def test_parse_occasion_date_resolves_next_occurrence():
+    """Natural language month/day dates resolve to their next occurrence."""
+    today = date(2024, 6, 1)
+    assert parse_occasion_date("April 16", today) == date(2025, 4, 16)
+    assert parse_occasion_date("June 30th", today) == date(2024, 6, 30)
+    assert parse_occasion_date("2024-11-01", today) == date(2024, 11, 1)
+    assert parse_occasion_date("someday", today) is None
+
+
+def _with_address(name, street, city, status="valid"):
+    recipient = _recipient(name)
+    recipient.street_address, recipient.city, recipient.state_province = street, city, "IL"
+    recipient.postal_code = recipient.country = None
+    recipient.address_validation_status = status
+    return recipient
+
+
+@pytest.mark.asyncio
+async def test_resubmitted_address_keeps_its_validation():
+    """Re-sending an already validated address (or one differing only in case/punctuation) queues nothing."""
+    priya = _with_address("Priya", "1 Main St.", "Springfield")
+    actions = [
+        {"type": "update_recipient", "recipient_id": str(priya.id), "data": {
+            "street_address": "1 main st", "city": "Springfield", "state_province": "IL", "notes": "Loves tea"
+        }},
+        {"type": "create_recipient", "data": {"name": "Priya", "notes": "Vegetarian"}},
+    ]
+    db = RecordingSession([priya])
+
+    result = await execute_action_plan(db, USER_ID, actions)
+
+    assert result.queued_jobs == 0
+    assert priya.address_validation_status == "valid"
+    assert "background_jobs" not in [getattr(s, "table", None) is not None and s.table.name for s in db.statements]
+
+
+def test_changed_address_is_checked_even_when_changed_back():
+    """Each update that changes the address, including back to an earlier one, queues a check."""
+    priya = _with_address("Priya", "1 Main St", "Springfield")
+    update = lambda street: {"type": "update_recipient", "recipient_id": str(priya.id), "data": {"street_address": street}}
+
+    assert plan_actions([update("9 Elm St")], USER_ID, [priya]).address_checks[0].recipient_id == priya.id
+    plan = plan_actions([update("9 Elm St"), update("1 Main St")], USER_ID, [priya])
+    assert [check.recipient_id for check in plan.address_checks] == [priya.id, priya.id]
@@ -0,0 +1,109 @@
+"""
+Pytest tests for address validation caching and in-flight de-duplication.
+"""
+
+import asyncio
+
+import httpx
+import pytest
+
+from app.services import address_validator
+from app.services.address_validator import AddressResultCache, normalize_address_key, validate_address
+
+VALIDATED = {
+    "validated": True,
+    "normalized_address": {"formatted_address": "1 Main St, Springfield, IL"},
+    "status": "validated",
+    "error": None
+}
+
+
+@pytest.fixture
+def provider(monkeypatch):
+    """Fake provider plus in-memory stand-ins for the address_validations table."""
+    calls = []
+    table = {}
+    results = {"next": VALIDATED}
+
+    async def fake_validate(street, city, state, postal_code, country):
+        calls.append((street, city))
+        await asyncio.sleep(0.05)
+        return results["next"]
+
+    async def fake_load(key):
+        return (table[key], 3600) if key in table else None
+
+    async def fake_store(key, result, ttl_seconds):
+        table[key] = result
+
+    monkeypatch.setattr(address_validator, "_validate_uncached", fake_validate)
+    monkeypatch.setattr(address_validator, "_load_cached_result", fake_load)
+    monkeypatch.setattr(address_validator, "_store_cached_result", fake_store)
+    monkeypatch.setattr(address_validator, "address_result_cache", AddressResultCache())
+    monkeypatch.setattr(address_validator.settings, "enable_address_validation", True)
+    return calls, table, results
+
+
+def test_key_ignores_case_punctuation_and_spacing():
+    """Formatting differences map to the same cache entry."""
+    assert normalize_address_key("1 Main St.", "Springfield", "IL") == normalize_address_key(" 1  main st ", "SPRINGFIELD", "il")
+    assert normalize_address_key("1 Main St", "Springfield") != normalize_address_key("2 Main St", "Springfield")
+
+
+@pytest.mark.asyncio
+async def test_concurrent_lookups_share_one_provider_call(provider):
+    """A burst of identical validations makes one provider call; repeats are free."""
+    calls, table, _ = provider
+
+    results = await asyncio.gather(*[validate_address("1 Main St", "Springfield", "IL") for _ in range(5)])
+    assert calls == [("1 Main St", "Springfield")]
+    assert all(result == VALIDATED for result in results)
+    assert len(table) == 1
+
+    assert await validate_address("1 main st.", "springfield", "IL") == VALIDATED
+    assert len(calls) == 1
+
+
+@pytest.mark.asyncio
+async def test_persisted_results_are_used_after_restart(provider, monkeypatch):
+    """A result stored by another worker is served without calling the provider."""
+    calls, table, _ = provider
+    await validate_address("1 Main St", "Springfield", "IL")
+    monkeypatch.setattr(address_validator, "address_result_cache", AddressResultCache())
+
+    assert await validate_address("1 Main St", "Springfield", "IL") == VALIDATED
+    assert len(calls) == 1
+
+
+@pytest.mark.asyncio
+async def test_timeouts_are_not_cached(provider):
+    """Transient failures go back to the provider next time."""
+    calls, table, results = provider
+    results["next"] = {"validated": False, "normalized_address": None, "status": "unvalidated", "error": "Validation timeout"}
+
+    await validate_address("1 Main St", "Springfield")
+    await validate_address("1 Main St", "Springfield")
+    assert len(calls) == 2
+    assert table == {}
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("status,cacheable", [
+    ("ZERO_RESULTS", True),
+    ("OVER_QUERY_LIMIT", False),
+    ("REQUEST_DENIED", False),
+    ("INVALID_REQUEST", False),
+    ("UNKNOWN_ERROR", False),
+])
+async def test_only_zero_results_is_a_cacheable_google_miss(monkeypatch, status, cacheable):
+    """Quota and key errors from Google are retried, not stored as a missing address."""
+    transport = httpx.MockTransport(lambda request: httpx.Response(200, json={"status": status, "results": []}))
+    client = httpx.AsyncClient(transport=transport)
+    monkeypatch.setattr(address_validator, "get_address_client", lambda: client)
+    try:
+        result = await address_validator._validate_with_google_maps("1 Main St", "Springfield")
+    finally:
+        await client.aclose()
+
+    assert result["validated"] is False
+    assert address_validator._is_cacheable(result) is cacheable
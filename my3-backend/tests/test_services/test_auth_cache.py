@@ -0,0 +1,94 @@
+"""
+Pytest tests for the verified token cache used by get_current_user.
+"""
+
+import time
+import uuid
+from types import SimpleNamespace
+
+import pytest
+
+from app.api import dependencies
+from app.services.auth_cache import CurrentUser, TokenCache, hash_token
+from app.utils.auth import create_access_token
+
+
+def _principal():
+    return CurrentUser(id=uuid.uuid4(), email="a@example.com", name="A")
+
+
+def test_entry_expires_with_token():
+    """Entries never outlive the token's exp claim."""
+    cache = TokenCache(ttl_seconds=300)
+    principal = _principal()
+    cache.put("t1", principal, cache.version(str(principal.id)), token_exp=time.time() - 1)
+    assert cache.get("t1") is None
+
+
+def test_invalidate_user_drops_all_tokens():
+    """Deleting a user drops every cached token and rejects in-flight loads."""
+    cache = TokenCache()
+    principal = _principal()
+    user_id = str(principal.id)
+    stale_version = cache.version(user_id)
+    cache.put("t1", principal, stale_version)
+    cache.put("t2", principal, stale_version)
+
+    cache.invalidate_user(user_id)
+
+    assert cache.get("t1") is None and cache.get("t2") is None
+    assert cache.put("t3", principal, stale_version) is False
+
+
+def test_invalidated_user_versions_are_bounded():
+    """Deleted users do not pile up version stamps; a dropped one still rejects stale loads."""
+    cache = TokenCache(max_entries=2)
+    principal = _principal()
+    user_id = str(principal.id)
+    stale_version = cache.version(user_id)
+
+    cache.invalidate_user(user_id)
+    for _ in range(5):
+        cache.invalidate_user(str(uuid.uuid4()))
+
+    assert len(cache._versions) == 2
+    assert cache.put("t1", principal, stale_version) is False
+    assert cache.put("t1", principal, cache.version(user_id)) is True
+
+
+def test_lru_bound():
+    """The cache never holds more than max_entries tokens."""
+    cache = TokenCache(max_entries=2)
+    for key in ("t1", "t2", "t3"):
+        principal = _principal()
+        cache.put(key, principal, 0)
+    assert cache.get("t1") is None
+    assert cache.get("t3") is not None
+
+
+class CountingSession:
+    """Stands in for AsyncSession; counts users lookups."""
+
+    def __init__(self, row):
+        self.row = row
+        self.queries = 0
+
+    async def execute(self, statement):
+        self.queries += 1
+        return SimpleNamespace(one_or_none=lambda: self.row)
+
+
+@pytest.mark.asyncio
+async def test_repeat_requests_skip_db(monkeypatch):
+    """Only the first request with a token queries the users table."""
+    monkeypatch.setattr(dependencies, "token_cache", TokenCache())
+    user_id = uuid.uuid4()
+    token = create_access_token({"sub": str(user_id)})
+    db = CountingSession(SimpleNamespace(id=user_id, email="a@example.com", name="A"))
+
+    first = await dependencies.get_current_user(token=token, db=db)
+    second = await dependencies.get_current_user(token=token, db=db)
+
+    assert first == second and first.id == user_id
+    assert db.queries == 1
+    assert hash_token(token) != token
@@ -0,0 +1,85 @@
+"""
+Pytest tests for the gift-idea result cache.
+"""
+
+import pytest
+from langchain_core.messages import HumanMessage
+
+from app.graph import nodes
+from app.services import gift_cache as gift_cache_module
+from app.services.gift_cache import GiftIdeaCache, gift_cache_key
+
+
+class FakeGiftLLM:
+    """Counts calls and returns one canned gift idea."""
+
+    def __init__(self):
+        self.calls = 0
+
+    async def ainvoke(self, messages):
+        self.calls += 1
+        return nodes.GiftIdeasList(gift_ideas=[nodes.GiftIdea(
+            title=f"Gift {self.calls}",
+            description="A thoughtful gift",
+            personalized_reason="Matches their interests",
+            price="$50",
+            category="home",
+        )])
+
+
+def test_key_ignores_order_case_and_whitespace():
+    """Equivalent contexts share a key; any real change gives a new one."""
+    base = {"name": "Ritika", "relationship": "mom", "interests": ["Gardening", "music"]}
+    same = {"name": " ritika ", "relationship": "Mom", "interests": ["music", "gardening "]}
+    assert gift_cache_key(base, None, "prompt") == gift_cache_key(same, None, "prompt")
+    assert gift_cache_key(base, None, "prompt") != gift_cache_key({**base, "age_band": "60s"}, None, "prompt")
+    assert gift_cache_key(base, None, "prompt") != gift_cache_key(base, {"name": "Anil"}, "prompt")
+    assert gift_cache_key(base, None, "prompt") != gift_cache_key(base, None, "other prompt")
+
+
+def test_ttl_and_lru_eviction(monkeypatch):
+    """Entries expire after the TTL and the least recently used entry is evicted first."""
+    now = [1000.0]
+    monkeypatch.setattr(gift_cache_module.time, "monotonic", lambda: now[0])
+    cache = GiftIdeaCache(max_entries=2, ttl_seconds=60)
+    cache.put("a", [{"title": "A"}])
+    cache.put("b", [{"title": "B"}])
+    assert cache.get("a") == [{"title": "A"}]
+    cache.put("c", [{"title": "C"}])
+    assert cache.get("b") is None
+    assert cache.get("a") is not None
+
+    now[0] += 61
+    assert cache.get("a") is None
+
+
+def test_returned_ideas_are_copies():
+    """Mutating a returned list (e.g. image enrichment) doesn't change the cached entry."""
+    cache = GiftIdeaCache()
+    cache.put("k", [{"title": "A", "image_url": None}])
+    cache.get("k")[0]["image_url"] = "https://example.com/a.jpg"
+    assert cache.get("k")[0]["image_url"] is None
+
+
+@pytest.mark.asyncio
+async def test_generate_gifts_reuses_cache_unless_regenerate(monkeypatch):
+    """Repeat requests skip the LLM; regenerate calls it again and replaces the entry."""
+    fake = FakeGiftLLM()
+    monkeypatch.setattr(nodes, "get_structured_llm", lambda schema, **kwargs: fake)
+    monkeypatch.setattr(nodes, "gift_idea_cache", GiftIdeaCache())
+    state = {
+        "messages": [HumanMessage(content="Gift ideas for my mom")],
+        "detected_person": {"name": "Ritika", "relationship": "mom", "interests": ["gardening"]},
+        "user_recipients": [],
+        "user_occasions": [],
+    }
+
+    first = await nodes.generate_gifts_node(state)
+    second = await nodes.generate_gifts_node(state)
+    assert fake.calls == 1
+    assert second["gift_ideas"] == first["gift_ideas"]
+
+    regenerated = await nodes.generate_gifts_node({**state, "regenerate": True})
+    assert fake.calls == 2
+    assert regenerated["gift_ideas"][0]["title"] == "Gift 2"
+    assert (await nodes.generate_gifts_node(state))["gift_ideas"][0]["title"] == "Gift 2"
@@ -0,0 +1,101 @@
+"""
+Pytest tests for concurrent gift image enrichment.
+"""
+
+import asyncio
+import time
+
+import httpx
+import pytest
+
+from app.services import image_extractor
+from app.services.image_extractor import ImageFetcher, ImageURLCache, enrich_gift_images, extract_og_image
+
+HEAD = b'<html><head><meta property="og:image" content="/img/product.jpg"></head>'
+
+
+class ChunkStream(httpx.AsyncByteStream):
+    """Response body delivered in chunks, recording how many were read."""
+
+    def __init__(self, chunks, delay: float = 0):
+        self.chunks = chunks
+        self.delay = delay
+        self.read = 0
+
+    async def __aiter__(self):
+        for chunk in self.chunks:
+            if self.delay:
+                await asyncio.sleep(self.delay)
+            self.read += 1
+            yield chunk
+
+
+@pytest.fixture
+def transport(monkeypatch):
+    """Route the pooled fetcher through a mock transport and start with an empty cache."""
+    routes = {}
+    requests = []
+
+    async def handler(request: httpx.Request):
+        requests.append(str(request.url))
+        return routes[str(request.url)]()
+
+    fetcher = ImageFetcher()
+    fetcher.client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    monkeypatch.setattr(image_extractor, "get_image_fetcher", lambda: fetcher)
+    monkeypatch.setattr(image_extractor, "image_url_cache", ImageURLCache())
+    yield routes, requests
+
+
+@pytest.mark.asyncio
+async def test_stops_reading_at_end_of_head(transport):
+    """The body after </head> is never downloaded."""
+    routes, _ = transport
+    body = ChunkStream([HEAD[:40], HEAD[40:], b"<body>" + b"x" * 100000, b"</body></html>"])
+    routes["https://shop.example/p/1"] = lambda: httpx.Response(200, headers={"content-type": "text/html"}, stream=body)
+
+    image = await extract_og_image("https://shop.example/p/1")
+
+    assert image == "https://shop.example/img/product.jpg"
+    assert body.read == 2
+
+
+@pytest.mark.asyncio
+async def test_results_and_missing_pages_are_cached(transport):
+    """Found images and 404s are answered from the cache on repeat lookups."""
+    routes, requests = transport
+    routes["https://shop.example/p/1"] = lambda: httpx.Response(200, headers={"content-type": "text/html"}, content=HEAD)
+    routes["https://shop.example/gone"] = lambda: httpx.Response(404)
+
+    for _ in range(2):
+        assert await extract_og_image("https://shop.example/p/1") == "https://shop.example/img/product.jpg"
+        assert await extract_og_image("https://shop.example/gone") is None
+
+    assert requests == ["https://shop.example/p/1", "https://shop.example/gone"]
+
+
+@pytest.mark.asyncio
+async def test_enrichment_runs_concurrently_under_deadline(transport):
+    """Five pages cost one parallel wait; pages past the deadline are skipped."""
+    routes, _ = transport
+    for i in range(4):
+        routes[f"https://shop{i}.example/p"] = lambda: httpx.Response(
+            200, headers={"content-type": "text/html"}, stream=ChunkStream([HEAD], delay=0.2)
+        )
+    routes["https://slow.example/p"] = lambda: httpx.Response(
+        200, headers={"content-type": "text/html"}, stream=ChunkStream([HEAD], delay=5)
+    )
+    gift_ideas = [{"title": f"Gift {i}", "url": f"https://shop{i}.example/p", "image_url": None} for i in range(4)]
+    gift_ideas.append({"title": "Slow", "url": "https://slow.example/p", "image_url": None})
+    gift_ideas.append({"title": "Has image", "url": "https://slow.example/p", "image_url": "https://cdn.example/a.jpg"})
+
+    start = time.perf_counter()
+    await enrich_gift_images(gift_ideas, deadline=1.0)
+    elapsed = time.perf_counter() - start
+
+    assert elapsed < 1.5
+    assert [idea["image_url"] for idea in gift_ideas[:4]] == [
+        f"https://shop{i}.example/img/product.jpg" for i in range(4)
+    ]
+    assert gift_ideas[4]["image_url"] is None
+    assert gift_ideas[5]["image_url"] == "https://cdn.example/a.jpg"
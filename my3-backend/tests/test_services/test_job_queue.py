@@ -0,0 +1,112 @@
+"""
+Pytest tests for the database-backed background job queue.
+
+Runs against an in-memory SQLite database holding only the background_jobs table.
+"""
+
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.pool import StaticPool
+
+from app.database.models import BackgroundJob
+from app.services import job_queue
+from app.services.job_queue import JobRunner, backoff_seconds, enqueue_job, enqueue_jobs
+
+
+@pytest.fixture
+async def session_factory():
+    engine = create_async_engine("sqlite+aiosqlite:///:memory:", poolclass=StaticPool)
+    async with engine.begin() as conn:
+        await conn.run_sync(BackgroundJob.__table__.create)
+    yield async_sessionmaker(engine, expire_on_commit=False)
+    await engine.dispose()
+
+
+@pytest.fixture
+def handled(monkeypatch):
+    """Register a test handler that fails while payload["fail"] is set."""
+    calls = []
+
+    async def handler(session, payload):
+        calls.append(payload)
+        if payload.get("fail"):
+            raise RuntimeError("provider timeout")
+
+    monkeypatch.setitem(job_queue._handlers, "test_job", handler)
+    return calls
+
+
+async def _jobs(session_factory):
+    async with session_factory() as session:
+        return (await session.execute(select(BackgroundJob))).scalars().all()
+
+
+async def test_enqueue_is_idempotent_and_jobs_run_once(session_factory, handled):
+    """The same job key is queued once; a worker runs it and marks it done."""
+    async with session_factory() as session:
+        await enqueue_job(session, "test_job", {"n": 1}, job_key="test:1")
+        await enqueue_job(session, "test_job", {"n": 1}, job_key="test:1")
+        await session.commit()
+
+    runner = JobRunner(session_factory=session_factory)
+    assert await runner.run_once() is True
+    assert await runner.run_once() is False
+
+    jobs = await _jobs(session_factory)
+    assert len(jobs) == 1
+    assert jobs[0].status == "done"
+    assert [call["n"] for call in handled] == [1]
+
+
+async def test_failures_back_off_then_fail_permanently(session_factory, handled):
+    """Failed jobs are rescheduled with backoff and marked failed after max_attempts."""
+    async with session_factory() as session:
+        await enqueue_job(session, "test_job", {"fail": True}, job_key="test:fail", max_attempts=2)
+        await session.commit()
+    runner = JobRunner(session_factory=session_factory)
+
+    assert await runner.run_once() is True
+    job = (await _jobs(session_factory))[0]
+    assert (job.status, job.attempts) == ("pending", 1)
+    assert "provider timeout" in job.last_error
+    # Not due again until the backoff has passed
+    assert await runner.run_once() is False
+
+    async with session_factory() as session:
+        await session.execute(update(BackgroundJob).values(run_after=datetime.now(timezone.utc) - timedelta(seconds=1)))
+        await session.commit()
+    assert await runner.run_once() is True
+    job = (await _jobs(session_factory))[0]
+    assert (job.status, job.attempts) == ("failed", 2)
+    assert [call["_final_attempt"] for call in handled] == [False, True]
+
+
+async def test_rearm_resets_finished_jobs_only(session_factory, handled):
+    """rearm_finished runs a done job again; a job still pending is not touched."""
+    spec = {"kind": "test_job", "payload": {"n": 1}, "job_key": "test:rearm"}
+    async with session_factory() as session:
+        await enqueue_jobs(session, [spec], rearm_finished=True)
+        await session.commit()
+    runner = JobRunner(session_factory=session_factory)
+    assert await runner.run_once() is True
+
+    async with session_factory() as session:
+        await enqueue_jobs(session, [{**spec, "payload": {"n": 2}}], rearm_finished=True)
+        await enqueue_jobs(session, [{**spec, "payload": {"n": 3}}], rearm_finished=True)
+        await session.commit()
+    job = (await _jobs(session_factory))[0]
+    assert (job.status, job.attempts) == ("pending", 0)
+
+    assert await runner.run_once() is True
+    assert await runner.run_once() is False
+    assert [call["n"] for call in handled] == [1, 2]
+
+
+def test_backoff_grows_exponentially_up_to_cap():
+    """Delays double per attempt (with jitter) and never exceed the cap."""
+    assert 8 <= backoff_seconds(1, base=10, cap=900) <= 12
+    assert 32 <= backoff_seconds(3, base=10, cap=900) <= 48
+    assert backoff_seconds(20, base=10, cap=900) <= 900 * 1.2
@@ -0,0 +1,61 @@
+"""
+Pytest tests for recurring occasion dates and the roll-forward of passed occasions.
+"""
+
+import uuid
+from datetime import date
+from types import SimpleNamespace
+
+from app.database.models import Occasion, OccasionStatus
+from app.services.occasions import roll_forward_occasions
+from app.utils.occasion_dates import next_occurrence, occasion_schedule
+
+TODAY = date(2026, 10, 17)
+
+
+def test_birthdays_recur_from_month_and_day():
+    """A birth date in the past resolves to this year's or next year's birthday."""
+    schedule = occasion_schedule("1990-11-02", "Birthday", "birthday", TODAY)
+    assert schedule == {
+        "date": date(1990, 11, 2),
+        "month": 11,
+        "day": 2,
+        "recurrence": "yearly",
+        "next_occurrence": date(2026, 11, 2),
+    }
+    assert occasion_schedule("March 3rd", "Anniversary", None, TODAY)["next_occurrence"] == date(2027, 3, 3)
+
+
+def test_one_off_occasions_keep_their_date():
+    """Non-recurring occasions are due once, on their stored date."""
+    schedule = occasion_schedule("2026-12-05", "Graduation", "graduation", TODAY)
+    assert schedule["recurrence"] is None
+    assert schedule["next_occurrence"] == date(2026, 12, 5)
+    assert occasion_schedule("someday", "Birthday", "birthday", TODAY)["next_occurrence"] is None
+
+
+def test_leap_day_birthdays_fall_on_feb_28():
+    """Feb 29 birthdays land on Feb 28 outside leap years."""
+    assert next_occurrence(2, 29, "yearly", date(2000, 2, 29), TODAY) == date(2027, 2, 28)
+    assert next_occurrence(2, 29, "yearly", date(2000, 2, 29), date(2027, 3, 1)) == date(2028, 2, 29)
+
+
+async def test_roll_forward_moves_passed_yearly_occasions():
+    """Last year's birthday moves to next year and its status resets."""
+    occasion = Occasion(
+        id=uuid.uuid4(), name="Birthday", date=date(1990, 3, 1), month=3, day=1,
+        recurrence="yearly", next_occurrence=date(2026, 3, 1), status=OccasionStatus.DONE
+    )
+    flushed = []
+
+    class Session:
+        async def execute(self, statement):
+            return SimpleNamespace(scalars=lambda: SimpleNamespace(all=lambda: [occasion]))
+
+        async def flush(self):
+            flushed.append(True)
+
+    assert await roll_forward_occasions(Session(), uuid.uuid4(), TODAY) == 1
+    assert occasion.next_occurrence == date(2027, 3, 1)
+    assert occasion.status == OccasionStatus.IDEA_NEEDED
+    assert flushed == [True]
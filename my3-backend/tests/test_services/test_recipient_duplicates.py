@@ -0,0 +1,79 @@
+"""
+Pytest tests for natural-key duplicate detection and its use in casual chat.
+"""
+
+import uuid
+from datetime import datetime, timezone
+from types import SimpleNamespace
+
+from langchain_core.language_models.fake_chat_models import GenericFakeChatModel
+from langchain_core.messages import AIMessage, HumanMessage
+from sqlalchemy.dialects import postgresql
+
+from app.database.models import Recipient
+from app.graph import nodes
+from app.services.recipient_duplicates import find_duplicate_recipients
+
+
+class QuerySession:
+    """Stands in for AsyncSession; returns fixed rows and keeps the statement."""
+
+    def __init__(self, rows):
+        self.rows = rows
+        self.statements = []
+
+    async def execute(self, statement):
+        self.statements.append(statement)
+        return SimpleNamespace(scalars=lambda: SimpleNamespace(all=lambda: self.rows))
+
+
+def _recipient(name, relationship, natural_key):
+    return Recipient(
+        id=uuid.uuid4(), name=name, relationship_type=relationship, natural_key=natural_key,
+        created_at=datetime.now(timezone.utc)
+    )
+
+
+async def test_groups_rows_by_natural_key_with_one_query():
+    """Rows ordered by natural key come back as groups from a single indexed GROUP BY query."""
+    rows = [
+        _recipient("Meera", "sister", "meera|sister"),
+        _recipient("meera ", "Sister", "meera|sister"),
+        _recipient("Ravi", None, "ravi|"),
+        _recipient("Ravi", None, "ravi|"),
+    ]
+    session = QuerySession(rows)
+
+    groups = await find_duplicate_recipients(session, uuid.uuid4())
+
+    assert [len(group) for group in groups] == [2, 2]
+    assert len(session.statements) == 1
+    sql = str(session.statements[0].compile(dialect=postgresql.dialect()))
+    assert "GROUP BY recipients.natural_key" in sql
+    assert "HAVING count(*) >" in sql
+
+
+async def test_chat_uses_precomputed_duplicate_groups(monkeypatch):
+    """Confirming duplicate removal deletes all but the first (most complete/newest) entry."""
+    fake_llm = GenericFakeChatModel(messages=iter([AIMessage(content="Sure.")]))
+    monkeypatch.setattr(nodes, "get_llm", lambda **kwargs: fake_llm)
+    state = {
+        "current_intent": "casual_chat",
+        "messages": [
+            AIMessage(content="You have duplicate entries for Meera. Remove them?"),
+            HumanMessage(content="yes please"),
+        ],
+        "user_recipients": [
+            {"id": "r1", "name": "Meera", "relationship": "sister"},
+            {"id": "r2", "name": "Meera", "relationship": "sister"},
+            {"id": "r3", "name": "Ravi", "relationship": "friend"},
+        ],
+        "user_occasions": [],
+        "duplicate_groups": [["r2", "r1"]],
+        "pending_actions": [],
+    }
+
+    result = await nodes.compose_response_node(state)
+
+    assert result["pending_actions"] == [{"type": "delete_recipient", "recipient_id": "r1"}]
+    assert result["requires_confirmation"] is True
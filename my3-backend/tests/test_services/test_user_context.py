@@ -0,0 +1,80 @@
+"""
+Pytest tests for the per-user chat context cache.
+"""
+
+from app.services.user_context import UserContextCache, UserContextSnapshot
+
+
+def _snapshot(cache, user_id, name="Ritika"):
+    return UserContextSnapshot(
+        version=cache.version(user_id),
+        user_recipients=[{"id": "r1", "name": name}],
+        user_occasions=[]
+    )
+
+
+def test_hit_after_put():
+    """Consecutive turns are served from the cache."""
+    cache = UserContextCache(max_users=10)
+    assert cache.get("user-1") is None
+    cache.put("user-1", _snapshot(cache, "user-1"))
+    assert cache.get("user-1").user_recipients[0]["name"] == "Ritika"
+    assert cache.hits == 1 and cache.misses == 1
+
+
+def test_invalidate_drops_snapshot():
+    """Writes invalidate the cached snapshot."""
+    cache = UserContextCache(max_users=10)
+    cache.put("user-1", _snapshot(cache, "user-1"))
+    cache.invalidate("user-1")
+    assert cache.get("user-1") is None
+
+
+def test_stale_load_is_not_cached():
+    """A snapshot loaded before a concurrent write is rejected by its version stamp."""
+    cache = UserContextCache(max_users=10)
+    stale = _snapshot(cache, "user-1")
+    cache.invalidate("user-1")  # write lands while the snapshot was loading
+    assert cache.put("user-1", stale) is False
+    assert cache.get("user-1") is None
+
+
+def test_lru_eviction():
+    """Least recently used users are evicted first."""
+    cache = UserContextCache(max_users=2)
+    for user_id in ("a", "b"):
+        cache.put(user_id, _snapshot(cache, user_id))
+    cache.get("a")
+    cache.put("c", _snapshot(cache, "c"))
+    assert cache.get("b") is None
+    assert cache.get("a") is not None
+    assert cache.get("c") is not None
+
+
+def test_ttl_expiry():
+    """Entries older than the TTL are reloaded."""
+    cache = UserContextCache(max_users=10, ttl_seconds=0)
+    snapshot = _snapshot(cache, "user-1")
+    snapshot.loaded_at -= 1
+    cache.put("user-1", snapshot)
+    assert cache.get("user-1") is None
+
+
+def test_versions_stay_bounded():
+    """Invalidating many users keeps at most max_users entries, versions included."""
+    cache = UserContextCache(max_users=3)
+    for i in range(100):
+        cache.invalidate(f"user-{i}")
+        cache.put(f"other-{i}", _snapshot(cache, f"other-{i}"))
+    assert len(cache) == 3
+
+
+def test_stale_load_is_rejected_after_eviction():
+    """A write followed by eviction still rejects a snapshot loaded before the write."""
+    cache = UserContextCache(max_users=1)
+    stale = _snapshot(cache, "user-1")
+    cache.invalidate("user-1")
+    cache.invalidate("user-2")  # evicts user-1 and its version
+    assert cache.put("user-1", stale) is False
+    assert cache.put("user-1", _snapshot(cache, "user-1")) is True
+    assert cache.get("user-1") is not None